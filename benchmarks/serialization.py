@@ -0,0 +1,93 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmark the serializers of python tasks across payload sizes.
+
+For each payload size, the time to hand an array argument from the workflow
+to a task is measured: the arguments are packed by Parsl as for submission,
+unpacked as on a worker, and decoded.  The interchange and the network are
+left out, since they only add copies of the packed bytes, so the savings
+measured here are a lower bound.  NumPy arrays are used when NumPy is
+installed, and an equivalent buffer-backed object otherwise.
+
+Usage::
+
+    python benchmarks/serialization.py [--sizes 1 16 128 512] [--repeat 3]
+"""
+
+import argparse
+import pickle
+import time
+
+from parsl.serialize import pack_apply_message, unpack_apply_message
+
+from chiltepin import serialization
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Payload:
+    """Stand-in for a NumPy array when NumPy is not installed"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= 5:
+            return Payload, (pickle.PickleBuffer(self.data),)
+        return Payload, (bytes(self.data),)
+
+
+def make_payload(megabytes):
+    size = megabytes * 2**20
+    if numpy is not None:
+        return numpy.ones(size // 8, dtype=numpy.float64)
+    return Payload(bytearray(b"\x01" * size))
+
+
+def task(field):
+    return field
+
+
+def hand_over(payload, serializer):
+    """Hand a payload to a task and return the seconds it took"""
+    start = time.perf_counter()
+    args, kwargs = (payload,), {}
+    releases = []
+    if serializer is not None:
+        args, kwargs, releases = serialization.encode_arguments(
+            args, kwargs, serializer
+        )
+    packed = pack_apply_message(task, args, kwargs, buffer_threshold=2**62)
+    _, args, kwargs = unpack_apply_message(packed)
+    if serializer is not None:
+        args = [a.decode() if isinstance(a, serialization.Encoded) else a for a in args]
+    elapsed = time.perf_counter() - start
+    for release in releases:
+        release()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 16, 128, 512])
+    parser.add_argument("--repeat", type=int, default=3)
+    options = parser.parse_args()
+
+    names = ["parsl", *serialization.SERIALIZERS]
+    print(f"{'MB':>6}" + "".join(f"{name:>12}" for name in names))
+    for megabytes in options.sizes:
+        payload = make_payload(megabytes)
+        times = []
+        for name in names:
+            serializer = None if name == "parsl" else serialization.get_serializer(name)
+            times.append(
+                min(hand_over(payload, serializer) for _ in range(options.repeat))
+            )
+        print(f"{megabytes:>6}" + "".join(f"{t:>11.3f}s" for t in times))
+
+
+if __name__ == "__main__":
+    main()
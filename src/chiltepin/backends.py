@@ -0,0 +1,396 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Transfer backends for Chiltepin data movement.
+
+The functions in :mod:`chiltepin.data` do not talk to a transfer service
+directly.  Instead, they drive a *transfer backend* that knows how to resolve
+endpoint names, submit transfer and deletion requests, poll their status, and
+cancel them.  This keeps the waiting and polling logic in one place and makes
+it possible to swap Globus for a simulated service when testing or
+benchmarking staging pipelines offline.
+
+Available Backends
+------------------
+- :class:`GlobusTransferBackend`: Submits requests to Globus Transfer
+- :class:`LocalTransferBackend`: Simulates transfers on the local filesystem
+  with configurable bandwidth and latency
+
+Examples
+--------
+Benchmark a staging step without credentials or a network::
+
+    from chiltepin.backends import LocalTransferBackend
+    from chiltepin.data import transfer
+
+    backend = LocalTransferBackend(
+        endpoints={"archive": "/tmp/archive", "scratch": "/tmp/scratch"},
+        bandwidth=100e6,  # 100 MB/s
+        latency=2.0,
+    )
+    transfer(
+        "archive",
+        "scratch",
+        "input.dat",
+        "input.dat",
+        polling_interval=0.5,
+        backend=backend,
+    )
+"""
+
+import os
+import shutil
+import time
+import uuid
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    runtime_checkable,
+)
+
+from globus_sdk import TransferClient
+
+# Task states reported by poll().  These mirror the Globus Transfer task states.
+ACTIVE = "ACTIVE"
+INACTIVE = "INACTIVE"
+SUCCEEDED = "SUCCEEDED"
+FAILED = "FAILED"
+
+TERMINAL_STATES = (SUCCEEDED, FAILED)
+
+
+@runtime_checkable
+class TransferBackend(Protocol):
+    """Interface implemented by all transfer backends
+
+    The ``poll`` method returns a dictionary that always contains a
+    ``"status"`` key (one of ``ACTIVE``, ``INACTIVE``, ``SUCCEEDED`` or
+    ``FAILED``) and the integer counters ``"bytes_transferred"``,
+    ``"files_transferred"`` and ``"faults"``.
+    """
+
+    def resolve_endpoint(self, name: str) -> Optional[str]:
+        """Return the id of the endpoint with the given name or id, or None"""
+        ...
+
+    def submit_transfer(
+        self,
+        src_id: str,
+        dst_id: str,
+        items: Sequence[Tuple[str, str]],
+        recursive: bool = False,
+    ) -> str:
+        """Submit a transfer of (src_path, dst_path) items and return its task id"""
+        ...
+
+    def submit_delete(
+        self,
+        src_id: str,
+        paths: Sequence[str],
+        recursive: bool = False,
+    ) -> str:
+        """Submit a deletion of the given paths and return its task id"""
+        ...
+
+    def poll(self, task_id: str) -> Dict[str, Any]:
+        """Return the current status of a submitted task"""
+        ...
+
+    def cancel(self, task_id: str) -> None:
+        """Cancel a submitted task"""
+        ...
+
+
+def _raise_transfer_api_error(err) -> None:
+    """Translate a globus_sdk.TransferAPIError into a RuntimeError"""
+    if err.info.consent_required:
+        raise RuntimeError(
+            "Encountered a ConsentRequired error.\n"
+            "You must login a second time to grant consents.\n\n"
+            "err.info"
+        )
+    else:
+        raise RuntimeError(err)
+
+
+class GlobusTransferBackend:
+    """Transfer backend that uses the Globus Transfer service
+
+    Parameters
+    ----------
+
+    client: TransferClient | None
+        Transfer client to use for submitting requests. If None, one will be
+        retrieved via the login process. If a login has already been
+        performed, no login flow prompts will be issued.
+    """
+
+    def __init__(self, client: Optional[TransferClient] = None):
+        if not client:
+            import chiltepin.endpoint as endpoint
+
+            clients = endpoint.login()
+            client = clients["transfer"]
+        self.client = client
+
+    def resolve_endpoint(self, name: str) -> Optional[str]:
+        endpoint_id = None
+        for ep in self.client.endpoint_search(name, filter_non_functional=False):
+            if ep["display_name"] == name or ep["id"] == name:
+                endpoint_id = ep["id"]
+        return endpoint_id
+
+    def submit_transfer(
+        self,
+        src_id: str,
+        dst_id: str,
+        items: Sequence[Tuple[str, str]],
+        recursive: bool = False,
+    ) -> str:
+        import globus_sdk
+
+        # Build the transfer data
+        task_data = globus_sdk.TransferData(
+            self.client,
+            source_endpoint=src_id,
+            destination_endpoint=dst_id,
+        )
+        for src_path, dst_path in items:
+            task_data.add_item(
+                src_path,
+                dst_path,
+                recursive=recursive,
+            )
+
+        try:
+            task_doc = self.client.submit_transfer(task_data)
+        except globus_sdk.TransferAPIError as err:
+            _raise_transfer_api_error(err)
+        return task_doc["task_id"]
+
+    def submit_delete(
+        self,
+        src_id: str,
+        paths: Sequence[str],
+        recursive: bool = False,
+    ) -> str:
+        import globus_sdk
+
+        # Build the delete data payload
+        task_data = globus_sdk.DeleteData(self.client, src_id, recursive=recursive)
+        for path in paths:
+            task_data.add_item(path)
+
+        try:
+            task_doc = self.client.submit_delete(task_data)
+        except globus_sdk.TransferAPIError as err:
+            _raise_transfer_api_error(err)
+        return task_doc["task_id"]
+
+    def poll(self, task_id: str) -> Dict[str, Any]:
+        import globus_sdk
+
+        try:
+            task_doc = self.client.get_task(task_id)
+        except globus_sdk.TransferAPIError as err:
+            _raise_transfer_api_error(err)
+        return {
+            "status": task_doc["status"],
+            "bytes_transferred": task_doc.get("bytes_transferred") or 0,
+            "files_transferred": task_doc.get("files_transferred") or 0,
+            "faults": task_doc.get("faults") or 0,
+        }
+
+    def cancel(self, task_id: str) -> None:
+        self.client.cancel_task(task_id)
+
+
+class LocalTransferBackend:
+    """Simulated transfer backend that moves files on the local filesystem
+
+    Each endpoint is mapped to a local directory.  Submitted tasks report
+    ``ACTIVE`` status with a byte count that grows at the configured
+    bandwidth after the configured latency has elapsed.  The files are
+    copied (or deleted) when the simulated task completes, so they only
+    appear at the destination once the task reports ``SUCCEEDED``.
+
+    Parameters
+    ----------
+
+    endpoints: Dict[str, str] | None
+        Mapping of endpoint names to the local directories they expose. Paths
+        given to the backend are interpreted relative to these directories.
+        If None, every endpoint name resolves and paths are used as given.
+
+    bandwidth: float | None
+        Simulated transfer rate in bytes per second. If None, transfers
+        complete as soon as the latency has elapsed.
+
+    latency: float
+        Simulated number of seconds between submission and the first byte
+        being transferred.
+
+    clock: Callable[[], float]
+        Function returning the current time in seconds. Defaults to
+        time.monotonic and can be replaced to drive the simulation manually.
+    """
+
+    def __init__(
+        self,
+        endpoints: Optional[Dict[str, str]] = None,
+        bandwidth: Optional[float] = None,
+        latency: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if bandwidth is not None and bandwidth <= 0:
+            raise ValueError("bandwidth must be positive")
+        if latency < 0:
+            raise ValueError("latency must not be negative")
+        self.endpoints = endpoints
+        self.bandwidth = bandwidth
+        self.latency = latency
+        self.clock = clock
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+
+    def _path(self, endpoint_id: str, path: str) -> str:
+        if self.endpoints is None:
+            return path
+        return os.path.join(self.endpoints[endpoint_id], path.lstrip("/"))
+
+    def _duration(self, nbytes: int) -> float:
+        if self.bandwidth is None:
+            return self.latency
+        return self.latency + nbytes / self.bandwidth
+
+    def resolve_endpoint(self, name: str) -> Optional[str]:
+        if self.endpoints is None or name in self.endpoints:
+            return name
+        return None
+
+    def submit_transfer(
+        self,
+        src_id: str,
+        dst_id: str,
+        items: Sequence[Tuple[str, str]],
+        recursive: bool = False,
+    ) -> str:
+        # Enumerate the files that make up the transfer so progress can be reported
+        files: List[Tuple[str, str, int]] = []
+        error = None
+        for src, dst in items:
+            src_path = self._path(src_id, src)
+            dst_path = self._path(dst_id, dst)
+            if os.path.isdir(src_path):
+                if not recursive:
+                    error = f"{src} is a directory and recursive is False"
+                    break
+                for root, _, names in os.walk(src_path):
+                    for name in names:
+                        path = os.path.join(root, name)
+                        rel = os.path.relpath(path, src_path)
+                        files.append(
+                            (path, os.path.join(dst_path, rel), os.path.getsize(path))
+                        )
+            elif os.path.isfile(src_path):
+                files.append((src_path, dst_path, os.path.getsize(src_path)))
+            else:
+                error = f"{src} does not exist"
+                break
+
+        task_id = str(uuid.uuid4())
+        nbytes = sum(size for _, _, size in files)
+        self.tasks[task_id] = {
+            "kind": "transfer",
+            "files": files,
+            "bytes": nbytes,
+            "start": self.clock(),
+            "duration": self._duration(nbytes),
+            "status": ACTIVE,
+            "error": error,
+        }
+        return task_id
+
+    def submit_delete(
+        self,
+        src_id: str,
+        paths: Sequence[str],
+        recursive: bool = False,
+    ) -> str:
+        task_id = str(uuid.uuid4())
+        self.tasks[task_id] = {
+            "kind": "delete",
+            "paths": [self._path(src_id, path) for path in paths],
+            "recursive": recursive,
+            "bytes": 0,
+            "start": self.clock(),
+            "duration": self.latency,
+            "status": ACTIVE,
+            "error": None,
+        }
+        return task_id
+
+    def _complete(self, task: Dict[str, Any]) -> None:
+        """Perform the filesystem operations of a task whose time has come"""
+        if task["error"] is not None:
+            task["status"] = FAILED
+            return
+        try:
+            if task["kind"] == "transfer":
+                for src, dst, _ in task["files"]:
+                    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+                    shutil.copy2(src, dst)
+            else:
+                for path in task["paths"]:
+                    if os.path.isdir(path) and not os.path.islink(path):
+                        if not task["recursive"]:
+                            raise OSError(f"{path} is a directory")
+                        shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+        except OSError as e:
+            task["error"] = str(e)
+            task["status"] = FAILED
+        else:
+            task["status"] = SUCCEEDED
+
+    def poll(self, task_id: str) -> Dict[str, Any]:
+        task = self.tasks[task_id]
+        if task["status"] == ACTIVE:
+            if self.clock() - task["start"] >= task["duration"]:
+                self._complete(task)
+
+        # Work out how much of the task has been transferred so far
+        if task["status"] == SUCCEEDED:
+            nbytes = task["bytes"]
+            nfiles = len(task.get("files", []))
+        elif task["status"] == ACTIVE and self.bandwidth is not None:
+            elapsed = self.clock() - task["start"] - self.latency
+            nbytes = min(task["bytes"], int(max(0.0, elapsed) * self.bandwidth))
+            nfiles = 0
+            remaining = nbytes
+            for _, _, size in task.get("files", []):
+                if size > remaining:
+                    break
+                remaining -= size
+                nfiles += 1
+        else:
+            nbytes = 0
+            nfiles = 0
+
+        return {
+            "status": task["status"],
+            "bytes_transferred": nbytes,
+            "files_transferred": nfiles,
+            "faults": 1 if task["error"] is not None else 0,
+        }
+
+    def cancel(self, task_id: str) -> None:
+        task = self.tasks[task_id]
+        if task["status"] not in TERMINAL_STATES:
+            task["status"] = FAILED
+            task["error"] = "canceled"
@@ -1,13 +1,22 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import argparse
+import json
 
+import chiltepin.configure as configure
 import chiltepin.endpoint as endpoint
-
-
-def cli_list(config_dir=None):
-    ep_info = endpoint.show(config_dir=config_dir)
-    if ep_info:
+import chiltepin.watchdog as watchdog
+
+
+def cli_list(
+    config_dir=None, pattern="*", status=None, output_format="table", cache_ttl=None
+):
+    ep_info = endpoint.show(
+        config_dir=config_dir, pattern=pattern, status=status, cache_ttl=cache_ttl
+    )
+    if output_format == "json":
+        print(json.dumps(ep_info, indent=2))
+    elif ep_info:
         name_len = max(len(key) for key in ep_info)
         for name, props in ep_info.items():
             endpoint_id = props.get("id") or "None"
@@ -17,6 +26,42 @@ def cli_list(config_dir=None):
         print("No endpoints are configured")
 
 
+def cli_cold_start(name, config_dir=None, config_file=None, resource=None):
+    config = None
+    if resource is not None and config_file is None:
+        cold_start_parser.error("--resource requires --file")
+    if config_file is not None and resource is None:
+        cold_start_parser.error("--file requires --resource")
+    if resource is not None:
+        resources = configure.parse_file(config_file)
+        if resource not in resources:
+            cold_start_parser.error(
+                f"resource '{resource}' is not in {config_file}, "
+                f"choose from {sorted(resources)}"
+            )
+        config = resources[resource]
+    timings = endpoint.measure_cold_start(name, config=config, config_dir=config_dir)
+    print(f"First task: {timings['first_task']:8.2f}s")
+    print(f"Warm task:  {timings['warm_task']:8.2f}s")
+    print(f"Cold start: {timings['cold_start']:8.2f}s")
+
+
+def cli_watch(
+    names, config_dir=None, interval=30.0, status_file=None, restart_stopped=False
+):
+    dog = watchdog.EndpointWatchdog(
+        names,
+        config_dir=config_dir,
+        interval=interval,
+        status_file=status_file,
+        restart_stopped=restart_stopped,
+    )
+    try:
+        dog.run()
+    except KeyboardInterrupt:
+        pass
+
+
 # Create root level parser
 root_parser = argparse.ArgumentParser(prog="chiltepin")
 
@@ -64,10 +109,61 @@ configure_parser = endpoint_parsers.add_parser(
     help="configure an endpoint",
 )
 configure_parser.add_argument("name", help="name of endpoint to configure")
+configure_parser.add_argument(
+    "--heartbeat-period",
+    type=int,
+    default=argparse.SUPPRESS,
+    help="seconds between user endpoint heartbeats (default: 30)",
+)
+configure_parser.add_argument(
+    "--idle-heartbeats-soft",
+    type=int,
+    default=argparse.SUPPRESS,
+    help="idle heartbeats before user endpoints shut down, 0 for never (default: 120)",
+)
+configure_parser.add_argument(
+    "--idle-heartbeats-hard",
+    type=int,
+    default=argparse.SUPPRESS,
+    help="heartbeats without progress before user endpoints shut down (default: 5760)",
+)
+configure_parser.add_argument(
+    "--in-process",
+    action="store_true",
+    default=argparse.SUPPRESS,
+    help="configure with the endpoint library instead of globus-compute-endpoint",
+)
 configure_parser.set_defaults(func=endpoint.configure)
 
 # Add parser for endpoint list command
 list_parser = endpoint_parsers.add_parser("list", help="List endpoints")
+list_parser.add_argument(
+    "pattern", nargs="?", default="*", help="glob pattern of endpoint names to list"
+)
+list_parser.add_argument(
+    "--status",
+    help="only list endpoints with this status (Initialized, Running, "
+    "Disconnected or Stopped)",
+)
+list_parser.add_argument(
+    "--format",
+    dest="output_format",
+    choices=["table", "json"],
+    default="table",
+    help="output format",
+)
+list_parser.add_argument(
+    "--json",
+    dest="output_format",
+    action="store_const",
+    const="json",
+    help="same as --format json",
+)
+list_parser.add_argument(
+    "--cache-ttl",
+    type=float,
+    help="reuse a listing of the endpoints for this many seconds",
+)
 list_parser.set_defaults(func=cli_list)
 
 # Add parser for endpoint start command
@@ -80,6 +176,37 @@ stop_parser = endpoint_parsers.add_parser("stop", help="stop an endpoint")
 stop_parser.add_argument("name", help="name of endpoint to stop")
 stop_parser.set_defaults(func=endpoint.stop)
 
+# Add parser for endpoint cold-start command
+cold_start_parser = endpoint_parsers.add_parser(
+    "cold-start", help="measure how long a user endpoint takes to start"
+)
+cold_start_parser.add_argument("name", help="name of endpoint to measure")
+cold_start_parser.add_argument(
+    "-f", "--file", dest="config_file", help="resource configuration file"
+)
+cold_start_parser.add_argument(
+    "-r", "--resource", help="label of the resource in the configuration file"
+)
+cold_start_parser.set_defaults(func=cli_cold_start)
+
+# Add parser for endpoint watch command
+watch_parser = endpoint_parsers.add_parser(
+    "watch", help="restart endpoints that stop running"
+)
+watch_parser.add_argument("names", nargs="+", help="names of endpoints to watch")
+watch_parser.add_argument(
+    "--interval", type=float, default=30.0, help="seconds between checks"
+)
+watch_parser.add_argument(
+    "--status-file", help="file to write the state of the endpoints to"
+)
+watch_parser.add_argument(
+    "--restart-stopped",
+    action="store_true",
+    help="also start endpoints that were stopped",
+)
+watch_parser.set_defaults(func=cli_watch)
+
 # Add parser for endpoint delete command
 delete_parser = endpoint_parsers.add_parser("delete", help="delete an endpoint")
 delete_parser.add_argument("name", help="name of endpoint to delete")
@@ -1,5 +1,8 @@
 # SPDX-License-Identifier: Apache-2.0
 
+import json
+import logging
+from functools import partial
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -14,9 +17,24 @@ from parsl.launchers import (
     SingleNodeLauncher,
     SrunLauncher,
 )
+from parsl.monitoring import MonitoringHub
 from parsl.providers import LocalProvider, PBSProProvider, SlurmProvider
 from parsl.providers.base import ExecutionProvider
 
+from chiltepin import providers
+
+logger = logging.getLogger(__name__)
+
+# Scaling strategies that can be set in resource configurations
+STRATEGIES = ("simple", "htex_auto_scale", "none")
+
+# Top level blocks of configuration files that are workflow settings, not resources
+SETTINGS = ("monitoring",)
+
+# Seconds between samples of the resources used by tasks when monitoring.
+# Coarser than Parsl's default, so monitoring is cheap enough to leave on.
+MONITORING_INTERVAL = 60.0
+
 
 def parse_file(filename: str) -> Dict[str, Any]:
     """Parse a YAML resource comfiguration file and return its contents as a dict
@@ -45,6 +63,94 @@ def parse_file(filename: str) -> Dict[str, Any]:
     return yaml_config if yaml_config is not None else {}
 
 
+def resource_configs(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the resource configurations of a configuration, without its settings
+
+    Parameters
+    ----------
+
+    config: Dict[str, Any]
+        YAML configuration that contains the configuration for a list of
+        resources and the top level settings, such as "monitoring"
+
+    Returns
+    -------
+
+    Dict[str, Any]
+    """
+    return {key: value for key, value in config.items() if key not in SETTINGS}
+
+
+def _block_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the provider options that control the number of blocks
+
+    Resources with the "none" strategy are pinned to their initial blocks.
+    """
+    init_blocks = config.get("init_blocks", 0)
+    if config.get("strategy") == "none":
+        return {
+            "init_blocks": init_blocks,
+            "min_blocks": init_blocks,
+            "max_blocks": init_blocks,
+            "parallelism": config.get("parallelism", 1),
+        }
+    return {
+        "init_blocks": init_blocks,
+        "min_blocks": config.get("min_blocks", 0),
+        "max_blocks": config.get("max_blocks", 1),
+        "parallelism": config.get("parallelism", 1),
+    }
+
+
+def strategy_options(resources: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Return the Parsl Config options for the scaling options of some resources
+
+    Parameters
+    ----------
+
+    resources: Dict[str, Dict[str, Any]]
+        Configurations of the loaded resources, keyed by resource label
+
+    Returns
+    -------
+
+    Dict[str, Any]
+        The ``strategy`` and ``max_idletime`` options of the Parsl Config,
+        for those that any resource sets
+    """
+    strategies = {}
+    for label, config in resources.items():
+        strategy = config.get("strategy")
+        if strategy is None:
+            continue
+        if strategy not in STRATEGIES:
+            raise ValueError(
+                f"Invalid strategy '{strategy}' for resource '{label}', "
+                f"must be one of {STRATEGIES}"
+            )
+        strategies[label] = strategy
+
+    options: Dict[str, Any] = {}
+    scaling = {s for s in strategies.values() if s != "none"}
+    if len(scaling) > 1:
+        raise ValueError(
+            f"Resources must use the same scaling strategy, got {strategies}"
+        )
+    if scaling:
+        options["strategy"] = scaling.pop()
+    elif strategies:
+        options["strategy"] = "none"
+
+    idletimes = [
+        config["max_idletime"]
+        for config in resources.values()
+        if config.get("max_idletime") is not None
+    ]
+    if idletimes:
+        options["max_idletime"] = float(max(idletimes))
+    return options
+
+
 def create_provider(config: Dict[str, Any]) -> ExecutionProvider:
     """Create the appropriate ExecutionProvider from the given configuration
 
@@ -63,6 +169,8 @@ def create_provider(config: Dict[str, Any]) -> ExecutionProvider:
         "init blocks":            0
         "min blocks":             0
         "max blocks":             1
+        "parallelism":            1
+        "strategy":               None (see chiltepin.scaling)
         "environment":            []
 
         Options for Slurm provider:
@@ -70,6 +178,7 @@ def create_provider(config: Dict[str, Any]) -> ExecutionProvider:
         "nodes per block":        1
         "exclusive":              True
         "partition":              None
+        "partitions":             None (see chiltepin.providers)
         "queue":                  None
         "account":                None
         "walltime":               "00:10:00"
@@ -78,6 +187,7 @@ def create_provider(config: Dict[str, Any]) -> ExecutionProvider:
         "cores per node":         1
         "nodes per block":        1
         "queue":                  None
+        "queues":                 None (see chiltepin.providers)
         "account":                None
         "walltime":               "00:10:00"
 
@@ -90,16 +200,20 @@ def create_provider(config: Dict[str, Any]) -> ExecutionProvider:
     provider = config.get("provider", "localhost")
 
     if provider == "slurm":
-        return SlurmProvider(
+        if config.get("partitions"):
+            # Choose among the partitions each time a block is submitted
+            slurm_provider = partial(
+                providers.MultiPartitionSlurmProvider, config["partitions"]
+            )
+        else:
+            slurm_provider = partial(SlurmProvider, partition=config.get("partition"))
+        return slurm_provider(
             cores_per_node=(
                 None if config.get("mpi", False) else config.get("cores_per_node")
             ),
             nodes_per_block=config.get("nodes_per_block", 1),
-            init_blocks=config.get("init_blocks", 0),
-            min_blocks=config.get("min_blocks", 0),
-            max_blocks=config.get("max_blocks", 1),
+            **_block_options(config),
             exclusive=config.get("exclusive", True),
-            partition=config.get("partition"),
             qos=config.get("queue"),
             account=config.get("account"),
             walltime=config.get("walltime", "00:10:00"),
@@ -107,15 +221,17 @@ def create_provider(config: Dict[str, Any]) -> ExecutionProvider:
             launcher=(SimpleLauncher() if config.get("mpi", False) else SrunLauncher()),
         )
     elif provider == "pbspro":
-        return PBSProProvider(
+        if config.get("queues"):
+            # Choose among the queues each time a block is submitted
+            pbs_provider = partial(providers.MultiQueuePBSProProvider, config["queues"])
+        else:
+            pbs_provider = partial(PBSProProvider, queue=config.get("queue"))
+        return pbs_provider(
             cpus_per_node=(
                 None if config.get("mpi", False) else config.get("cores_per_node")
             ),
             nodes_per_block=config.get("nodes_per_block", 1),
-            init_blocks=config.get("init_blocks", 0),
-            min_blocks=config.get("min_blocks", 0),
-            max_blocks=config.get("max_blocks", 1),
-            queue=config.get("queue"),
+            **_block_options(config),
             account=config.get("account"),
             walltime=config.get("walltime", "00:10:00"),
             worker_init="\n".join(config.get("environment", [])),
@@ -125,9 +241,7 @@ def create_provider(config: Dict[str, Any]) -> ExecutionProvider:
         )
     elif provider == "localhost":
         return LocalProvider(
-            init_blocks=config.get("init_blocks", 0),
-            min_blocks=config.get("min_blocks", 0),
-            max_blocks=config.get("max_blocks", 1),
+            **_block_options(config),
             worker_init="\n".join(config.get("environment", [])),
             launcher=(
                 SimpleLauncher() if config.get("mpi", False) else SingleNodeLauncher()
@@ -228,6 +342,65 @@ def create_mpi_executor(
     return e
 
 
+# Options of the executors of Globus Compute resources, with their defaults
+_EXECUTOR_OPTIONS = {
+    "batch_size": 128,
+    "api_burst_limit": 4,
+    "api_burst_window_s": 16,
+    "amqp_port": None,
+}
+
+
+# Options of Globus Compute resources that keep user endpoints running
+_KEEP_ALIVE_OPTIONS = [
+    "heartbeat_period",
+    "idle_heartbeats_soft",
+    "idle_heartbeats_hard",
+]
+
+
+def user_endpoint_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the user endpoint configuration for a Globus Compute resource
+
+    These are the variables that the endpoint's configuration template is
+    rendered with when tasks are submitted to the resource.
+
+    Parameters
+    ----------
+
+    config: Dict[str, Any]
+        YAML configuration block that contains the resource's configuration
+
+    Returns
+    -------
+
+    Dict[str, Any]
+    """
+    default_launcher = (
+        "srun" if config.get("provider", "localhost") == "slurm" else "mpiexec"
+    )
+    # Keep-alive options are only sent when set, the endpoint has defaults
+    keep_alive = {key: config[key] for key in _KEEP_ALIVE_OPTIONS if key in config}
+    return {
+        "mpi": config.get("mpi", False),
+        "max_mpi_apps": config.get("max_mpi_apps", 1),
+        "mpi_launcher": config.get("mpi_launcher", default_launcher),
+        "provider": config.get("provider", "localhost"),
+        "cores_per_node": config.get("cores_per_node", 1),
+        "nodes_per_block": config.get("nodes_per_block", 1),
+        "init_blocks": config.get("init_blocks", 0),
+        "min_blocks": config.get("min_blocks", 0),
+        "max_blocks": config.get("max_blocks", 1),
+        "exclusive": config.get("exclusive", True),
+        "partition": config.get("partition", ""),
+        "queue": config.get("queue", ""),
+        "account": config.get("account", ""),
+        "walltime": config.get("walltime", "00:10:00"),
+        "worker_init": "\n".join(config.get("environment", [])),
+        **keep_alive,
+    }
+
+
 def create_globus_compute_executor(
     name: str,
     config: Dict[str, Any],
@@ -263,6 +436,18 @@ def create_globus_compute_executor(
         "walltime":               "00:10:00"
         "environment":            []
 
+        Options for submitting tasks and receiving results:
+        "batch size":             128
+        "api burst limit":        4
+        "api burst window s":     16
+        "amqp port":              None
+
+        Options for keeping user endpoints running, the endpoint's defaults
+        are used if they are not set:
+        "heartbeat period":       30
+        "idle heartbeats soft":   120
+        "idle heartbeats hard":   5760
+
     client: Client | None
         The Globus Compute client to use for instantiating the GlobusComputeExecutor.
         If not specified, Globus Compute will instantiate and use a default client.
@@ -273,31 +458,13 @@ def create_globus_compute_executor(
     GlobusComputeExecutor
     """
 
-    default_launcher = (
-        "srun" if config.get("provider", "localhost") == "slurm" else "mpiexec"
-    )
     e = GlobusComputeExecutor(
         label=name,
         executor=Executor(
             endpoint_id=config["endpoint"],
             client=client,
-            user_endpoint_config={
-                "mpi": config.get("mpi", False),
-                "max_mpi_apps": config.get("max_mpi_apps", 1),
-                "mpi_launcher": config.get("mpi_launcher", default_launcher),
-                "provider": config.get("provider", "localhost"),
-                "cores_per_node": config.get("cores_per_node", 1),
-                "nodes_per_block": config.get("nodes_per_block", 1),
-                "init_blocks": config.get("init_blocks", 0),
-                "min_blocks": config.get("min_blocks", 0),
-                "max_blocks": config.get("max_blocks", 1),
-                "exclusive": config.get("exclusive", True),
-                "partition": config.get("partition", ""),
-                "queue": config.get("queue", ""),
-                "account": config.get("account", ""),
-                "walltime": config.get("walltime", "00:10:00"),
-                "worker_init": "\n".join(config.get("environment", [])),
-            },
+            **{key: config.get(key, value) for key, value in _EXECUTOR_OPTIONS.items()},
+            user_endpoint_config=user_endpoint_config(config),
         ),
     )
     return e
@@ -340,6 +507,208 @@ def create_executor(
             return create_htex_executor(name, config)
 
 
+class _SharedGlobusComputeExecutor(GlobusComputeExecutor):
+    """GlobusComputeExecutor for a resource that shares another's executor
+
+    The executor is shut down with the resource that created it.
+    """
+
+    def shutdown(self):
+        ParslExecutor.shutdown(self)
+
+
+def _endpoint_key(config: Dict[str, Any]) -> str:
+    # Resources with the same key submit to the same user endpoint in the same way
+    options = {key: config.get(key, value) for key, value in _EXECUTOR_OPTIONS.items()}
+    return json.dumps(
+        [config["endpoint"], user_endpoint_config(config), options], sort_keys=True
+    )
+
+
+def shared_endpoints(config: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Find the Globus Compute resources that share a user endpoint
+
+    Resources for the same endpoint with the same user endpoint configuration
+    run their tasks in the same user endpoint.  When their executor options
+    are the same too, ``load`` creates a single executor for all of them.
+
+    Parameters
+    ----------
+
+    config: Dict[str, Any]
+        YAML configuration block that contains the configuration for a list of
+        resources
+
+    Returns
+    -------
+
+    Dict[str, List[str]]
+        The labels of the resources that share an executor, keyed by the label
+        of the first of them. Resources that do not share one are left out.
+    """
+    groups: Dict[str, List[str]] = {}
+    for label, resource_config in config.items():
+        if resource_config.get("endpoint"):
+            groups.setdefault(_endpoint_key(resource_config), []).append(label)
+    return {labels[0]: labels for labels in groups.values() if len(labels) > 1}
+
+
+def _create_shared_executor(
+    name: str,
+    config: Dict[str, Any],
+    client: Optional[Client],
+    shared: Dict[str, GlobusComputeExecutor],
+) -> ParslExecutor:
+    # Create an executor, reusing the one of an equivalent Globus Compute resource
+    if not config.get("endpoint"):
+        return create_executor(name, config, client)
+    key = _endpoint_key(config)
+    if key in shared:
+        return _SharedGlobusComputeExecutor(label=name, executor=shared[key].executor)
+    shared[key] = create_globus_compute_executor(name, config, client)
+    return shared[key]
+
+
+def normalize(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of a resource configuration with its defaults filled in
+
+    The defaults are the ones used when creating the resource's executor, so
+    the normalized configuration describes the resource that is actually
+    loaded.
+
+    Parameters
+    ----------
+
+    config: Dict[str, Any]
+        YAML configuration block that contains the resource's configuration
+
+    Returns
+    -------
+
+    Dict[str, Any]
+    """
+    normalized = dict(config)
+    normalized.setdefault("mpi", False)
+    normalized.setdefault("provider", "localhost")
+    normalized.setdefault("nodes_per_block", 1)
+    normalized.setdefault("init_blocks", 0)
+    normalized.setdefault("min_blocks", 0)
+    normalized.setdefault("max_blocks", 1)
+    normalized.setdefault("parallelism", 1)
+    normalized.setdefault("environment", [])
+    if normalized["mpi"]:
+        normalized.setdefault("max_mpi_apps", 1)
+        normalized.setdefault(
+            "mpi_launcher",
+            "srun" if normalized["provider"] == "slurm" else "mpiexec",
+        )
+    return normalized
+
+
+def check_resource_spec(
+    name: str,
+    config: Dict[str, Any],
+    spec: Dict[str, Any],
+) -> None:
+    """Check that an MPI resource specification fits the given MPI resource
+
+    Parameters
+    ----------
+
+    name: str
+        The name of the resource
+
+    config: Dict[str, Any]
+        YAML configuration block that contains the resource's configuration
+
+    spec: Dict[str, Any]
+        The ``parsl_resource_specification`` of a task, with optional
+        "num_nodes", "ranks_per_node" and "num_ranks" keys
+
+    Raises
+    ------
+
+    ValueError
+        If the resource is not an MPI resource or cannot provide the
+        requested nodes or ranks
+    """
+    config = normalize(config)
+    if not config["mpi"]:
+        raise ValueError(f"Resource '{name}' is not an MPI resource")
+    num_nodes = int(spec.get("num_nodes", 1))
+    nodes_per_block = config["nodes_per_block"]
+    if num_nodes > nodes_per_block:
+        raise ValueError(
+            f"Task needs {num_nodes} nodes but resource '{name}' only has "
+            f"{nodes_per_block} nodes per block"
+        )
+    ranks_per_node = spec.get("ranks_per_node")
+    # cores_per_node is not used by MPI executors, so only check it if it was given
+    if ranks_per_node is not None and "cores_per_node" in config:
+        if int(ranks_per_node) > config["cores_per_node"]:
+            raise ValueError(
+                f"Task needs {ranks_per_node} ranks per node but resource '{name}' "
+                f"only has {config['cores_per_node']} cores per node"
+            )
+    num_ranks = spec.get("num_ranks")
+    if num_ranks is not None and ranks_per_node is not None:
+        if int(num_ranks) > num_nodes * int(ranks_per_node):
+            raise ValueError(
+                f"Task needs {num_ranks} ranks but only asks for {num_nodes} nodes "
+                f"with {ranks_per_node} ranks per node"
+            )
+
+
+def create_monitoring_hub(config: Optional[Dict[str, Any]]) -> MonitoringHub:
+    """Create a Parsl MonitoringHub from the "monitoring" block of a configuration
+
+    The hub records every task, and samples the CPU and memory used by each
+    task every ``resource_monitoring_interval`` seconds, into a SQLite
+    database that can be queried after the workflow exits.
+
+    Parameters
+    ----------
+
+    config: Dict[str, Any] | None
+        YAML configuration block that contains the monitoring configuration,
+        with optional "database", "resource_monitoring",
+        "resource_monitoring_interval" and "workflow_name" keys. If None,
+        the defaults are used. The default database is "monitoring.db" in
+        the run directory of the workflow.
+
+    Returns
+    -------
+
+    MonitoringHub
+    """
+    # Parsl writes to the database from a separate process, check up front
+    # that it can
+    try:
+        import sqlalchemy  # noqa: F401
+    except ImportError:
+        raise ImportError(
+            "sqlalchemy is required for monitoring, install chiltepin[monitoring] "
+            "or remove the monitoring block from the configuration"
+        ) from None
+
+    config = config or {}
+    database = config.get("database")
+    if database is None or "://" in str(database):
+        logging_endpoint = database
+    else:
+        database = Path(database).expanduser().resolve()
+        database.parent.mkdir(parents=True, exist_ok=True)
+        logging_endpoint = f"sqlite:///{database}"
+    return MonitoringHub(
+        workflow_name=config.get("workflow_name"),
+        logging_endpoint=logging_endpoint,
+        resource_monitoring_enabled=config.get("resource_monitoring", True),
+        resource_monitoring_interval=float(
+            config.get("resource_monitoring_interval", MONITORING_INTERVAL)
+        ),
+    )
+
+
 def load(
     config: Dict[str, Any],
     include: Optional[List[str]] = None,
@@ -356,7 +725,8 @@ def load(
 
     config: Dict[str, Any]
         YAML configuration block that contains the configuration for a list of
-        resources
+        resources. If it has a "monitoring" block, Parsl monitoring is enabled
+        (see :func:`create_monitoring_hub`).
 
     include: List[str] | None
         A list of the labels of the resource configurations to load. The
@@ -366,8 +736,8 @@ def load(
 
     client: Client | None
         A Globus Compute client to use when instantiating Globus Compute resources.
-        The default is None.  If None, one will be instantiated automatically for
-        any Globus Compute resources in the configuration.
+        The default is None.  If None, one will be instantiated automatically and
+        shared by all the Globus Compute resources in the configuration.
 
     run_dir: str | None
         The directory to use for runtime files. The default is None, which means
@@ -382,6 +752,11 @@ def load(
     # Get project root directory for setting PYTHONPATH
     project_base = Path(__file__).parent.parent.parent.resolve()
 
+    # Separate the workflow settings from the resources
+    monitoring = "monitoring" in config
+    monitoring_config = config.get("monitoring")
+    config = resource_configs(config)
+
     # Determine which resources to load
     if include is None:
         resources = config
@@ -394,6 +769,24 @@ def load(
             )
         resources = {key: config[key] for key in include if key in config}
 
+    # Share one client, and its HTTP session, across Globus Compute resources
+    used = [*resources.values(), config.get("local", {})]
+    if client is None and any(resource.get("endpoint") for resource in used):
+        client = Client()
+
+    # The "local" resource is loaded even when it is not included
+    loaded = dict(resources)
+    if "local" in config:
+        loaded["local"] = config["local"]
+
+    # Resources that run in the same user endpoint share one executor
+    for label, labels in shared_endpoints(loaded).items():
+        logger.info(
+            f"Resources {labels} use the same user endpoint and share the "
+            f"executor of '{label}'"
+        )
+    shared: Dict[str, GlobusComputeExecutor] = {}
+
     # Create executors list
     executors = []
 
@@ -402,10 +795,11 @@ def load(
     if "local" in config:
         # User defined their own "local", use it as the default
         executors.append(
-            create_executor(
+            _create_shared_executor(
                 "local",
                 config["local"],
                 client,
+                shared,
             ),
         )
     else:
@@ -428,14 +822,18 @@ def load(
     for resource_name, resource_config in resources.items():
         if resource_name != "local":
             executors.append(
-                create_executor(
+                _create_shared_executor(
                     resource_name,
                     resource_config,
                     client,
+                    shared,
                 ),
             )
 
     config_kwargs = {"executors": executors}
+    config_kwargs.update(strategy_options(loaded))
     if run_dir is not None:
         config_kwargs["run_dir"] = run_dir
+    if monitoring:
+        config_kwargs["monitoring"] = create_monitoring_hub(monitoring_config)
     return Config(**config_kwargs)
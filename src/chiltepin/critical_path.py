@@ -0,0 +1,314 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Critical path analysis of finished workflows.
+
+The critical path of a workflow is the chain of dependent tasks that
+determined how long it ran.  Speeding up a task on the critical path
+shortens the workflow, while speeding up any other task does not, until it
+has used up its slack: the time it could have been delayed without delaying
+the workflow.
+
+Pass ``critical_path=True`` to :func:`chiltepin.workflow.run_workflow` to
+analyze a workflow when it exits.  The task dependency graph is rebuilt from
+the futures each task depended on (including those of its ``inputs`` and of
+the tasks joined by join tasks).  A summary is logged with the other
+workflow metrics, and the :class:`CriticalPath` is kept in the workflow's
+metrics for exporting.
+
+Examples
+--------
+::
+
+    from chiltepin import run_workflow
+    from chiltepin.metrics import WorkflowMetrics
+
+    metrics = WorkflowMetrics()
+    with run_workflow("config.yaml", metrics=metrics, critical_path=True):
+        ...
+
+    report = metrics.critical_path
+    print(report.summary())
+    with open("workflow.dot", "w") as f:
+        f.write(report.to_dot())
+    with open("workflow.json", "w") as f:
+        f.write(report.to_json())
+"""
+
+import json
+import logging
+from graphlib import TopologicalSorter
+from typing import Any, Dict, Iterable, List
+
+_logger = logging.getLogger(__name__)
+
+
+class CriticalPath:
+    """Critical path, slack and bottleneck resources of a finished workflow
+
+    A task can start once it has been submitted and the tasks it depends on
+    have finished.  The time from then until it finished, which includes any
+    time spent waiting for a worker, is its duration.
+
+    Parameters
+    ----------
+
+    tasks: Dict[int, Dict[str, Any]]
+        The tasks of the workflow keyed by task id.  Each task has a "name",
+        the "resource" it ran on, its final "status", the "submitted" and
+        "finished" times in seconds since the epoch, and the ids of the tasks
+        it "depends" on.  Tasks that have not finished are ignored.
+    """
+
+    def __init__(self, tasks: Dict[int, Dict[str, Any]]):
+        self.tasks = {
+            task_id: dict(task)
+            for task_id, task in tasks.items()
+            if task.get("finished") is not None
+        }
+        for task in self.tasks.values():
+            task["depends"] = sorted(
+                {dep for dep in task.get("depends", []) if dep in self.tasks}
+            )
+        self._analyze()
+
+    @classmethod
+    def from_task_records(cls, records: Iterable[Dict[str, Any]]) -> "CriticalPath":
+        """Build the analysis from the task records of a Parsl DataFlowKernel
+
+        Parameters
+        ----------
+
+        records: Iterable[Dict[str, Any]]
+            Parsl task records, such as ``dfk.tasks.values()`` when the DFK
+            does not garbage collect finished tasks
+
+        Returns
+        -------
+
+        CriticalPath
+        """
+        tasks = {}
+        untracked = 0
+        for record in records:
+            depends = list(record.get("depends") or [])
+            # Join tasks finish after the tasks they join
+            joins = record.get("joins")
+            if joins:
+                depends.extend(joins if isinstance(joins, list) else [joins])
+            # Futures of Chiltepin tasks forward tid to the AppFuture of the task
+            dep_ids = [getattr(dep, "tid", None) for dep in depends]
+            untracked += dep_ids.count(None)
+            status = record.get("status")
+            tasks[record["id"]] = {
+                "name": record.get("func_name"),
+                "resource": record.get("executor"),
+                "status": getattr(status, "name", status),
+                "submitted": _timestamp(record.get("time_invoked")),
+                "finished": _timestamp(record.get("time_returned")),
+                "depends": [dep_id for dep_id in dep_ids if dep_id is not None],
+            }
+        if untracked:
+            _logger.warning(
+                f"Critical path: ignored {untracked} dependencies that are not "
+                "futures of workflow tasks"
+            )
+        return cls(tasks)
+
+    def _analyze(self) -> None:
+        graph = {task_id: task["depends"] for task_id, task in self.tasks.items()}
+        order = list(TopologicalSorter(graph).static_order())
+        self.start = min((t["submitted"] for t in self.tasks.values()), default=0.0)
+
+        # Forward pass: the earliest time each task could start and finish
+        for task_id in order:
+            task = self.tasks[task_id]
+            release = task["submitted"] - self.start
+            ready = max(
+                [task["submitted"]]
+                + [self.tasks[d]["finished"] for d in task["depends"]]
+            )
+            task["duration"] = max(0.0, task["finished"] - ready)
+            task["earliest_start"] = max(
+                [release] + [self.tasks[d]["earliest_finish"] for d in task["depends"]]
+            )
+            task["earliest_finish"] = task["earliest_start"] + task["duration"]
+        self.makespan = max(
+            (t["earliest_finish"] for t in self.tasks.values()), default=0.0
+        )
+
+        # Backward pass: the latest time each task could finish without
+        # delaying the workflow
+        successors: Dict[int, List[int]] = {task_id: [] for task_id in self.tasks}
+        for task_id, task in self.tasks.items():
+            for dep in task["depends"]:
+                successors[dep].append(task_id)
+        for task_id in reversed(order):
+            task = self.tasks[task_id]
+            latest_finish = min(
+                [self.makespan]
+                + [self.tasks[s]["latest_start"] for s in successors[task_id]]
+            )
+            task["latest_start"] = latest_finish - task["duration"]
+            task["slack"] = max(0.0, task["latest_start"] - task["earliest_start"])
+
+        # Follow the dependencies that determined when each task could start
+        # back from the task that finished last
+        self.path: List[int] = []
+        if self.tasks:
+            task_id = max(self.tasks, key=lambda t: self.tasks[t]["earliest_finish"])
+            while task_id is not None:
+                self.path.append(task_id)
+                task = self.tasks[task_id]
+                task_id = max(
+                    task["depends"],
+                    key=lambda d: self.tasks[d]["earliest_finish"],
+                    default=None,
+                )
+                if (
+                    task_id is not None
+                    and self.tasks[task_id]["earliest_finish"] < task["earliest_start"]
+                ):
+                    # The task was submitted after its dependencies finished
+                    task_id = None
+            self.path.reverse()
+        for task_id, task in self.tasks.items():
+            task["critical"] = False
+        for task_id in self.path:
+            self.tasks[task_id]["critical"] = True
+
+    def resources(self) -> Dict[str, Dict[str, Any]]:
+        """Return the time spent on the critical path by each resource
+
+        Returns
+        -------
+
+        Dict[str, Dict[str, Any]]
+            The number of critical ``tasks`` and their total ``duration`` on
+            each resource, and the ``fraction`` of the makespan that duration
+            is, ordered from the resource that bottlenecked the workflow most
+        """
+        resources: Dict[str, Dict[str, Any]] = {}
+        for task_id in self.path:
+            task = self.tasks[task_id]
+            totals = resources.setdefault(
+                str(task["resource"]), {"tasks": 0, "duration": 0.0}
+            )
+            totals["tasks"] += 1
+            totals["duration"] += task["duration"]
+        for totals in resources.values():
+            totals["fraction"] = (
+                totals["duration"] / self.makespan if self.makespan > 0 else 0.0
+            )
+        return dict(
+            sorted(
+                resources.items(), key=lambda item: item[1]["duration"], reverse=True
+            )
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the analysis as a dictionary that can be serialized to JSON
+
+        Returns
+        -------
+
+        Dict[str, Any]
+            The "makespan" in seconds, the ids of the tasks on the
+            "critical_path", the "resources" on it, and all "tasks" keyed by
+            task id with their duration, slack, and earliest and latest start
+            times in seconds since the first task was submitted
+        """
+        return {
+            "makespan": self.makespan,
+            "critical_path": list(self.path),
+            "resources": self.resources(),
+            "tasks": {str(task_id): task for task_id, task in self.tasks.items()},
+        }
+
+    def to_json(self) -> str:
+        """Return the analysis as JSON, see :meth:`to_dict`
+
+        Returns
+        -------
+
+        str
+        """
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_dot(self) -> str:
+        """Return the task graph in Graphviz DOT format
+
+        Tasks are labelled with their name, duration and slack, and the
+        critical path is drawn in red.
+
+        Returns
+        -------
+
+        str
+        """
+        lines = ["digraph workflow {", "  rankdir=LR;", "  node [shape=box];"]
+        for task_id, task in sorted(self.tasks.items()):
+            label = (
+                f"{task['name']} ({task_id})\\n{task['resource']}\\n"
+                f"{task['duration']:.1f}s, slack {task['slack']:.1f}s"
+            )
+            style = ", color=red, penwidth=2" if task["critical"] else ""
+            lines.append(f'  {task_id} [label="{label}"{style}];')
+        for task_id, task in sorted(self.tasks.items()):
+            for dep in task["depends"]:
+                critical = task["critical"] and self.tasks[dep]["critical"]
+                style = " [color=red, penwidth=2]" if critical else ""
+                lines.append(f"  {dep} -> {task_id}{style};")
+        lines.append("}")
+        return "\n".join(lines)
+
+    def summary(self, max_tasks: int = 10) -> str:
+        """Return a human readable summary of the analysis
+
+        Parameters
+        ----------
+
+        max_tasks: int
+            Maximum number of tasks off the critical path to list by slack
+
+        Returns
+        -------
+
+        str
+        """
+        if not self.tasks:
+            return ""
+        critical = sum(self.tasks[t]["duration"] for t in self.path)
+        lines = [
+            f"Critical path: {len(self.path)} of {len(self.tasks)} tasks, "
+            f"{critical:.1f}s of the {self.makespan:.1f}s makespan"
+        ]
+        for task_id in self.path:
+            task = self.tasks[task_id]
+            lines.append(
+                f"  {task['earliest_start']:8.1f}s  {task['duration']:8.1f}s  "
+                f"{task['name']} (task {task_id}) on {task['resource']}"
+            )
+        lines.append("Resources on the critical path:")
+        for name, totals in self.resources().items():
+            lines.append(
+                f"  {name}: {totals['tasks']} tasks, {totals['duration']:.1f}s "
+                f"({100 * totals['fraction']:.1f}% of the makespan)"
+            )
+        others = sorted(
+            (t for t in self.tasks if not self.tasks[t]["critical"]),
+            key=lambda t: self.tasks[t]["slack"],
+        )
+        if others and max_tasks > 0:
+            lines.append("Tasks with the least slack:")
+            for task_id in others[:max_tasks]:
+                task = self.tasks[task_id]
+                lines.append(
+                    f"  {task['slack']:8.1f}s  {task['name']} (task {task_id}) "
+                    f"on {task['resource']}"
+                )
+        return "\n".join(lines)
+
+
+def _timestamp(value: Any) -> Any:
+    # Parsl records times as datetimes
+    return value.timestamp() if hasattr(value, "timestamp") else value
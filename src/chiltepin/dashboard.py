@@ -0,0 +1,204 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Live workflow dashboard served from the submitting process.
+
+Pass ``dashboard_port`` to :func:`chiltepin.workflow.run_workflow` to watch a
+workflow while it runs, without the database and extra services of Parsl's
+monitoring.  The dashboard shows the tasks that are pending, running, done
+and failed on each resource, the transfers waiting in the transfer
+scheduler, the number of tasks finished over time, and the slowest tasks,
+from the :class:`chiltepin.metrics.WorkflowMetrics` and the task records of
+the workflow.
+
+It listens on the loopback interface only.  From another machine, forward
+the port with ssh::
+
+    $ ssh -L 8050:localhost:8050 login-node
+
+and open http://localhost:8050/ in a browser.  The same data is available as
+JSON from http://localhost:8050/api/status.
+"""
+
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from chiltepin.metrics import WorkflowMetrics
+
+if TYPE_CHECKING:
+    from parsl.dataflow.dflow import DataFlowKernel
+
+    from chiltepin.data import TransferScheduler
+
+_logger = logging.getLogger(__name__)
+
+_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Chiltepin workflow</title>
+<style>
+body { font-family: sans-serif; margin: 2em; }
+table { border-collapse: collapse; margin-bottom: 2em; }
+th, td { border: 1px solid #ccc; padding: 0.3em 0.8em; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+.failed { color: #b00; }
+</style>
+</head>
+<body>
+<h1>Chiltepin workflow</h1>
+<p id="uptime"></p>
+<h2>Tasks</h2>
+<table id="executors"></table>
+<p id="transfers"></p>
+<h2>Throughput</h2>
+<table id="throughput"></table>
+<h2>Slowest tasks</h2>
+<table id="slowest"></table>
+<script>
+function row(cells, tag) {
+  return "<tr>" + cells.map(c => `<${tag}>${c}</${tag}>`).join("") + "</tr>";
+}
+function escape(text) {
+  const div = document.createElement("div");
+  div.textContent = String(text);
+  return div.innerHTML;
+}
+async function refresh() {
+  const status = await (await fetch("api/status")).json();
+  document.getElementById("uptime").textContent =
+    `Running for ${status.uptime.toFixed(0)}s`;
+  let html = row(["Resource", "Pending", "Running", "Done", "Failed"], "th");
+  for (const [label, c] of Object.entries(status.executors)) {
+    html += row([escape(label), c.pending, c.running, c.done,
+                 `<span class="failed">${c.failed}</span>`], "td");
+  }
+  document.getElementById("executors").innerHTML = html;
+  document.getElementById("transfers").textContent =
+    `Transfers waiting to start: ${status.queued_transfers}`;
+  html = row(["Time", `Tasks per ${status.interval}s`], "th");
+  for (const [start, count] of status.throughput.slice(-30).reverse()) {
+    html += row([new Date(start * 1000).toLocaleTimeString(), count], "td");
+  }
+  document.getElementById("throughput").innerHTML = html;
+  html = row(["Task", "Resource", "Seconds"], "th");
+  for (const t of status.slowest) {
+    const name = `${escape(t.name)} (${t.id})` + (t.failed ? " failed" : "");
+    html += row([name, escape(t.executor), t.duration.toFixed(1)], "td");
+  }
+  document.getElementById("slowest").innerHTML = html;
+}
+refresh();
+setInterval(refresh, 2000);
+</script>
+</body>
+</html>
+"""
+
+
+class Dashboard:
+    """HTTP server for the live status of a workflow
+
+    Parameters
+    ----------
+
+    metrics: WorkflowMetrics
+        Metrics of the workflow to show
+
+    port: int
+        Port to listen on. If 0, a free port is chosen.
+
+    host: str
+        Address to listen on
+
+    dfk: DataFlowKernel | None
+        DataFlowKernel running the workflow, whose task records give the
+        pending and running tasks. If None, only finished tasks are shown.
+
+    scheduler: TransferScheduler | None
+        Transfer scheduler of the workflow, whose queued transfers are shown
+    """
+
+    def __init__(
+        self,
+        metrics: WorkflowMetrics,
+        port: int,
+        host: str = "127.0.0.1",
+        dfk: Optional["DataFlowKernel"] = None,
+        scheduler: Optional["TransferScheduler"] = None,
+    ):
+        self.metrics = metrics
+        self.dfk = dfk
+        self.scheduler = scheduler
+        self.started = time.time()
+        dashboard = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path in ("/", "/index.html"):
+                    self._send("text/html", _PAGE.encode())
+                elif self.path == "/api/status":
+                    body = json.dumps(dashboard.status()).encode()
+                    self._send("application/json", body)
+                else:
+                    self.send_error(404)
+
+            def _send(self, content_type, body):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                _logger.debug(format, *args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """The URL of the dashboard"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def status(self) -> Dict[str, Any]:
+        """Return the status shown by the dashboard
+
+        Returns
+        -------
+
+        Dict[str, Any]
+            The :meth:`chiltepin.metrics.WorkflowMetrics.task_summary` of the
+            workflow, the number of "queued_transfers" waiting in the transfer
+            scheduler, and its "uptime" in seconds
+        """
+        # Copied at once, Parsl adds and removes records from its own threads
+        records = list(self.dfk.tasks.values()) if self.dfk is not None else []
+        status = self.metrics.task_summary(records)
+        status["queued_transfers"] = (
+            self.scheduler.pending if self.scheduler is not None else 0
+        )
+        status["uptime"] = time.time() - self.started
+        return status
+
+    def start(self) -> None:
+        """Start serving the dashboard in a background thread"""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="chiltepin-dashboard", daemon=True
+        )
+        self._thread.start()
+        _logger.info(f"Workflow dashboard at {self.url}")
+
+    def stop(self) -> None:
+        """Stop serving the dashboard"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
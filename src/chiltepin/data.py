@@ -15,6 +15,19 @@ Available Functions
 - :func:`transfer`: Synchronous data transfer using Globus
 - :func:`delete`: Synchronous data deletion using Globus
 
+All of these accept an optional ``backend`` argument that selects the transfer
+service to use (see :mod:`chiltepin.backends`).  Globus is used by default.
+
+Progress and Telemetry
+----------------------
+The ``progress`` argument accepts a callable that is called after every poll
+with a report dict containing the ``task_id``, ``status``,
+``bytes_transferred``, ``files_transferred``, ``faults``, ``elapsed`` seconds
+and effective ``rate`` in bytes per second.  For tasks, the callable runs
+wherever the task runs.  The final report of every task is also recorded in
+the metrics of the active workflow (see :mod:`chiltepin.metrics`), which are
+summarized when the workflow exits.
+
 For comprehensive usage examples and best practices, see the :doc:`data` documentation.
 
 Examples
@@ -55,15 +68,225 @@ Stage, process, and cleanup data in a workflow::
     output = result.result()
 """
 
-from typing import Optional
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from globus_sdk import TransferClient
 
-import chiltepin.endpoint as endpoint
-from chiltepin.tasks import python_task
+from chiltepin import metrics
+from chiltepin.backends import (
+    SUCCEEDED,
+    TERMINAL_STATES,
+    GlobusTransferBackend,
+    TransferBackend,
+)
+from chiltepin.dispatch import Dispatcher
+from chiltepin.futures import TaskFuture
+from chiltepin.tasks import check_priority, python_task
+
+_scheduler: Optional["TransferScheduler"] = None
+
+
+def current_scheduler() -> Optional["TransferScheduler"]:
+    """Return the transfer scheduler of the active workflow, or None
+
+    Returns
+    -------
+
+    TransferScheduler | None
+    """
+    return _scheduler
+
+
+def activate_scheduler(scheduler: Optional["TransferScheduler"]) -> None:
+    """Make the given scheduler the one used by transfer_task and delete_task
+
+    Parameters
+    ----------
+
+    scheduler: TransferScheduler | None
+        The scheduler to activate, or None to submit tasks immediately
+    """
+    global _scheduler
+    _scheduler = scheduler
+
+
+class TransferScheduler(Dispatcher):
+    """Limits and prioritizes the transfer and deletion tasks of a workflow
+
+    Tasks are held in a priority queue until all of the futures they depend on
+    are done and a slot is free, both overall and for their endpoint pair.
+    Waiting for dependencies first ensures that a slot is only occupied by a
+    task that can actually run.  Among the eligible tasks, the one with the
+    lowest priority value is started first, then tasks without a priority,
+    and tasks of equal priority are started in submission order.
+
+    Parameters
+    ----------
+
+    max_in_flight: int | None
+        Maximum number of tasks that may run at the same time. If None, the
+        number is not limited.
+
+    max_per_pair: int | None
+        Maximum number of tasks that may run at the same time between the same
+        source and destination endpoints (or on the same endpoint, for
+        deletions). If None, the number is not limited.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        max_per_pair: Optional[int] = None,
+    ):
+        for name, value in (
+            ("max_in_flight", max_in_flight),
+            ("max_per_pair", max_per_pair),
+        ):
+            if value is not None and value < 1:
+                raise ValueError(f"{name} must be at least 1")
+        super().__init__(threading.Condition())
+        self.max_in_flight = max_in_flight
+        self.max_per_pair = max_per_pair
+        self._queue: List[Dict[str, Any]] = []
+        self._count = itertools.count()
+        self._in_flight = 0
+        self._released = 0
+        self._pairs: Dict[Tuple[str, Optional[str]], int] = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Number of tasks that have been started and are not done yet"""
+        with self._lock:
+            return self._in_flight
+
+    @property
+    def pending(self) -> int:
+        """Number of tasks waiting to be started"""
+        with self._lock:
+            return len(self._queue)
+
+    def submit(
+        self,
+        submit: Callable[[], Future],
+        pair: Tuple[str, Optional[str]],
+        priority: Optional[float] = None,
+        depends: Sequence[Future] = (),
+    ) -> TaskFuture:
+        """Queue a task for submission and return a future for its result
+
+        The future forwards the Parsl task attributes to the future returned
+        by ``submit`` once the task is started (see
+        :class:`chiltepin.futures.TaskFuture`).
+
+        Parameters
+        ----------
+
+        submit: Callable[[], Future]
+            Function that submits the task and returns its future
+
+        pair: Tuple[str, str | None]
+            The source and destination endpoints of the task
+
+        priority: float | None
+            Priority of the task, lower values are started first.  Tasks
+            without a priority are started after those with one.
+
+        depends: Sequence[Future]
+            Futures that must be done before the task is started
+
+        Returns
+        -------
+
+        TaskFuture
+        """
+        check_priority(priority)
+        entry = {
+            "key": (priority is None, priority or 0, next(self._count)),
+            "submit": submit,
+            "pair": pair,
+            "depends": list(depends),
+            "future": TaskFuture(),
+        }
+        with self._lock:
+            self._queue.append(entry)
+            self._queue.sort(key=lambda e: e["key"])
+        for dep in entry["depends"]:
+            dep.add_done_callback(lambda _: self._dispatch())
+        self._dispatch()
+        return entry["future"]
+
+    def _select(self) -> List[Dict[str, Any]]:
+        """Take a slot for every queued task that is eligible to run"""
+        started = []
+        for entry in list(self._queue):
+            if self.max_in_flight is not None:
+                if self._in_flight >= self.max_in_flight:
+                    break
+            if self.max_per_pair is not None:
+                if self._pairs.get(entry["pair"], 0) >= self.max_per_pair:
+                    continue
+            if not all(dep.done() for dep in entry["depends"]):
+                continue
+            self._queue.remove(entry)
+            self._in_flight += 1
+            self._pairs[entry["pair"]] = self._pairs.get(entry["pair"], 0) + 1
+            started.append(entry)
+        return started
+
+    def _started(self, entry: Dict[str, Any], task_future: Future) -> None:
+        """Forward the future of the entry to the submitted task"""
+        entry["future"].app_future = task_future
+
+    def _release(self, entry: Dict[str, Any]) -> None:
+        """Free the slot held by a task"""
+        with self._lock:
+            self._in_flight -= 1
+            self._released += 1
+            self._pairs[entry["pair"]] -= 1
+            if not self._pairs[entry["pair"]]:
+                del self._pairs[entry["pair"]]
+            self._lock.notify_all()
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> bool:
+        """Shut down the scheduler
+
+        Parameters
+        ----------
+
+        wait: bool
+            If True, block until all queued and running tasks are done.
+            Otherwise, cancel the tasks that have not been started yet.
+
+        timeout: float | None
+            Maximum number of seconds to wait for the next task to finish when
+            ``wait`` is True. If no task finishes for that long, the tasks that
+            have not been started yet are canceled. If None, wait until all
+            tasks are done.
+
+        Returns
+        -------
+
+        bool
+            Whether all tasks were done
+        """
+        with self._lock:
+            while wait and (self._queue or self._in_flight):
+                released = self._released
+                if not self._lock.wait_for(lambda: self._released != released, timeout):
+                    break
+            if not self._queue and not self._in_flight:
+                return True
+            canceled = self._queue
+            self._queue = []
+        for entry in canceled:
+            entry["future"].cancel()
+        return False
 
 
-@python_task
 def transfer_task(
     src_ep: str,
     dst_ep: str,
@@ -73,13 +296,20 @@ def transfer_task(
     polling_interval: int = 30,
     client: Optional[TransferClient] = None,
     recursive: bool = False,
-):
+    backend: Optional[TransferBackend] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    priority: Optional[float] = None,
+    executor="all",
+    **kwargs,
+) -> TaskFuture:
     """Transfer data asynchronously in a Parsl task
 
     This wraps synchronous Globus data transfer into a Parsl python_app task.
     Calling this function will immediately return a future. The result of the
     future will be True if the transfer completed successfully, or False if
-    it did not.
+    it did not.  The future forwards ``tid``, ``task_record`` and
+    ``task_status()`` to the AppFuture of the task (see
+    :class:`chiltepin.futures.TaskFuture`).
 
     Parameters
     ----------
@@ -113,22 +343,55 @@ def transfer_task(
 
     recursive: bool
         Whether or not a recursive transfer should be performed
+
+    backend: TransferBackend | None
+        Transfer backend to use. If None, a GlobusTransferBackend using
+        ``client`` is created.
+
+    progress: Callable[[Dict[str, Any]], None] | None
+        Function called with a progress report after every poll.  It runs
+        in the Parsl worker that performs the transfer.
+
+    priority: float | None
+        Priority of the task, lower values run first, as for python tasks
+        (see :func:`chiltepin.tasks.bash_task`).  It orders the task both in
+        the workflow's transfer scheduler and on the resource it runs on.
+
+    executor: str | List[str]
+        The resource(s) the task may run on.
+
+    **kwargs
+        Additional Parsl keyword arguments, such as ``inputs``.
+
+    Returns
+    -------
+
+    TaskFuture
     """
-    # Run the transfer (executes in remote Parsl worker)
-    completed = transfer(  # pragma: no cover
-        src_ep,
-        dst_ep,
-        src_path,
-        dst_path,
-        timeout=timeout,
-        polling_interval=polling_interval,
-        client=client,
-        recursive=recursive,
+
+    def submit() -> Future:
+        app_future = _transfer_app(
+            src_ep,
+            dst_ep,
+            src_path,
+            dst_path,
+            timeout=timeout,
+            polling_interval=polling_interval,
+            client=client,
+            recursive=recursive,
+            backend=backend,
+            progress=progress,
+            executor=executor,
+            priority=priority,
+            **kwargs,
+        )
+        return _track(app_future)
+
+    return _schedule(
+        submit, (src_ep, dst_ep), priority, (src_ep, dst_ep, src_path, dst_path), kwargs
     )
-    return completed  # pragma: no cover
 
 
-@python_task
 def delete_task(
     src_ep: str,
     src_path: str,
@@ -136,13 +399,20 @@ def delete_task(
     polling_interval: int = 30,
     client: Optional[TransferClient] = None,
     recursive: bool = False,
-):
+    backend: Optional[TransferBackend] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    priority: Optional[float] = None,
+    executor="all",
+    **kwargs,
+) -> TaskFuture:
     """Delete data asynchronously in a Parsl task
 
     This wraps synchronous Globus data deletion into a Parsl python_app task.
     Calling this function will immediately return a future. The result of the
     future will be True if the deletion completed successfully, or False if
-    it did not.
+    it did not.  The future forwards ``tid``, ``task_record`` and
+    ``task_status()`` to the AppFuture of the task (see
+    :class:`chiltepin.futures.TaskFuture`).
 
     Parameters
     ----------
@@ -169,17 +439,49 @@ def delete_task(
 
     recursive: bool
         Whether or not a recursive deletion should be performed
+
+    backend: TransferBackend | None
+        Transfer backend to use. If None, a GlobusTransferBackend using
+        ``client`` is created.
+
+    progress: Callable[[Dict[str, Any]], None] | None
+        Function called with a progress report after every poll.  It runs
+        in the Parsl worker that performs the deletion.
+
+    priority: float | None
+        Priority of the task, lower values run first, as for python tasks
+        (see :func:`chiltepin.tasks.bash_task`).  It orders the task both in
+        the workflow's transfer scheduler and on the resource it runs on.
+
+    executor: str | List[str]
+        The resource(s) the task may run on.
+
+    **kwargs
+        Additional Parsl keyword arguments, such as ``inputs``.
+
+    Returns
+    -------
+
+    TaskFuture
     """
-    # Run the deletion (executes in remote Parsl worker)
-    completed = delete(  # pragma: no cover
-        src_ep,
-        src_path,
-        timeout=timeout,
-        polling_interval=polling_interval,
-        client=client,
-        recursive=recursive,
-    )
-    return completed  # pragma: no cover
+
+    def submit() -> Future:
+        app_future = _delete_app(
+            src_ep,
+            src_path,
+            timeout=timeout,
+            polling_interval=polling_interval,
+            client=client,
+            recursive=recursive,
+            backend=backend,
+            progress=progress,
+            executor=executor,
+            priority=priority,
+            **kwargs,
+        )
+        return _track(app_future)
+
+    return _schedule(submit, (src_ep, None), priority, (src_ep, src_path), kwargs)
 
 
 def transfer(
@@ -191,6 +493,8 @@ def transfer(
     polling_interval: int = 30,
     client: Optional[TransferClient] = None,
     recursive: bool = False,
+    backend: Optional[TransferBackend] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
 ):
     """Transfer data synchronously with Globus
 
@@ -230,62 +534,27 @@ def transfer(
 
     recursive: bool
         Whether or not a recursive transfer should be performed
-    """
-    import globus_sdk
-
-    # Get transfer client
-    if not client:
-        clients = endpoint.login()
-        client = clients["transfer"]
-
-    # Get the source endpoint
-    src_id = None
-    for ep in client.endpoint_search(src_ep, filter_non_functional=False):
-        if ep["display_name"] == src_ep or ep["id"] == src_ep:
-            src_id = ep["id"]
-    if not src_id:
-        raise RuntimeError(f"Source endpoint '{src_ep}' could not be found")
-
-    # Get the destination endpoint
-    dst_id = None
-    for ep in client.endpoint_search(dst_ep, filter_non_functional=False):
-        if ep["display_name"] == dst_ep or ep["id"] == dst_ep:
-            dst_id = ep["id"]
-    if not dst_id:
-        raise RuntimeError(f"Destination endpoint '{dst_ep}' could not be found")
 
-    # Add data access scopes for both endpoints (just in case)
-    # client.add_app_data_access_scope([src_id, dst_id])
+    backend: TransferBackend | None
+        Transfer backend to use. If None, a GlobusTransferBackend using
+        ``client`` is created.
 
-    # Build the transfer data
-    task_data = globus_sdk.TransferData(
-        client,
-        source_endpoint=src_id,
-        destination_endpoint=dst_id,
-    )
-    task_data.add_item(
+    progress: Callable[[Dict[str, Any]], None] | None
+        Function called with a progress report after every poll.
+    """
+    report = _transfer_report(
+        src_ep,
+        dst_ep,
         src_path,
         dst_path,
+        timeout=timeout,
+        polling_interval=polling_interval,
+        client=client,
         recursive=recursive,
+        backend=backend,
+        progress=progress,
     )
-
-    # Submit the transfer request
-    try:
-        task_doc = client.submit_transfer(task_data)
-        task_id = task_doc["task_id"]
-        done = client.task_wait(
-            task_id, timeout=timeout, polling_interval=polling_interval
-        )
-        return done
-    except globus_sdk.TransferAPIError as err:
-        if err.info.consent_required:
-            raise RuntimeError(
-                "Encountered a ConsentRequired error.\n"
-                "You must login a second time to grant consents.\n\n"
-                "err.info"
-            )
-        else:
-            raise RuntimeError(err)
+    return report["status"] == SUCCEEDED
 
 
 def delete(
@@ -295,6 +564,8 @@ def delete(
     polling_interval: int = 30,
     client: Optional[TransferClient] = None,
     recursive: bool = False,
+    backend: Optional[TransferBackend] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
 ):
     """Delete data synchronously with Globus.
 
@@ -326,45 +597,275 @@ def delete(
 
     recursive: bool
         Whether or not a recursive deletion should be performed
+
+    backend: TransferBackend | None
+        Transfer backend to use. If None, a GlobusTransferBackend using
+        ``client`` is created.
+
+    progress: Callable[[Dict[str, Any]], None] | None
+        Function called with a progress report after every poll.
     """
-    import globus_sdk
+    report = _delete_report(
+        src_ep,
+        src_path,
+        timeout=timeout,
+        polling_interval=polling_interval,
+        client=client,
+        recursive=recursive,
+        backend=backend,
+        progress=progress,
+    )
+    return report["status"] == SUCCEEDED
+
+
+def _transfer_report(
+    src_ep: str,
+    dst_ep: str,
+    src_path: str,
+    dst_path: str,
+    timeout: int = 3600,
+    polling_interval: int = 30,
+    client: Optional[TransferClient] = None,
+    recursive: bool = False,
+    backend: Optional[TransferBackend] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Perform a transfer and return its final report (see transfer())"""
+    # Get the transfer backend
+    if backend is None:
+        backend = GlobusTransferBackend(client)
+
+    # Get the source endpoint
+    src_id = backend.resolve_endpoint(src_ep)
+    if not src_id:
+        raise RuntimeError(f"Source endpoint '{src_ep}' could not be found")
+
+    # Get the destination endpoint
+    dst_id = backend.resolve_endpoint(dst_ep)
+    if not dst_id:
+        raise RuntimeError(f"Destination endpoint '{dst_ep}' could not be found")
+
+    # Submit the transfer request and wait for it to finish
+    task_id = backend.submit_transfer(
+        src_id,
+        dst_id,
+        [(src_path, dst_path)],
+        recursive=recursive,
+    )
+    report = _wait(backend, task_id, timeout, polling_interval, progress)
+    report.update(kind="transfer", src_ep=src_ep, dst_ep=dst_ep)
+    return report
 
-    # Get transfer client
-    if not client:
-        clients = endpoint.login()
-        client = clients["transfer"]
+
+def _delete_report(
+    src_ep: str,
+    src_path: str,
+    timeout: int = 3600,
+    polling_interval: int = 30,
+    client: Optional[TransferClient] = None,
+    recursive: bool = False,
+    backend: Optional[TransferBackend] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Perform a deletion and return its final report (see delete())"""
+    # Get the transfer backend
+    if backend is None:
+        backend = GlobusTransferBackend(client)
 
     # Get the source endpoint
-    src_id = None
-    for ep in client.endpoint_search(src_ep, filter_non_functional=False):
-        if ep["display_name"] == src_ep or ep["id"] == src_ep:
-            src_id = ep["id"]
+    src_id = backend.resolve_endpoint(src_ep)
     if not src_id:
         raise RuntimeError(f"Source endpoint '{src_ep}' could not be found")
 
-    # Add data access scopes for both endpoints (just in case)
-    # client.add_app_data_access_scope([src_id, dst_id])
+    # Submit the deletion request and wait for it to finish
+    # NOTE: Deletions have always been submitted recursively
+    task_id = backend.submit_delete(src_id, [src_path], recursive=True)
+    report = _wait(backend, task_id, timeout, polling_interval, progress)
+    report.update(kind="delete", src_ep=src_ep, dst_ep=None)
+    return report
 
-    # Build the delete data payload
-    task_data = globus_sdk.DeleteData(client, src_id, recursive=True)
-    task_data.add_item(src_path)
 
-    # Submit the deletion request
-    try:
-        task_doc = client.submit_delete(task_data)
-        task_id = task_doc["task_id"]
-        done = client.task_wait(
-            task_id,
-            timeout=timeout,
-            polling_interval=polling_interval,
-        )
-        return done
-    except globus_sdk.TransferAPIError as err:
-        if err.info.consent_required:
-            raise RuntimeError(
-                "Encountered a ConsentRequired error.\n"
-                "You must login a second time to grant consents.\n\n"
-                "err.info"
-            )
-        else:
-            raise RuntimeError(err)
+@python_task
+def _transfer_app(
+    src_ep: str,
+    dst_ep: str,
+    src_path: str,
+    dst_path: str,
+    timeout: int = 3600,
+    polling_interval: int = 30,
+    client: Optional[TransferClient] = None,
+    recursive: bool = False,
+    backend: Optional[TransferBackend] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+):
+    """Parsl task that performs a transfer and returns its report"""
+    # Run the transfer (executes in remote Parsl worker)
+    return _transfer_report(  # pragma: no cover
+        src_ep,
+        dst_ep,
+        src_path,
+        dst_path,
+        timeout=timeout,
+        polling_interval=polling_interval,
+        client=client,
+        recursive=recursive,
+        backend=backend,
+        progress=progress,
+    )
+
+
+@python_task
+def _delete_app(
+    src_ep: str,
+    src_path: str,
+    timeout: int = 3600,
+    polling_interval: int = 30,
+    client: Optional[TransferClient] = None,
+    recursive: bool = False,
+    backend: Optional[TransferBackend] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+):
+    """Parsl task that performs a deletion and returns its report"""
+    # Run the deletion (executes in remote Parsl worker)
+    return _delete_report(  # pragma: no cover
+        src_ep,
+        src_path,
+        timeout=timeout,
+        polling_interval=polling_interval,
+        client=client,
+        recursive=recursive,
+        backend=backend,
+        progress=progress,
+    )
+
+
+def _schedule(
+    submit: Callable[[], Future],
+    pair: Tuple[str, Optional[str]],
+    priority: Optional[float],
+    args: Sequence[Any],
+    kwargs: Dict[str, Any],
+) -> TaskFuture:
+    """Submit a task through the active transfer scheduler, if there is one
+
+    Parameters
+    ----------
+
+    submit: Callable[[], Future]
+        Function that submits the task and returns its future
+
+    pair: Tuple[str, str | None]
+        The source and destination endpoints of the task
+
+    priority: float | None
+        The priority of the task
+
+    args: Sequence[Any]
+        The arguments of the task, used to find its dependencies
+
+    kwargs: Dict[str, Any]
+        The Parsl keyword arguments of the task, used to find its dependencies
+
+    Returns
+    -------
+
+    TaskFuture
+    """
+    scheduler = current_scheduler()
+    if scheduler is None:
+        check_priority(priority)
+        return submit()
+    depends = _futures([*args, *kwargs.values()])
+    return scheduler.submit(submit, pair, priority=priority, depends=depends)
+
+
+def _futures(values: Iterable[Any]) -> List[Future]:
+    """Return the futures among some values and the lists and tuples in them"""
+    futures = []
+    for value in values:
+        if isinstance(value, Future):
+            futures.append(value)
+        elif isinstance(value, (list, tuple)):
+            futures.extend(_futures(value))
+    return futures
+
+
+def _track(app_future: Future) -> TaskFuture:
+    """Return a future for the success of a transfer or deletion task
+
+    The report returned by the task is recorded in the metrics of the workflow
+    that was active when the task was submitted.
+
+    Parameters
+    ----------
+
+    app_future: Future
+        The future of a task returning a transfer report
+
+    Returns
+    -------
+
+    TaskFuture
+    """
+    recorder = metrics.current()
+    future = TaskFuture(app_future)
+
+    def done(f: Future) -> None:
+        exception = f.exception()
+        if exception is not None:
+            future.set_exception(exception)
+            return
+        report = f.result()
+        if recorder is not None:
+            recorder.record_transfer(report)
+        future.set_result(report["status"] == SUCCEEDED)
+
+    app_future.add_done_callback(done)
+    return future
+
+
+def _wait(
+    backend: TransferBackend,
+    task_id: str,
+    timeout: float,
+    polling_interval: float,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Poll a backend task until it finishes or the timeout expires
+
+    Parameters
+    ----------
+
+    backend: TransferBackend
+        The backend the task was submitted to
+
+    task_id: str
+        The id of the task to wait for
+
+    timeout: float
+        Number of seconds to wait for the task to finish
+
+    polling_interval: float
+        Number of seconds to wait between polls
+
+    progress: Callable[[Dict[str, Any]], None] | None
+        Function called with a progress report after every poll
+
+    Returns
+    -------
+
+    Dict[str, Any]
+        The last progress report, built from the status reported by the backend
+    """
+    start = time.monotonic()
+    while True:
+        report = dict(backend.poll(task_id))
+        elapsed = time.monotonic() - start
+        report["task_id"] = task_id
+        report["elapsed"] = elapsed
+        report["rate"] = report["bytes_transferred"] / elapsed if elapsed > 0 else 0.0
+        if progress is not None:
+            progress(report)
+        if report["status"] in TERMINAL_STATES or elapsed >= timeout:
+            return report
+        time.sleep(min(polling_interval, timeout - elapsed))
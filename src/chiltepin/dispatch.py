@@ -0,0 +1,89 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Bounded dispatch of Chiltepin tasks.
+
+Several parts of Chiltepin hold tasks on the submitting side and only submit
+them once there is room for them: the stages of a
+:class:`chiltepin.pipeline.Pipeline`, the :class:`chiltepin.mpi.MPIPacker`
+and the :class:`chiltepin.data.TransferScheduler`.  They differ in what "room"
+means, but share how queued tasks are submitted, released and resolved, which
+:class:`Dispatcher` implements.
+"""
+
+import abc
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Union
+
+
+class Dispatcher(abc.ABC):
+    """Base class of the schedulers that submit queued tasks when there is room
+
+    Tasks are queued as entries, dictionaries holding at least a ``"submit"``
+    function that submits the task and returns its future, and the
+    ``"future"`` returned to the caller.  Subclasses keep their queue and the
+    room they track under ``_lock``, and implement :meth:`_select` and
+    :meth:`_release`.
+
+    Parameters
+    ----------
+
+    lock: threading.Lock | threading.Condition | None
+        Lock protecting the state of the scheduler. If None, a new
+        threading.Lock is used.
+    """
+
+    def __init__(self, lock: Union[threading.Lock, threading.Condition, None] = None):
+        self._lock = lock if lock is not None else threading.Lock()
+
+    @abc.abstractmethod
+    def _select(self) -> List[Dict[str, Any]]:
+        """Remove the entries that can start from the queue and return them
+
+        This is called with ``_lock`` held, and takes the room the entries
+        need.
+        """
+
+    @abc.abstractmethod
+    def _release(self, entry: Dict[str, Any]) -> None:
+        """Give back the room taken by an entry once its task is done"""
+
+    def _started(self, entry: Dict[str, Any], task_future: Future) -> None:
+        """Called when the task of an entry has been submitted"""
+
+    def _resolve(
+        self,
+        entry: Dict[str, Any],
+        task_future: Optional[Future] = None,
+        exception: Optional[BaseException] = None,
+    ) -> None:
+        """Pass the outcome of a task on to the future of its entry"""
+        if exception is None:
+            exception = task_future.exception()
+        if exception is not None:
+            entry["future"].set_exception(exception)
+        else:
+            entry["future"].set_result(task_future.result())
+
+    def _dispatch(self) -> None:
+        """Submit every queued task that can start"""
+        with self._lock:
+            started = self._select()
+
+        # Submit outside of the lock since callbacks may run synchronously
+        for entry in started:
+            try:
+                task_future = entry["submit"]()
+            except Exception as e:
+                self._release(entry)
+                self._resolve(entry, exception=e)
+                self._dispatch()
+                continue
+            self._started(entry, task_future)
+            task_future.add_done_callback(lambda f, entry=entry: self._finish(entry, f))
+
+    def _finish(self, entry: Dict[str, Any], task_future: Future) -> None:
+        """Release a finished task, resolve its entry and start the next ones"""
+        self._release(entry)
+        self._resolve(entry, task_future)
+        self._dispatch()
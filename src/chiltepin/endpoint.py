@@ -1,26 +1,43 @@
 # SPDX-License-Identifier: Apache-2.0
 
+import concurrent.futures
+import contextlib
+import fnmatch
+import glob
+import hashlib
+import io
+import json
+import logging
 import os
 import pathlib
 import platform
+import shlex
 import shutil
 import subprocess
 import sys
 import tempfile
 import time
 from pathlib import Path
-from typing import Dict, Optional, Union
+from typing import Any, Dict, Optional, Union
 
+import jinja2
+import jsonschema
 import psutil
 import yaml
-from globus_compute_endpoint.endpoint.config.utils import get_config
+from globus_compute_endpoint.endpoint.config.utils import get_config, load_config_yaml
 from globus_compute_endpoint.endpoint.endpoint import Endpoint
-from globus_compute_sdk import Client
+from globus_compute_endpoint.endpoint.utils import is_privileged
+from globus_compute_sdk import Client, Executor
 from globus_compute_sdk.sdk.auth.auth_client import ComputeAuthClient
 from globus_compute_sdk.sdk.auth.globus_app import get_globus_app
 from globus_compute_sdk.sdk.web_client import WebClient
 from globus_sdk import ClientApp, GlobusApp, TransferClient, UserApp
 from globus_sdk.gare import GlobusAuthorizationParameters
+from jinja2.sandbox import SandboxedEnvironment
+
+from chiltepin.configure import user_endpoint_config
+
+logger = logging.getLogger(__name__)
 
 endpoint_template = """# This is the default user-endpoint-process (UEP) template provided with
 # newly-configured endpoints.  Endpoints generate a UEP-specific configuration
@@ -114,21 +131,215 @@ engine:
     walltime: {{ walltime|default("00:10:00") }}
     {% endif %}
 
+# Seconds between heartbeats.  The idle limits below are counted in heartbeats.
+heartbeat_period: {{ heartbeat_period|default(30) }}
+
 # Endpoints will be restarted when a user submits new tasks to the
 # web-services, so eagerly shut down if endpoint is idle.  At 30s/hb (default
-# value), 10 heartbeats is 300s.
-idle_heartbeats_soft: 120
+# value), 120 heartbeats is 3600s.  Restarting takes time, so raise this for
+# workflows that submit tasks in bursts with idle periods between them.
+idle_heartbeats_soft: {{ idle_heartbeats_soft|default(120) }}
 
 # If endpoint is *apparently* idle (e.g., outstanding tasks, but no movement)
 # for this many heartbeats, then shutdown anyway.  At 30s/hb (default value),
 # 5,760 heartbeats == "48 hours".  (Note that this value will be ignored if
 # idle_heartbeats_soft is 0 or not set.)
-idle_heartbeats_hard: 5760
+idle_heartbeats_hard: {{ idle_heartbeats_hard|default(5760) }}
 """
 
+
+def make_template(
+    heartbeat_period: int = 30,
+    idle_heartbeats_soft: int = 120,
+    idle_heartbeats_hard: int = 5760,
+) -> str:
+    """Return the endpoint template with the given keep-alive defaults
+
+    Resources can override these defaults with options of the same names.
+
+    Parameters
+    ----------
+
+    heartbeat_period: int
+        Seconds between the heartbeats of user endpoints
+
+    idle_heartbeats_soft: int
+        Number of heartbeats without tasks after which user endpoints shut
+        down. 0 keeps them running.
+
+    idle_heartbeats_hard: int
+        Number of heartbeats with outstanding tasks but no progress after
+        which user endpoints shut down
+
+    Returns
+    -------
+
+    str
+    """
+    return (
+        endpoint_template.replace(
+            "heartbeat_period|default(30)",
+            f"heartbeat_period|default({heartbeat_period})",
+        )
+        .replace(
+            "idle_heartbeats_soft|default(120)",
+            f"idle_heartbeats_soft|default({idle_heartbeats_soft})",
+        )
+        .replace(
+            "idle_heartbeats_hard|default(5760)",
+            f"idle_heartbeats_hard|default({idle_heartbeats_hard})",
+        )
+    )
+
+
 # Set the UUID of the default Chiltepin thick client
 CHILTEPIN_CLIENT_UUID = "42e9e804-0bcd-4c3d-881b-8e270e3c2163"
 
+# Rendered endpoint templates, keyed by the hash of the template and its variables
+_rendered_templates: Dict[str, str] = {}
+
+
+def user_config_schema() -> Dict[str, Any]:
+    """Return the JSON schema of the variables of the endpoint template
+
+    These are the variables that Chiltepin sends with the tasks of Globus
+    Compute resources.  Endpoints check the variables against the schema
+    in their ``user_config_schema.json`` before rendering the template.
+
+    Returns
+    -------
+
+    Dict[str, Any]
+    """
+    count = {"type": "integer", "minimum": 0}
+    positive = {"type": "integer", "minimum": 1}
+    string = {"type": "string"}
+    return {
+        "$schema": "https://json-schema.org/draft/2020-12/schema",
+        "type": "object",
+        "properties": {
+            "endpoint_setup": string,
+            "mpi": {"type": "boolean"},
+            "max_mpi_apps": positive,
+            "mpi_launcher": {"enum": ["srun", "mpiexec", "aprun"]},
+            "provider": {"enum": ["localhost", "slurm", "pbspro"]},
+            "cores_per_node": positive,
+            "nodes_per_block": positive,
+            "init_blocks": count,
+            "min_blocks": count,
+            "max_blocks": count,
+            "exclusive": {"type": "boolean"},
+            "partition": string,
+            "queue": string,
+            "account": string,
+            # Minutes, MM:SS, HH:MM:SS, or with days as D-HH, D-HH:MM or D-HH:MM:SS
+            "walltime": {
+                "type": "string",
+                "pattern": "^([0-9]+-)?[0-9]+(:[0-9]+){0,2}$",
+            },
+            "worker_init": string,
+            "heartbeat_period": positive,
+            "idle_heartbeats_soft": count,
+            "idle_heartbeats_hard": positive,
+        },
+        # Variables added to custom templates are not checked
+        "additionalProperties": True,
+    }
+
+
+def render_template(
+    config: Dict[str, Any],
+    template: str = endpoint_template,
+) -> str:
+    """Render and validate the endpoint template for a Globus Compute resource
+
+    The template is rendered the way endpoints render it, with the variables
+    that Chiltepin sends with the resource's tasks, so invalid resource
+    configurations are found before any task is submitted.  Rendered
+    templates are cached.
+
+    Parameters
+    ----------
+
+    config: Dict[str, Any]
+        YAML configuration block that contains the resource's configuration
+
+    template: str
+        The endpoint template to render. The default is the template that
+        Chiltepin configures endpoints with.
+
+    Returns
+    -------
+
+    str
+        The rendered user endpoint configuration
+
+    Raises
+    ------
+
+    ValueError
+        If the variables do not match the schema, or the rendered template is
+        not a valid user endpoint configuration
+    """
+    user_config = user_endpoint_config(config)
+    key = hashlib.sha256(
+        json.dumps([template, user_config], sort_keys=True).encode()
+    ).hexdigest()
+    if key in _rendered_templates:
+        return _rendered_templates[key]
+
+    try:
+        jsonschema.validate(instance=user_config, schema=user_config_schema())
+    except jsonschema.ValidationError as e:
+        option = "".join(f"'{part}': " for part in e.path)
+        raise ValueError(
+            f"Invalid user endpoint configuration: {option}{e.message}"
+        ) from None
+
+    # Render like endpoints do, with the values quoted to prevent YAML injection
+    environment = SandboxedEnvironment(undefined=jinja2.StrictUndefined)
+    environment.filters["shell_escape"] = _shell_escape
+    try:
+        rendered = environment.from_string(template).render(
+            **_quote_values(user_config)
+        )
+        load_config_yaml(rendered)
+    except Exception as e:
+        raise ValueError(f"Invalid user endpoint configuration: {e}") from None
+
+    _rendered_templates[key] = rendered
+    return rendered
+
+
+def _quote_values(data: Any) -> Any:
+    """Quote the string values of user endpoint variables as YAML strings
+
+    Endpoints render their templates with the variables quoted this way, so
+    that values cannot inject YAML into the configuration.
+    """
+    if isinstance(data, dict):
+        return {key: _quote_values(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_quote_values(value) for value in data]
+    if isinstance(data, str):
+        return json.dumps(data)
+    # Booleans stay booleans so that templates can test them
+    if isinstance(data, (int, float)):
+        return data
+    if data is None:
+        return "null"
+    raise ValueError(f"{type(data).__name__} is not a valid user config option type")
+
+
+def _shell_escape(value: Any) -> Any:
+    """Jinja filter that shell-escapes a value quoted by _quote_values"""
+    if not isinstance(value, str):
+        return value
+    loaded = json.loads(value)
+    if not isinstance(loaded, str):
+        return value
+    return json.dumps(shlex.quote(loaded))
+
 
 def get_chiltepin_apps() -> (GlobusApp, GlobusApp):
     """Log in to the Chiltepin app
@@ -266,10 +477,98 @@ def logout():
     transfer_app.logout()
 
 
+# File in the endpoint configuration directory caching the login PATH of each host,
+# capturing it takes seconds on some systems
+_LOGIN_PATH_CACHE = ".chiltepin_login_paths.json"
+
+# Seconds for which a cached login PATH is used, so system changes are picked up
+_LOGIN_PATH_TTL = 86400.0
+
+
+def _capture_login_path(
+    config_dir: pathlib.Path, timeout: Optional[float] = None
+) -> str:
+    # Return the PATH of a clean login shell on this host, cached in config_dir
+    host = platform.node()
+    cache_path = config_dir / _LOGIN_PATH_CACHE
+    try:
+        cache = json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        cache = {}
+    try:
+        if time.time() - cache[host]["time"] < _LOGIN_PATH_TTL:
+            return cache[host]["path"]
+    except (KeyError, TypeError):
+        pass
+
+    # Capture the required system PATH for the endpoint environment.
+    # Set $HOME to an empty temporary directory to avoid capturing user-specific settings
+    # that could cause issues in the endpoint environment.  Use a temporary directory for
+    # $HOME to avoid security issues with /tmp. Providing an empty $HOME is the only way
+    # to reliably capture a clean PATH that doesn't include user-specific directories.
+    # NOTE: This may fail on systems with badly written system init scripts that attempt
+    # to source user-specific files without checking for their existence first, but this
+    # scenario is very unlikely and we will accept that risk until we have a better solution.
+    temp_home = tempfile.mkdtemp(prefix="chiltepin_home_")
+    try:
+        p = subprocess.Popen(
+            ["env", "-i", f"HOME={temp_home}", "bash", "-l", "-c", "echo $PATH"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            start_new_session=True,
+        )
+        try:
+            stdout, stderr = p.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            # Kill the process if it times out
+            p.kill()
+            # Wait for it to actually terminate
+            p.wait()
+            raise TimeoutError(
+                f"PATH capture command timed out after {timeout} seconds"
+            )
+
+        if p.returncode != 0:
+            raise RuntimeError(f"Failed to capture system PATH: {stderr}")
+        login_path = stdout.strip()
+    finally:
+        # Clean up the temporary directory
+        shutil.rmtree(temp_home, ignore_errors=True)
+
+    # Replace the cache at once, so that concurrent readers never see a partial file
+    if not isinstance(cache, dict):
+        cache = {}
+    cache[host] = {"time": time.time(), "path": login_path}
+    try:
+        with tempfile.NamedTemporaryFile(
+            "w", dir=config_dir, prefix=_LOGIN_PATH_CACHE, delete=False
+        ) as f:
+            json.dump(cache, f)
+        os.replace(f.name, cache_path)
+    except OSError:
+        # The cache is only an optimization
+        pass
+    return login_path
+
+
+def _set_user_path(path: pathlib.Path, value: str) -> None:
+    # Set the PATH in a user environment file, replacing the one already set
+    lines = path.read_text().splitlines(keepends=True) if path.exists() else []
+    lines = [line for line in lines if not line.startswith("PATH:")]
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    path.write_text("".join(lines) + f"PATH: {value}\n")
+
+
 def configure(
     name: str,
     config_dir: Optional[str] = None,
     timeout: Optional[float] = None,
+    heartbeat_period: int = 30,
+    idle_heartbeats_soft: int = 120,
+    idle_heartbeats_hard: int = 5760,
+    in_process: bool = False,
 ) -> bool:
     """Configure a Globus Compute Endpoint
 
@@ -291,6 +590,23 @@ def configure(
     timeout: float | None
         Number of seconds to wait for the command to complete before timing out
         Default is None, meaning the command will never time out.
+
+    heartbeat_period: int
+        Default number of seconds between the heartbeats of user endpoints
+
+    idle_heartbeats_soft: int
+        Default number of heartbeats without tasks after which user endpoints
+        shut down. 0 keeps them running until the endpoint stops.
+
+    idle_heartbeats_hard: int
+        Default number of heartbeats with outstanding tasks but no progress
+        after which user endpoints shut down
+
+    in_process: bool
+        Configure the endpoint with the endpoint library in this process
+        instead of running the globus-compute-endpoint configure command,
+        which is faster when configuring many endpoints. The timeout then
+        only applies to capturing the login PATH.
     """
     if platform.system() == "Windows":
         raise NotImplementedError(
@@ -300,41 +616,51 @@ def configure(
     # Track start time for timeout enforcement
     start_time = time.time()
 
-    # Build the globus-compute-endpoint command to run
-    command = ["globus-compute-endpoint"]
+    # Get the path to the globus compute endpoint configuration
     if config_dir:
-        command.append("-c")
-        command.append(f"{os.path.abspath(config_dir)}")
-    command.append("configure")
-    command.append(name)
+        config_path = pathlib.Path(f"{os.path.abspath(config_dir)}/{name}")
+    else:
+        config_path = pathlib.Path(f"{pathlib.Path.home()}/.globus_compute/{name}")
 
-    p = subprocess.Popen(
-        command,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        start_new_session=True,
-    )
+    if in_process:
+        # Use the endpoint library directly, which avoids starting an interpreter
+        try:
+            Endpoint.validate_endpoint_name(name)
+            with contextlib.redirect_stdout(io.StringIO()):
+                # Map identities when privileged, like the configure command
+                Endpoint.configure_endpoint(config_path, id_mapping=is_privileged())
+        except Exception as e:
+            raise RuntimeError(f"Failed to configure endpoint '{name}': {e}") from None
+    else:
+        # Build the globus-compute-endpoint command to run
+        command = ["globus-compute-endpoint"]
+        if config_dir:
+            command.append("-c")
+            command.append(f"{os.path.abspath(config_dir)}")
+        command.append("configure")
+        command.append(name)
 
-    try:
-        stdout, _ = p.communicate(timeout=timeout)
-    except subprocess.TimeoutExpired:
-        # Kill the process if it times out
-        p.kill()
-        # Wait for it to actually terminate
-        p.wait()
-        raise TimeoutError(
-            f"globus-compute-endpoint configure command timed out after {timeout} seconds"
+        p = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            start_new_session=True,
         )
 
-    if p.returncode != 0:
-        raise RuntimeError(f"Failed to configure endpoint '{name}': {stdout}")
+        try:
+            stdout, _ = p.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            # Kill the process if it times out
+            p.kill()
+            # Wait for it to actually terminate
+            p.wait()
+            raise TimeoutError(
+                f"globus-compute-endpoint configure command timed out after {timeout} seconds"
+            )
 
-    # Get the path to the globus compute endpoint configuration
-    if config_dir:
-        config_path = pathlib.Path(f"{os.path.abspath(config_dir)}/{name}")
-    else:
-        config_path = pathlib.Path(f"{pathlib.Path.home()}/.globus_compute/{name}")
+        if p.returncode != 0:
+            raise RuntimeError(f"Failed to configure endpoint '{name}': {stdout}")
 
     # Read the default endpoint configuration that was just created
     with open(config_path / "config.yaml", "r") as f:
@@ -360,65 +686,101 @@ def configure(
 
     # Setup the user config jinja template
     with open(config_path / "user_config_template.yaml.j2", "w") as f:
-        f.write(endpoint_template)
-
-    # Capture the required system PATH for the endpoint environment.
-    # Set $HOME to an empty temporary directory to avoid capturing user-specific settings
-    # that could cause issues in the endpoint environment.  Use a temporary directory for
-    # $HOME to avoid security issues with /tmp. Providing an empty $HOME is the only way
-    # to reliably capture a clean PATH that doesn't include user-specific directories.
-    # NOTE: This may fail on systems with badly written system init scripts that attempt
-    # to source user-specific files without checking for their existence first, but this
-    # scenario is very unlikely and we will accept that risk until we have a better solution.
-    temp_home = tempfile.mkdtemp(prefix="chiltepin_home_")
-    try:
-        # Calculate remaining timeout for the second subprocess call
-        remaining_timeout = None
-        if timeout is not None:
-            elapsed = time.time() - start_time
-            remaining_timeout = max(1.0, timeout - elapsed)
-
-        p = subprocess.Popen(
-            ["env", "-i", f"HOME={temp_home}", "bash", "-l", "-c", "echo $PATH"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            start_new_session=True,
-        )
-        try:
-            stdout, stderr = p.communicate(timeout=remaining_timeout)
-        except subprocess.TimeoutExpired:
-            # Kill the process if it times out
-            p.kill()
-            # Wait for it to actually terminate
-            p.wait()
-            raise TimeoutError(
-                f"PATH capture command timed out after {remaining_timeout} seconds"
+        f.write(
+            make_template(
+                heartbeat_period=heartbeat_period,
+                idle_heartbeats_soft=idle_heartbeats_soft,
+                idle_heartbeats_hard=idle_heartbeats_hard,
             )
+        )
 
-        if p.returncode != 0:
-            raise RuntimeError(f"Failed to capture system PATH: {stderr}")
-        login_path = stdout.strip()
-    finally:
-        # Clean up the temporary directory
-        shutil.rmtree(temp_home, ignore_errors=True)
+    # Setup the schema the endpoint checks the template variables against
+    with open(config_path / "user_config_schema.json", "w") as f:
+        json.dump(user_config_schema(), f, indent=2)
+
+    # Calculate remaining timeout for capturing the PATH
+    remaining_timeout = None
+    if timeout is not None:
+        elapsed = time.time() - start_time
+        remaining_timeout = max(1.0, timeout - elapsed)
+    login_path = _capture_login_path(config_path.parent, remaining_timeout)
     chiltepin_path = pathlib.Path(sys.executable).parent.resolve()
 
     # Set the custom user environment path configuration for the endpoint
-    with open(config_path / "user_environment.yaml", "a") as f:
-        f.write(f"PATH: {chiltepin_path}:{login_path}\n")
+    _set_user_path(
+        config_path / "user_environment.yaml", f"{chiltepin_path}:{login_path}"
+    )
 
     # Return success
     return True
 
 
+# Threads reading endpoint directories, whose stats are slow on parallel file systems
+_SCAN_WORKERS = 16
+
+# File in the endpoint configuration directory caching the endpoint listing
+_SHOW_CACHE = ".chiltepin_endpoints.json"
+
+
+def _endpoint_status(endpoint_dir: Path) -> Optional[Dict[str, Optional[str]]]:
+    # Read the id and status of one endpoint as Endpoint.get_endpoints does,
+    # or return None if the directory is not an endpoint
+    if not any(endpoint_dir.glob("config.*")):
+        return None
+    try:
+        endpoint_id = Endpoint.get_endpoint_id(endpoint_dir)
+    except Exception as e:
+        logger.warning(
+            f"Failed to read endpoint id: [{type(e).__name__}] {e} ({endpoint_dir})"
+        )
+        endpoint_id = "[failed to read endpoint id]"
+    if not endpoint_id:
+        return {"id": endpoint_id, "status": "Initialized"}
+    pid_check = Endpoint.check_pidfile(endpoint_dir)
+    if pid_check["active"]:
+        status = "Running"
+    elif pid_check["exists"]:
+        status = "Disconnected"
+    else:
+        status = "Stopped"
+    return {"id": endpoint_id, "status": status}
+
+
+def _scan_endpoints(
+    config_dir: Path, pattern: str
+) -> Dict[str, Dict[str, Optional[str]]]:
+    # Read the endpoint directories matching the pattern in parallel.  Like
+    # Endpoint.get_endpoints, hidden directories are endpoints too.
+    try:
+        with os.scandir(config_dir) as entries:
+            names = sorted(
+                entry.name
+                for entry in entries
+                if fnmatch.fnmatchcase(entry.name, pattern) and entry.is_dir()
+            )
+    except (FileNotFoundError, NotADirectoryError):
+        return {}
+    if not names:
+        return {}
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(_SCAN_WORKERS, len(names))
+    ) as pool:
+        statuses = pool.map(_endpoint_status, [config_dir / name for name in names])
+        return {
+            name: status for name, status in zip(names, statuses) if status is not None
+        }
+
+
 def show(
     config_dir: Optional[str] = None,
+    pattern: str = "*",
+    status: Optional[str] = None,
+    cache_ttl: Optional[float] = None,
 ) -> Dict[str, Dict[str, Optional[str]]]:
     """Return a dictionary of configured Globus Compute Endpoints
 
     This returns endpoint information in a dict with keys corresponding to
-    the endpoint names.
+    the endpoint names.  The endpoint directories are read in parallel.
 
     Parameters
     ----------
@@ -427,6 +789,21 @@ def show(
         Path to endpoint configuration directory where endpoint information
         is stored. If None (the default), then $HOME/.globus_compute is used
 
+    pattern: str
+        Glob pattern of the names of the endpoints to return. Only the
+        directories of matching endpoints are read.
+
+    status: str | None
+        Only return endpoints with this status ("Initialized", "Running",
+        "Disconnected" or "Stopped"), ignoring case. If None, endpoints with
+        any status are returned.
+
+    cache_ttl: float | None
+        Seconds for which a listing of all endpoints is cached in a file in
+        the configuration directory and reused, so that frequent callers do
+        not read every endpoint directory each time. Cached statuses can be
+        this many seconds old. If None (the default), nothing is cached.
+
     Returns
     -------
 
@@ -436,11 +813,57 @@ def show(
     config_dir_path = (
         Path(config_dir) if config_dir else Path.home() / ".globus_compute"
     )
-    endpoint_info = Endpoint.get_endpoints(config_dir_path)
+    endpoint_info = None
+    if cache_ttl is not None:
+        endpoint_info = _read_show_cache(config_dir_path, cache_ttl)
+        if endpoint_info is None:
+            endpoint_info = _scan_endpoints(config_dir_path, "*")
+            _write_show_cache(config_dir_path, endpoint_info)
+        endpoint_info = {
+            name: info
+            for name, info in endpoint_info.items()
+            if fnmatch.fnmatchcase(name, pattern)
+        }
+    else:
+        endpoint_info = _scan_endpoints(config_dir_path, pattern)
 
+    if status is not None:
+        endpoint_info = {
+            name: info
+            for name, info in endpoint_info.items()
+            if info["status"].lower() == status.lower()
+        }
     return endpoint_info
 
 
+def _read_show_cache(
+    config_dir: Path, cache_ttl: float
+) -> Optional[Dict[str, Dict[str, Optional[str]]]]:
+    # Return the cached endpoint listing, or None if it is missing or expired
+    try:
+        cache = json.loads((config_dir / _SHOW_CACHE).read_text())
+        if time.time() - cache["time"] < cache_ttl:
+            return cache["endpoints"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def _write_show_cache(
+    config_dir: Path, endpoint_info: Dict[str, Dict[str, Optional[str]]]
+) -> None:
+    # Replace the cache at once, so that concurrent readers never see a partial file
+    try:
+        with tempfile.NamedTemporaryFile(
+            "w", dir=config_dir, prefix=_SHOW_CACHE, delete=False
+        ) as f:
+            json.dump({"time": time.time(), "endpoints": endpoint_info}, f)
+        os.replace(f.name, config_dir / _SHOW_CACHE)
+    except OSError:
+        # The cache is only an optimization
+        pass
+
+
 def exists(
     name: str,
     config_dir: Optional[str] = None,
@@ -462,8 +885,8 @@ def exists(
 
     bool
     """
-    # Get the endpoint info
-    endpoints = show(config_dir)
+    # Get the endpoint info, reading only the directory of this endpoint
+    endpoints = show(config_dir, pattern=glob.escape(name))
 
     # Return whether the endpoint exists in the listing
     return name in endpoints
@@ -490,8 +913,8 @@ def is_running(
 
     bool
     """
-    # Get the endpoint info
-    endpoints = show(config_dir)
+    # Get the endpoint info, reading only the directory of this endpoint
+    endpoints = show(config_dir, pattern=glob.escape(name))
 
     # Extract the endpoint record
     endpoint = endpoints.get(name, {})
@@ -786,3 +1209,76 @@ def delete(
             break
 
         time.sleep(1)
+
+
+def _ping() -> None:
+    # Task used to measure start up times, it does nothing
+    return None
+
+
+def measure_cold_start(
+    name: str,
+    config: Optional[Dict[str, Any]] = None,
+    config_dir: Optional[str] = None,
+    client: Optional[Client] = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, float]:
+    """Measure how long a user endpoint takes to start
+
+    Two empty tasks are submitted one after the other with the user endpoint
+    configuration of a resource.  The first one waits for the user endpoint
+    and its workers to start unless they were already running, and the
+    second one measures the time a task takes once they are.  Measure when
+    the user endpoint has been idle longer than its idle limit to get the
+    time of a cold start.
+
+    Parameters
+    ----------
+
+    name: str
+        Name of the endpoint, which must be running
+
+    config: Dict[str, Any] | None
+        YAML configuration block of the resource to start the user endpoint
+        for. The default is None, meaning the resource defaults are used.
+
+    config_dir: str | None
+        Path to endpoint configuration directory where endpoint information
+        is stored. If None (the default), then $HOME/.globus_compute is used
+
+    client: Client | None
+        The Globus Compute client to use. If None, a default client is used.
+
+    timeout: float | None
+        Number of seconds to wait for each task. Default is None, meaning
+        the tasks are waited for indefinitely.
+
+    Returns
+    -------
+
+    Dict[str, float]
+        Seconds taken by the "first_task" and the "warm_task", and their
+        difference as the "cold_start"
+    """
+    if client is None and login_required():
+        raise RuntimeError("Chiltepin login is required")
+
+    endpoint_id = show(config_dir).get(name, {}).get("id")
+    if endpoint_id is None:
+        raise RuntimeError(f"Endpoint '{name}' is not configured")
+    resource = dict(config or {}, endpoint=endpoint_id)
+    # Invalid configurations would only fail once the user endpoint starts
+    render_template(resource)
+
+    timings = {}
+    with Executor(
+        endpoint_id=endpoint_id,
+        client=client,
+        user_endpoint_config=user_endpoint_config(resource),
+    ) as executor:
+        for key in ("first_task", "warm_task"):
+            start_time = time.time()
+            executor.submit(_ping).result(timeout=timeout)
+            timings[key] = time.time() - start_time
+    timings["cold_start"] = max(0.0, timings["first_task"] - timings["warm_task"])
+    return timings
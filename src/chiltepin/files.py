@@ -0,0 +1,169 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Memory-mapped file handoff between tasks.
+
+Model output written by one task is often read by the next one, but only
+some of it is needed.  Declare such files as :class:`MappedFile` outputs of
+the producing task, with the layout of the data they hold, and open them
+with :func:`open_mapped` in the consuming python task.  The file is memory
+mapped, so only the regions the task touches are read.  MappedFile is a
+Parsl ``File``, so the consuming task waits for the producing task through
+the usual ``inputs``/``outputs`` dependency tracking.
+
+Examples
+--------
+::
+
+    from chiltepin.files import MappedFile, open_mapped
+
+    @bash_task
+    def run_model(outputs=()):
+        return f"./model --output {outputs[0]}"
+
+    @python_task
+    def mean_temperature(level, inputs=()):
+        from chiltepin.files import open_mapped
+
+        temperature = open_mapped(inputs[0])
+        return float(temperature[level].mean())
+
+    output = MappedFile("temperature.bin", dtype="float32", shape=(64, 721, 1440))
+    model = run_model(outputs=[output], executor=["compute"])
+    mean = mean_temperature(10, inputs=[model.outputs[0]], executor=["compute"])
+"""
+
+import math
+import mmap
+import os
+from typing import Any, Optional, Tuple, Union
+
+from parsl.data_provider.files import File
+
+# mmap access modes for the modes of numpy.memmap
+_ACCESS = {"r": mmap.ACCESS_READ, "r+": mmap.ACCESS_WRITE, "c": mmap.ACCESS_COPY}
+
+
+class MappedFile(File):
+    """A task input or output file holding an array
+
+    Parameters
+    ----------
+
+    url: str | os.PathLike
+        Path or URL of the file, as for a Parsl File
+
+    dtype: Any
+        Data type of the array, such as "float32". If None, the file is
+        mapped as raw bytes.
+
+    shape: Tuple[int, ...] | None
+        Shape of the array. If None, the array fills the rest of the file.
+
+    offset: int
+        Offset of the array in the file, in bytes
+
+    order: str
+        "C" for row-major or "F" for column-major arrays
+    """
+
+    def __init__(
+        self,
+        url: Union[str, os.PathLike],
+        dtype: Any = None,
+        shape: Optional[Tuple[int, ...]] = None,
+        offset: int = 0,
+        order: str = "C",
+    ):
+        super().__init__(url)
+        self.dtype = dtype
+        self.shape = tuple(shape) if shape is not None else None
+        self.offset = offset
+        self.order = order
+
+    def cleancopy(self) -> "MappedFile":
+        # Parsl hands clean copies of output files to tasks, keep the layout
+        return MappedFile(
+            self.url,
+            dtype=self.dtype,
+            shape=self.shape,
+            offset=self.offset,
+            order=self.order,
+        )
+
+
+def open_mapped(
+    file: Union[File, str, os.PathLike],
+    mode: str = "r",
+    dtype: Any = None,
+    shape: Optional[Tuple[int, ...]] = None,
+    offset: Optional[int] = None,
+) -> Any:
+    """Memory map a file, so that only the regions that are used are read
+
+    Parameters
+    ----------
+
+    file: File | str | os.PathLike
+        The file to map. The layout of a MappedFile is used unless it is
+        overridden by the other arguments.
+
+    mode: str
+        "r" for read-only, "r+" to write to the file, "c" for changes that
+        are not written to the file, or "w+" to create or overwrite the file
+        (arrays only)
+
+    dtype: Any
+        Data type of the array. If neither this nor the file gives a data
+        type, the file is mapped as raw bytes.
+
+    shape: Tuple[int, ...] | None
+        Shape of the array, or the number of bytes when mapping raw bytes.
+        If None, the data fills the rest of the file.
+
+    offset: int | None
+        Offset of the data in the file, in bytes
+
+    Returns
+    -------
+
+    numpy.memmap | memoryview
+        A numpy.memmap if there is a data type, otherwise a memoryview of
+        the bytes
+    """
+    path = os.fspath(file)
+    layout = file if isinstance(file, MappedFile) else None
+    if dtype is None and layout is not None:
+        dtype = layout.dtype
+    if shape is None and layout is not None:
+        shape = layout.shape
+    if offset is None:
+        offset = layout.offset if layout is not None else 0
+    order = layout.order if layout is not None else "C"
+
+    if dtype is not None:
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError(
+                "numpy is required to map arrays, map the file without a dtype "
+                "to get its raw bytes"
+            ) from None
+        return numpy.memmap(
+            path, dtype=dtype, mode=mode, offset=offset, shape=shape, order=order
+        )
+
+    if mode not in _ACCESS:
+        raise ValueError(
+            f"Invalid mode '{mode}' for raw bytes, must be one of {list(_ACCESS)}"
+        )
+    size = os.path.getsize(path)
+    length = size - offset if shape is None else math.prod(shape)
+    if length == 0:
+        return memoryview(b"")
+    # mmap offsets must be multiples of the allocation granularity
+    start = offset - offset % mmap.ALLOCATIONGRANULARITY
+    with open(path, "r+b" if mode == "r+" else "rb") as f:
+        mapping = mmap.mmap(
+            f.fileno(), length + offset - start, access=_ACCESS[mode], offset=start
+        )
+    return memoryview(mapping)[offset - start :]
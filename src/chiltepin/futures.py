@@ -0,0 +1,55 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Futures of Chiltepin tasks.
+
+Some Chiltepin tasks resolve to something other than the result of the Parsl
+app that runs them: MPI tasks to the exit code of the application, transfer
+and deletion tasks to whether the data was transferred, and tasks with a
+serializer to the decoded result.  Their futures are :class:`TaskFuture`
+objects, which forward the Parsl task attributes ``tid``, ``task_record`` and
+``task_status()`` to the AppFuture of the task, like the AppFutures returned
+by other python and bash tasks.
+"""
+
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+
+
+class TaskFuture(Future):
+    """Future of a Chiltepin task that is run by a Parsl app
+
+    Parameters
+    ----------
+
+    app_future: Future | None
+        The AppFuture of the Parsl app running the task, or None if the app
+        has not been submitted yet, such as for transfers waiting in the
+        transfer scheduler.  It is set when the app is submitted.
+    """
+
+    def __init__(self, app_future: Optional[Future] = None):
+        super().__init__()
+        self.app_future = app_future
+
+    @property
+    def tid(self) -> Optional[int]:
+        """The id of the Parsl task, or None if it has not been submitted"""
+        return getattr(self.app_future, "tid", None)
+
+    @property
+    def task_record(self) -> Optional[Dict[str, Any]]:
+        """The Parsl task record, or None if the task has not been submitted"""
+        return getattr(self.app_future, "task_record", None)
+
+    def task_status(self) -> str:
+        """Return the Parsl status of the task
+
+        Returns
+        -------
+
+        str
+            The name of the state of the Parsl task, or "pending" if it has
+            not been submitted
+        """
+        task_status = getattr(self.app_future, "task_status", None)
+        return task_status() if task_status is not None else "pending"
@@ -0,0 +1,379 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""In-process workflow metrics for Chiltepin.
+
+A :class:`WorkflowMetrics` object collects measurements made while a workflow
+runs.  :func:`chiltepin.workflow.run_workflow` creates one for every workflow,
+makes it available through :func:`current` while the workflow is active, and
+logs its summary when the workflow exits.
+
+Examples
+--------
+Inspect the transfer telemetry of a workflow after it finishes::
+
+    from chiltepin import run_workflow
+    from chiltepin.data import transfer_task
+    from chiltepin.metrics import WorkflowMetrics
+
+    metrics = WorkflowMetrics()
+    with run_workflow("config.yaml", metrics=metrics):
+        transfer_task("archive", "scratch", "in.dat", "in.dat").result()
+
+    print(metrics.summary())
+"""
+
+import heapq
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from chiltepin.backends import SUCCEEDED
+
+if TYPE_CHECKING:
+    from chiltepin.critical_path import CriticalPath
+
+_current: Optional["WorkflowMetrics"] = None
+
+# Seconds covered by each throughput sample, and the number of samples kept
+_THROUGHPUT_INTERVAL = 10.0
+_THROUGHPUT_SAMPLES = 360
+
+# Number of slowest tasks kept
+_SLOWEST_TASKS = 10
+
+# Parsl task states in which a task waits for its dependencies or a retry
+_PENDING_STATES = ("unsched", "pending", "fail_retryable")
+
+# Parsl task states in which a task has been handed to its executor
+_RUNNING_STATES = ("launched", "running", "running_ended", "joining")
+
+
+def current() -> Optional["WorkflowMetrics"]:
+    """Return the metrics of the active workflow, or None if there isn't one
+
+    Returns
+    -------
+
+    WorkflowMetrics | None
+    """
+    return _current
+
+
+def activate(metrics: Optional["WorkflowMetrics"]) -> None:
+    """Make the given metrics the ones returned by current()
+
+    Parameters
+    ----------
+
+    metrics: WorkflowMetrics | None
+        The metrics to activate, or None to deactivate the current metrics
+    """
+    global _current
+    _current = metrics
+
+
+def format_bytes(nbytes: float) -> str:
+    """Return a human readable representation of a number of bytes
+
+    Parameters
+    ----------
+
+    nbytes: float
+        Number of bytes
+
+    Returns
+    -------
+
+    str
+    """
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(nbytes) < 1000 or unit == "TB":
+            break
+        nbytes /= 1000
+    return f"{nbytes:.1f} {unit}" if unit != "B" else f"{int(nbytes)} B"
+
+
+class WorkflowMetrics:
+    """Thread-safe collection of measurements made during a workflow
+
+    Records are appended from task completion callbacks, which Parsl runs on
+    its own threads, so all access goes through a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._transfers: List[Dict[str, Any]] = []
+        self._mpi_tasks: List[Dict[str, Any]] = []
+        self._critical_path: Optional["CriticalPath"] = None
+        self._finished: Dict[str, Dict[str, int]] = {}
+        self._throughput: Dict[float, int] = {}
+        self._slowest: List[Tuple[float, int, Dict[str, Any]]] = []
+
+    def record_transfer(self, report: Dict[str, Any]) -> None:
+        """Record the final report of a transfer or deletion
+
+        Parameters
+        ----------
+
+        report: Dict[str, Any]
+            Report produced by :mod:`chiltepin.data`, containing at least the
+            ``kind``, ``src_ep``, ``dst_ep``, ``status``,
+            ``bytes_transferred``, ``files_transferred``, ``faults`` and
+            ``elapsed`` keys.
+        """
+        with self._lock:
+            self._transfers.append(dict(report))
+
+    @property
+    def transfers(self) -> List[Dict[str, Any]]:
+        """A copy of the transfer reports recorded so far"""
+        with self._lock:
+            return list(self._transfers)
+
+    def record_mpi(self, report: Dict[str, Any]) -> None:
+        """Record the timing report of an MPI task
+
+        Parameters
+        ----------
+
+        report: Dict[str, Any]
+            Report produced by :func:`chiltepin.tasks.mpi_task`, containing at
+            least the ``name``, ``num_nodes``, ``num_ranks``, ``returncode``,
+            ``launch`` and ``run`` keys.
+        """
+        with self._lock:
+            self._mpi_tasks.append(dict(report))
+
+    @property
+    def mpi_tasks(self) -> List[Dict[str, Any]]:
+        """A copy of the MPI task reports recorded so far"""
+        with self._lock:
+            return list(self._mpi_tasks)
+
+    def track_task(self, future: Future) -> None:
+        """Count a submitted task and its duration once it finishes
+
+        Parameters
+        ----------
+
+        future: Future
+            The Parsl AppFuture of the task
+        """
+        if getattr(future, "task_record", None) is None:
+            return
+        future.add_done_callback(self._task_done)
+
+    def _task_done(self, future: Future) -> None:
+        record = future.task_record
+        label = str(record.get("executor"))
+        failed = future.exception() is not None
+        now = time.time()
+        launched = record.get("try_time_launched")
+        returned = record.get("time_returned")
+        with self._lock:
+            counts = self._finished.setdefault(label, {"done": 0, "failed": 0})
+            counts["failed" if failed else "done"] += 1
+            sample = now - now % _THROUGHPUT_INTERVAL
+            self._throughput[sample] = self._throughput.get(sample, 0) + 1
+            if len(self._throughput) > _THROUGHPUT_SAMPLES:
+                del self._throughput[min(self._throughput)]
+            if launched is not None and returned is not None:
+                duration = (returned - launched).total_seconds()
+                task = {
+                    "id": record["id"],
+                    "name": record.get("func_name"),
+                    "executor": label,
+                    "duration": duration,
+                    "failed": failed,
+                }
+                entry = (duration, record["id"], task)
+                if len(self._slowest) < _SLOWEST_TASKS:
+                    heapq.heappush(self._slowest, entry)
+                elif duration > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, entry)
+
+    def task_summary(self, records: Iterable[Dict[str, Any]] = ()) -> Dict[str, Any]:
+        """Return the state of the tasks submitted so far
+
+        The metrics only count finished tasks.  Unfinished tasks are counted
+        from their Parsl task records, which are not kept in the metrics
+        because the active metrics are reachable from the globals of Chiltepin
+        modules that dill may serialize with task functions.
+
+        Parameters
+        ----------
+
+        records: Iterable[Dict[str, Any]]
+            Parsl task records of the unfinished tasks, such as
+            ``dfk.tasks.values()``. The records of finished tasks are ignored.
+
+        Returns
+        -------
+
+        Dict[str, Any]
+            The number of "pending" tasks (waiting for their dependencies),
+            "running" tasks (handed to their executor, where they may wait for
+            a worker), and "done" and "failed" tasks under "executors", keyed
+            by executor label.  The number of tasks finished in each interval
+            of ``interval`` seconds under "throughput", as [start time, count]
+            pairs.  The "slowest" finished tasks, by the time since they were
+            handed to their executor.
+        """
+        with self._lock:
+            executors = {
+                label: {"pending": 0, "running": 0, **counts}
+                for label, counts in self._finished.items()
+            }
+            throughput = sorted(self._throughput.items())
+            slowest = sorted(self._slowest, reverse=True)
+        for record in records:
+            status = getattr(record.get("status"), "name", "")
+            if status not in _PENDING_STATES + _RUNNING_STATES:
+                continue
+            counts = executors.setdefault(
+                str(record.get("executor")),
+                {"pending": 0, "running": 0, "done": 0, "failed": 0},
+            )
+            counts["running" if status in _RUNNING_STATES else "pending"] += 1
+        return {
+            "executors": dict(sorted(executors.items())),
+            "interval": _THROUGHPUT_INTERVAL,
+            "throughput": [[start, count] for start, count in throughput],
+            "slowest": [dict(task) for _, _, task in slowest],
+        }
+
+    def record_critical_path(self, report: "CriticalPath") -> None:
+        """Record the critical path analysis of the finished workflow
+
+        Parameters
+        ----------
+
+        report: CriticalPath
+            Analysis produced by :mod:`chiltepin.critical_path`
+        """
+        with self._lock:
+            self._critical_path = report
+
+    @property
+    def critical_path(self) -> Optional["CriticalPath"]:
+        """The critical path analysis of the workflow, if one was recorded"""
+        with self._lock:
+            return self._critical_path
+
+    def mpi_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Return aggregate MPI launch timings grouped by task name
+
+        Returns
+        -------
+
+        Dict[str, Dict[str, Any]]
+            Totals keyed by task name, plus an ``"all"`` entry.  Each entry
+            holds the number of ``tasks`` and ``failed`` tasks, the total
+            ``launch`` seconds spent starting the ranks with the MPI launcher,
+            the total ``run`` seconds spent running the application, and the
+            ``launch_fraction`` of the total time spent launching.
+        """
+        summary: Dict[str, Dict[str, Any]] = {}
+        for report in self.mpi_tasks:
+            for key in (report["name"], "all"):
+                totals = summary.setdefault(
+                    key, {"tasks": 0, "failed": 0, "launch": 0.0, "run": 0.0}
+                )
+                totals["tasks"] += 1
+                if report["returncode"] != 0:
+                    totals["failed"] += 1
+                totals["launch"] += report["launch"]
+                totals["run"] += report["run"]
+        for totals in summary.values():
+            elapsed = totals["launch"] + totals["run"]
+            totals["launch_fraction"] = (
+                totals["launch"] / elapsed if elapsed > 0 else 0.0
+            )
+        return summary
+
+    def transfer_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Return aggregate transfer telemetry grouped by endpoint pair
+
+        Returns
+        -------
+
+        Dict[str, Dict[str, Any]]
+            Totals keyed by ``"<src_ep> -> <dst_ep>"`` (or just the source
+            endpoint for deletions), plus an ``"all"`` entry.  Each entry
+            holds the number of ``tasks``, ``succeeded`` and ``failed`` tasks,
+            total ``bytes``, ``files``, ``faults`` and ``elapsed`` seconds,
+            and the effective ``rate`` in bytes per second.
+        """
+        summary: Dict[str, Dict[str, Any]] = {}
+        for report in self.transfers:
+            if report.get("dst_ep"):
+                pair = f"{report['src_ep']} -> {report['dst_ep']}"
+            else:
+                pair = report["src_ep"]
+            for key in (pair, "all"):
+                totals = summary.setdefault(
+                    key,
+                    {
+                        "tasks": 0,
+                        "succeeded": 0,
+                        "failed": 0,
+                        "bytes": 0,
+                        "files": 0,
+                        "faults": 0,
+                        "elapsed": 0.0,
+                    },
+                )
+                totals["tasks"] += 1
+                if report["status"] == SUCCEEDED:
+                    totals["succeeded"] += 1
+                else:
+                    totals["failed"] += 1
+                totals["bytes"] += report["bytes_transferred"]
+                totals["files"] += report["files_transferred"]
+                totals["faults"] += report["faults"]
+                totals["elapsed"] += report["elapsed"]
+        for totals in summary.values():
+            totals["rate"] = (
+                totals["bytes"] / totals["elapsed"] if totals["elapsed"] > 0 else 0.0
+            )
+        return summary
+
+    def summary(self) -> str:
+        """Return a human readable summary of the recorded metrics
+
+        Returns
+        -------
+
+        str
+        """
+        lines = []
+        transfers = self.transfer_summary()
+        if transfers:
+            lines.append("Transfer summary:")
+            # Show the overall totals last
+            overall = transfers.pop("all")
+            for name, totals in sorted(transfers.items()) + [("all", overall)]:
+                lines.append(
+                    f"  {name}: {totals['tasks']} tasks "
+                    f"({totals['succeeded']} succeeded, {totals['failed']} failed), "
+                    f"{format_bytes(totals['bytes'])} in {totals['files']} files, "
+                    f"{totals['elapsed']:.1f}s, "
+                    f"{format_bytes(totals['rate'])}/s, "
+                    f"{totals['faults']} faults"
+                )
+        mpi_tasks = self.mpi_summary()
+        if mpi_tasks:
+            lines.append("MPI summary:")
+            overall = mpi_tasks.pop("all")
+            for name, totals in sorted(mpi_tasks.items()) + [("all", overall)]:
+                lines.append(
+                    f"  {name}: {totals['tasks']} tasks ({totals['failed']} failed), "
+                    f"launch {totals['launch'] / totals['tasks']:.2f}s, "
+                    f"run {totals['run'] / totals['tasks']:.2f}s on average, "
+                    f"{100 * totals['launch_fraction']:.1f}% of time launching"
+                )
+        critical_path = self.critical_path
+        if critical_path is not None and critical_path.tasks:
+            lines.append(critical_path.summary())
+        return "\n".join(lines)
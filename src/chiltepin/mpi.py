@@ -0,0 +1,417 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Packing of MPI tasks onto the nodes of MPI resources.
+
+An MPI resource provides blocks of ``nodes_per_block`` nodes, and each MPI task
+asks for some number of those nodes through the ``num_nodes`` key of its
+``parsl_resource_specification``.  When tasks of different sizes are submitted
+all at once, the order in which they reach the blocks determines how many nodes
+sit idle.  :class:`MPIPacker` holds MPI tasks on the submitting side and
+releases them so that the nodes stay busy, and it reports the node utilization
+that was achieved.  :func:`right_size` suggests the ``nodes_per_block`` and
+``max_mpi_apps`` of an MPI resource for a known set of task shapes.
+
+Examples
+--------
+Pack forecasts of different sizes onto a 3-node block::
+
+    from chiltepin.mpi import MPIPacker
+
+    packer = MPIPacker.for_resource(config["mpi-resource"])
+    futures = [
+        packer.submit(
+            forecast,
+            member,
+            executor=["mpi-resource"],
+            parsl_resource_specification={"num_nodes": nodes, "num_ranks": 4 * nodes},
+        )
+        for member, nodes in enumerate([1, 2, 3, 1, 2, 1])
+    ]
+    ...
+    print(packer.summary())
+"""
+
+import itertools
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from chiltepin.dispatch import Dispatcher
+
+# Packing policies supported by MPIPacker
+POLICIES = ("ffd", "fifo")
+
+
+def _resource_specification(
+    task: Callable[..., Future], kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Return the resource specification a task will be submitted with"""
+    spec = kwargs.get("parsl_resource_specification")
+    # mpi_task methods are bound with functools.partial
+    build = getattr(task, "resource_specification", None) or getattr(
+        getattr(task, "func", None), "resource_specification", None
+    )
+    if build is None:
+        return spec or {}
+    return build(spec)
+
+
+def pack_first_fit_decreasing(sizes: List[int], capacity: int) -> List[List[int]]:
+    """Group tasks into as few full blocks as possible
+
+    This is the classic first-fit-decreasing bin packing heuristic.  It is
+    useful for planning how many blocks a set of MPI tasks needs when all the
+    tasks take about as long as each other.
+
+    Parameters
+    ----------
+
+    sizes: List[int]
+        Number of nodes needed by each task
+
+    capacity: int
+        Number of nodes in each block
+
+    Returns
+    -------
+
+    List[List[int]]
+        Indices into ``sizes`` of the tasks assigned to each block
+    """
+    bins: List[List[int]] = []
+    free: List[int] = []
+    for index in sorted(range(len(sizes)), key=lambda i: -sizes[i]):
+        size = sizes[index]
+        if size > capacity:
+            raise ValueError(
+                f"Task {index} needs {size} nodes but blocks only have {capacity}"
+            )
+        for b, nodes in enumerate(free):
+            if nodes >= size:
+                bins[b].append(index)
+                free[b] -= size
+                break
+        else:
+            bins.append([index])
+            free.append(capacity - size)
+    return bins
+
+
+def right_size(
+    shapes: List[Dict[str, Any]],
+    max_nodes_per_block: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Suggest an MPI resource configuration for a set of MPI task shapes
+
+    The suggestion lets all the given tasks run at the same time while leaving
+    as few nodes idle as possible.  Among equally good block sizes, the
+    smallest is preferred because smaller batch jobs usually start sooner.
+
+    Parameters
+    ----------
+
+    shapes: List[Dict[str, Any]]
+        Resource specifications of the tasks that should run at the same
+        time, with optional "num_nodes" and "ranks_per_node" keys. Repeat a
+        shape once for each task of that shape.
+
+    max_nodes_per_block: int | None
+        Largest block size to consider, for example the node limit of the
+        partition. If None, blocks holding all the tasks are considered.
+
+    Returns
+    -------
+
+    Dict[str, Any]
+        The suggested ``nodes_per_block``, ``max_mpi_apps`` and
+        ``max_blocks`` options, the smallest ``cores_per_node`` that fits the
+        ranks, and the ``utilization`` of the nodes (from 0 to 1) when all
+        the tasks run.
+    """
+    if not shapes:
+        raise ValueError("At least one task shape is needed")
+    sizes = [int(shape.get("num_nodes", 1)) for shape in shapes]
+    largest = max(sizes)
+    if max_nodes_per_block is None:
+        max_nodes_per_block = sum(sizes)
+    if largest > max_nodes_per_block:
+        raise ValueError(
+            f"A task needs {largest} nodes but blocks may only have "
+            f"{max_nodes_per_block}"
+        )
+    best: Dict[str, Any] = {}
+    for nodes_per_block in range(largest, max_nodes_per_block + 1):
+        bins = pack_first_fit_decreasing(sizes, nodes_per_block)
+        idle = len(bins) * nodes_per_block - sum(sizes)
+        if not best or idle < best["idle"]:
+            best = {"idle": idle, "nodes_per_block": nodes_per_block, "bins": bins}
+    total = len(best["bins"]) * best["nodes_per_block"]
+    return {
+        "nodes_per_block": best["nodes_per_block"],
+        "max_mpi_apps": max(len(b) for b in best["bins"]),
+        "max_blocks": len(best["bins"]),
+        "cores_per_node": max(int(s.get("ranks_per_node", 1)) for s in shapes),
+        "utilization": sum(sizes) / total,
+    }
+
+
+class MPIPacker(Dispatcher):
+    """Releases queued MPI tasks so that the nodes of a resource stay busy
+
+    The packer models each block of the resource as a bin of nodes.  A queued
+    task is started once all the futures it depends on are done and a block
+    has enough free nodes for it.  With the ``"ffd"`` policy (first fit
+    decreasing), the largest eligible tasks are started first and smaller
+    tasks fill the nodes that are left over.  With the ``"fifo"`` policy,
+    tasks are started in submission order, but smaller tasks may still
+    backfill nodes that the next task in line cannot use.
+
+    Backfilling can starve a large task when small tasks keep taking the nodes
+    it is waiting for.  Once an eligible task has been passed over by
+    ``max_bypass`` tasks started after it, the block closest to fitting it is
+    reserved: no other task is started in that block until it has started.
+
+    Parameters
+    ----------
+
+    nodes_per_block: int
+        Number of nodes in each block of the resource
+
+    blocks: int
+        Number of blocks of the resource that may be used at the same time
+
+    max_tasks_per_block: int | None
+        Maximum number of tasks that may run in a block at the same time (the
+        ``max_mpi_apps`` of the resource). If None, it is not limited.
+
+    policy: str
+        Either "ffd" or "fifo"
+
+    clock: Callable[[], float]
+        Function returning the current time in seconds, used to measure
+        utilization. Defaults to time.monotonic.
+
+    max_bypass: int | None
+        Number of times an eligible task may be passed over before a block is
+        reserved for it. If None, tasks are never reserved a block.
+    """
+
+    def __init__(
+        self,
+        nodes_per_block: int,
+        blocks: int = 1,
+        max_tasks_per_block: Optional[int] = None,
+        policy: str = "ffd",
+        clock: Callable[[], float] = time.monotonic,
+        max_bypass: Optional[int] = 10,
+    ):
+        if nodes_per_block < 1 or blocks < 1:
+            raise ValueError("nodes_per_block and blocks must be at least 1")
+        if max_bypass is not None and max_bypass < 0:
+            raise ValueError("max_bypass must not be negative")
+        if policy not in POLICIES:
+            raise ValueError(f"Invalid policy '{policy}', must be one of {POLICIES}")
+        super().__init__()
+        self.nodes_per_block = nodes_per_block
+        self.blocks = blocks
+        self.max_tasks_per_block = max_tasks_per_block
+        self.policy = policy
+        self.clock = clock
+        self.max_bypass = max_bypass
+        self._queue: List[Dict[str, Any]] = []
+        self._count = itertools.count()
+        self._free = [nodes_per_block] * blocks
+        self._running = [0] * blocks
+        self._busy_node_seconds = 0.0
+        self._first_start: Optional[float] = None
+        self._last_finish: Optional[float] = None
+        self._finished = 0
+
+    @classmethod
+    def for_resource(cls, config: Dict[str, Any], **kwargs) -> "MPIPacker":
+        """Create a packer for an MPI resource configuration
+
+        Parameters
+        ----------
+
+        config: Dict[str, Any]
+            YAML configuration block of the resource. The "nodes_per_block",
+            "max_blocks" and "max_mpi_apps" options are used.
+
+        **kwargs
+            Additional arguments passed to the MPIPacker constructor
+
+        Returns
+        -------
+
+        MPIPacker
+        """
+        return cls(
+            config.get("nodes_per_block", 1),
+            blocks=config.get("max_blocks", 1),
+            max_tasks_per_block=config.get("max_mpi_apps", 1),
+            **kwargs,
+        )
+
+    @property
+    def pending(self) -> int:
+        """Number of tasks waiting to be started"""
+        with self._lock:
+            return len(self._queue)
+
+    @property
+    def busy_nodes(self) -> int:
+        """Number of nodes used by running tasks"""
+        with self._lock:
+            return self.blocks * self.nodes_per_block - sum(self._free)
+
+    def submit(self, task: Callable[..., Future], *args, **kwargs) -> Future:
+        """Queue an MPI task and return a future for its result
+
+        Parameters
+        ----------
+
+        task: Callable[..., Future]
+            The task to submit. The number of nodes it needs is read from the
+            "num_nodes" key of its resource specification: that of the
+            ``mpi_task`` decorator merged with the
+            ``parsl_resource_specification`` keyword argument, or only the
+            keyword argument for other tasks, defaulting to 1.
+
+        *args, **kwargs
+            Arguments to call the task with
+
+        Returns
+        -------
+
+        Future
+        """
+        num_nodes = int(_resource_specification(task, kwargs).get("num_nodes", 1))
+        if num_nodes > self.nodes_per_block:
+            raise ValueError(
+                f"Task needs {num_nodes} nodes but blocks only have "
+                f"{self.nodes_per_block}"
+            )
+        depends = [
+            dep
+            for dep in list(args)
+            + list(kwargs.values())
+            + list(kwargs.get("inputs", []))
+            if isinstance(dep, Future)
+        ]
+        entry = {
+            "order": next(self._count),
+            "nodes": num_nodes,
+            "submit": lambda: task(*args, **kwargs),
+            "depends": depends,
+            "bypassed": 0,
+            "future": Future(),
+        }
+        with self._lock:
+            self._queue.append(entry)
+        for dep in depends:
+            dep.add_done_callback(lambda _: self._dispatch())
+        self._dispatch()
+        return entry["future"]
+
+    def _fit(self, nodes: int, reserved: Set[int]) -> Optional[int]:
+        """Return the first unreserved block with room for a task of the given size"""
+        for block, free in enumerate(self._free):
+            if (
+                block not in reserved
+                and free >= nodes
+                and (
+                    self.max_tasks_per_block is None
+                    or self._running[block] < self.max_tasks_per_block
+                )
+            ):
+                return block
+        return None
+
+    def _select(self) -> List[Dict[str, Any]]:
+        """Take the nodes of every queued task that fits"""
+        started = []
+        if self.policy == "ffd":
+            order = sorted(self._queue, key=lambda e: (-e["nodes"], e["order"]))
+        else:
+            order = list(self._queue)
+        # Blocks held for starving tasks, and eligible tasks that did not fit
+        reserved: Set[int] = set()
+        blocked: List[Dict[str, Any]] = []
+        for entry in order:
+            if not all(dep.done() for dep in entry["depends"]):
+                continue
+            block = self._fit(entry["nodes"], reserved)
+            if block is None:
+                blocked.append(entry)
+                if self.max_bypass is not None and entry["bypassed"] >= self.max_bypass:
+                    # Hold the block that is closest to fitting the task
+                    unreserved = [b for b in range(self.blocks) if b not in reserved]
+                    if unreserved:
+                        reserved.add(max(unreserved, key=lambda b: self._free[b]))
+                continue
+            for waiting in blocked:
+                waiting["bypassed"] += 1
+            self._queue.remove(entry)
+            self._free[block] -= entry["nodes"]
+            self._running[block] += 1
+            entry["block"] = block
+            entry["start"] = self.clock()
+            if self._first_start is None:
+                self._first_start = entry["start"]
+            started.append(entry)
+        return started
+
+    def _release(self, entry: Dict[str, Any]) -> None:
+        """Return the nodes of a task to its block and account for their use"""
+        with self._lock:
+            now = self.clock()
+            self._free[entry["block"]] += entry["nodes"]
+            self._running[entry["block"]] -= 1
+            self._busy_node_seconds += entry["nodes"] * (now - entry["start"])
+            self._last_finish = now
+            self._finished += 1
+
+    def utilization(self) -> Dict[str, float]:
+        """Return the node utilization achieved by the finished tasks
+
+        Returns
+        -------
+
+        Dict[str, float]
+            The number of finished ``tasks``, the ``elapsed`` seconds from
+            the first start to the last finish, the ``busy_node_seconds``
+            used by tasks, the ``available_node_seconds`` of all blocks over
+            that time, and the ``utilization`` (their ratio, from 0 to 1).
+        """
+        with self._lock:
+            if self._first_start is None or self._last_finish is None:
+                elapsed = 0.0
+            else:
+                elapsed = self._last_finish - self._first_start
+            available = elapsed * self.nodes_per_block * self.blocks
+            return {
+                "tasks": self._finished,
+                "elapsed": elapsed,
+                "busy_node_seconds": self._busy_node_seconds,
+                "available_node_seconds": available,
+                "utilization": (
+                    self._busy_node_seconds / available if available > 0 else 0.0
+                ),
+            }
+
+    def summary(self) -> str:
+        """Return a human readable summary of the node utilization
+
+        Returns
+        -------
+
+        str
+        """
+        u = self.utilization()
+        return (
+            f"MPI packing ({self.policy}): {u['tasks']} tasks on "
+            f"{self.blocks} x {self.nodes_per_block} nodes in {u['elapsed']:.1f}s, "
+            f"{u['busy_node_seconds']:.1f} of {u['available_node_seconds']:.1f} "
+            f"node-seconds used ({100 * u['utilization']:.1f}% utilization)"
+        )
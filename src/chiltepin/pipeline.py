@@ -0,0 +1,188 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Streaming pipelines of Chiltepin tasks.
+
+A pipeline is a sequence of stages that every item passes through in order,
+for example ``transfer -> preprocess -> model -> postprocess`` for each member
+of an ensemble.  Each item advances to the next stage as soon as its previous
+stage finishes, instead of waiting for all items to finish a stage.  Every
+stage can limit how many items it works on at the same time.
+
+For comprehensive usage examples, see the :doc:`tasks` documentation.
+
+Examples
+--------
+Run each ensemble member through three stages::
+
+    from concurrent.futures import as_completed
+
+    from chiltepin.data import transfer_task
+    from chiltepin.pipeline import Pipeline, Stage
+    from chiltepin.tasks import bash_task, python_task
+
+    def stage_in(member):
+        return transfer_task(
+            "archive", "scratch", f"ic_{member}.nc", f"ic_{member}.nc",
+            executor=["local"],
+        )
+
+    @bash_task
+    def run_model(member):
+        return f"./model --member {member}"
+
+    @python_task
+    def verify(member):
+        return score(member)
+
+    pipeline = Pipeline(
+        Stage(stage_in, max_in_flight=4),
+        Stage(run_model, max_in_flight=2, pass_item=True, executor=["compute"]),
+        Stage(verify, pass_item=True, executor=["compute"]),
+    )
+    for future in as_completed(pipeline.map(range(30))):
+        print(future.result())
+"""
+
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from chiltepin.dispatch import Dispatcher
+
+
+class Stage:
+    """One step of a pipeline
+
+    Parameters
+    ----------
+
+    task: Callable
+        Chiltepin task (or any callable returning a Future) to run for each
+        item.  It is called with the result of the previous stage (or the
+        item itself, for the first stage) followed by ``kwargs``.
+
+    max_in_flight: int | None
+        Maximum number of items this stage works on at the same time. If
+        None, the number is not limited.
+
+    pass_item: bool
+        If True, call the task with the original item instead of the result
+        of the previous stage.
+
+    **kwargs
+        Additional keyword arguments passed to every call of the task, such
+        as ``executor``.
+    """
+
+    def __init__(
+        self,
+        task: Callable[..., Future],
+        max_in_flight: Optional[int] = None,
+        pass_item: bool = False,
+        **kwargs,
+    ):
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.task = task
+        self.max_in_flight = max_in_flight
+        self.pass_item = pass_item
+        self.kwargs = kwargs
+        self.in_flight = 0
+        self.waiting: Deque[Dict[str, Any]] = deque()
+
+    def has_capacity(self) -> bool:
+        """Return whether the stage can start another item"""
+        return self.max_in_flight is None or self.in_flight < self.max_in_flight
+
+
+class Pipeline(Dispatcher):
+    """A sequence of stages that items flow through
+
+    Parameters
+    ----------
+
+    *stages: Stage
+        The stages of the pipeline, in order
+    """
+
+    def __init__(self, *stages: Stage):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        super().__init__()
+        self.stages = stages
+
+    def submit(self, item: Any) -> Future:
+        """Send one item through the pipeline
+
+        Parameters
+        ----------
+
+        item: Any
+            The item to process
+
+        Returns
+        -------
+
+        Future
+            Future for the result of the last stage for this item
+        """
+        entry = {"item": item, "value": item, "future": Future()}
+        with self._lock:
+            self.stages[0].waiting.append(entry)
+        self._dispatch()
+        return entry["future"]
+
+    def map(self, items: Iterable[Any]) -> List[Future]:
+        """Send every item through the pipeline
+
+        Parameters
+        ----------
+
+        items: Iterable[Any]
+            The items to process
+
+        Returns
+        -------
+
+        List[Future]
+            Futures for the results of the last stage, in the order of the items
+        """
+        return [self.submit(item) for item in items]
+
+    def _select(self) -> List[Dict[str, Any]]:
+        """Take a place in its stage for every waiting item that has one"""
+        started = []
+        # Drain later stages first so items already in the pipeline finish early
+        for index in reversed(range(len(self.stages))):
+            stage = self.stages[index]
+            while stage.waiting and stage.has_capacity():
+                entry = stage.waiting.popleft()
+                stage.in_flight += 1
+                entry["stage"] = index
+                entry["submit"] = lambda stage=stage, entry=entry: stage.task(
+                    entry["item"] if stage.pass_item else entry["value"],
+                    **stage.kwargs,
+                )
+                started.append(entry)
+        return started
+
+    def _release(self, entry: Dict[str, Any]) -> None:
+        """Free the place of an item in its stage"""
+        with self._lock:
+            self.stages[entry["stage"]].in_flight -= 1
+
+    def _resolve(
+        self,
+        entry: Dict[str, Any],
+        task_future: Optional[Future] = None,
+        exception: Optional[BaseException] = None,
+    ) -> None:
+        """Advance an item to its next stage, or resolve its future"""
+        if exception is None:
+            exception = task_future.exception()
+        if exception is not None or entry["stage"] == len(self.stages) - 1:
+            super()._resolve(entry, task_future, exception)
+            return
+        entry["value"] = task_future.result()
+        with self._lock:
+            self.stages[entry["stage"] + 1].waiting.append(entry)
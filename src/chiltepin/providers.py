@@ -0,0 +1,229 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Batch providers that choose among several partitions or queues.
+
+On a busy system, the partition a batch job is submitted to often matters more
+for time to solution than anything the job itself does.  The providers in this
+module are given a list of candidate partitions (Slurm) or queues (PBS Pro),
+probe the scheduler before submitting each block, and submit it where it
+should start soonest:
+
+- Slurm candidates are ranked by the start time that ``sbatch --test-only``
+  estimates for a block
+- PBS Pro has no equivalent, so queues are ranked by the number of jobs
+  waiting in them, as reported by ``qstat -Q``
+
+Candidates that cannot be probed are ranked last, and ties are broken by the
+order of the candidates, so the first candidate is used when the scheduler
+gives no information.  These providers are created by
+:func:`chiltepin.configure.create_provider` for resources that set the
+``partitions`` (Slurm) or ``queues`` (PBS Pro) option.
+
+Examples
+--------
+.. code-block:: yaml
+
+    compute:
+      provider: "slurm"
+      partitions: ["batch", "debug", "bigmem"]
+      account: "myproject"
+      nodes_per_block: 2
+"""
+
+import logging
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from parsl.providers import PBSProProvider, SlurmProvider
+from parsl.utils import wtime_to_minutes
+
+logger = logging.getLogger(__name__)
+
+
+def choose_candidate(estimates: Dict[str, Optional[float]]) -> str:
+    """Return the candidate with the lowest estimate
+
+    Parameters
+    ----------
+
+    estimates: Dict[str, Optional[float]]
+        Estimates for each candidate, in order of preference. None means
+        that the candidate could not be probed.
+
+    Returns
+    -------
+
+    str
+    """
+    candidates = list(estimates)
+    return min(
+        candidates,
+        key=lambda c: (
+            estimates[c] is None,
+            estimates[c] or 0.0,
+            candidates.index(c),
+        ),
+    )
+
+
+class MultiPartitionSlurmProvider(SlurmProvider):
+    """Slurm provider that submits each block to the partition where it
+    should start soonest
+
+    Parameters
+    ----------
+
+    partitions: List[str]
+        Candidate partitions, in order of preference
+
+    **kwargs
+        Additional arguments passed to SlurmProvider (except ``partition``)
+    """
+
+    def __init__(self, partitions: List[str], **kwargs):
+        if not partitions:
+            raise ValueError("At least one partition is needed")
+        super().__init__(**kwargs)
+        self.partitions = list(partitions)
+        # Partition chosen for each submitted job, and the last probe results
+        self.choices: Dict[str, str] = {}
+        self.estimates: Dict[str, Optional[float]] = {}
+        self._submit_lock = threading.Lock()
+
+    def probe(self, partition: str) -> Optional[float]:
+        """Return the seconds until a block would start in a partition
+
+        Parameters
+        ----------
+
+        partition: str
+            The partition to probe
+
+        Returns
+        -------
+
+        float | None
+            Seconds until the estimated start, or None if Slurm did not
+            give an estimate
+        """
+        cmd = (
+            f"sbatch --test-only --partition={partition} "
+            f"--nodes={self.nodes_per_block} "
+            f"--time={wtime_to_minutes(self.walltime)}"
+        )
+        for option, value in (
+            ("account", self.account),
+            ("qos", self.qos),
+            ("constraint", self.constraint),
+            ("clusters", self.clusters),
+        ):
+            if value:
+                cmd += f" --{option}={value}"
+        if self.exclusive:
+            cmd += " --exclusive"
+        cmd += " --wrap=true"
+        try:
+            retcode, stdout, stderr = self.execute_wait(cmd)
+        except Exception:
+            logger.exception(f"Could not probe partition {partition}")
+            return None
+        # sbatch writes "Job 123 to start at 2026-01-01T12:00:00 using ..."
+        match = re.search(r"to start at (\S+)", stdout + stderr)
+        if retcode != 0 or match is None:
+            logger.debug(f"No start estimate for partition {partition}: {stderr}")
+            return None
+        try:
+            start = datetime.fromisoformat(match.group(1))
+        except ValueError:
+            return None
+        # sbatch prints the local time of the host it runs on, without a zone
+        if start.tzinfo is None:
+            start = start.astimezone()
+        return max(0.0, (start - datetime.now(timezone.utc)).total_seconds())
+
+    def submit(self, command: str, tasks_per_node: int, job_name="parsl.slurm") -> str:
+        """Submit a block to the partition where it should start soonest"""
+        with self._submit_lock:
+            self.estimates = {p: self.probe(p) for p in self.partitions}
+            partition = choose_candidate(self.estimates)
+            logger.info(f"Submitting block to partition {partition}: {self.estimates}")
+            scheduler_options = self.scheduler_options
+            self.scheduler_options += f"#SBATCH --partition={partition}\n"
+            try:
+                job_id = super().submit(command, tasks_per_node, job_name)
+            finally:
+                self.scheduler_options = scheduler_options
+            self.choices[job_id] = partition
+            return job_id
+
+
+class MultiQueuePBSProProvider(PBSProProvider):
+    """PBS Pro provider that submits each block to the least loaded queue
+
+    Parameters
+    ----------
+
+    queues: List[str]
+        Candidate queues, in order of preference
+
+    **kwargs
+        Additional arguments passed to PBSProProvider (except ``queue``)
+    """
+
+    def __init__(self, queues: List[str], **kwargs):
+        if not queues:
+            raise ValueError("At least one queue is needed")
+        super().__init__(**kwargs)
+        self.queues = list(queues)
+        # Queue chosen for each submitted job, and the last probe results
+        self.choices: Dict[str, str] = {}
+        self.estimates: Dict[str, Optional[float]] = {}
+        self._submit_lock = threading.Lock()
+
+    def probe(self, queue: str) -> Optional[float]:
+        """Return the number of jobs waiting in a queue
+
+        Parameters
+        ----------
+
+        queue: str
+            The queue to probe
+
+        Returns
+        -------
+
+        float | None
+            Number of queued jobs, or None if the queue could not be probed
+        """
+        try:
+            retcode, stdout, stderr = self.execute_wait(f"qstat -Q {queue}")
+        except Exception:
+            logger.exception(f"Could not probe queue {queue}")
+            return None
+        if retcode != 0:
+            logger.debug(f"Could not probe queue {queue}: {stderr}")
+            return None
+        # Queue Max Tot Ena Str Que Run Hld Wat Trn Ext Type
+        for line in stdout.splitlines():
+            fields = line.split()
+            if len(fields) > 5 and fields[0] == queue and fields[5].isdigit():
+                return float(fields[5])
+        return None
+
+    def submit(self, command, tasks_per_node, job_name="parsl"):
+        """Submit a block to the queue where it should start soonest"""
+        with self._submit_lock:
+            self.estimates = {q: self.probe(q) for q in self.queues}
+            queue = choose_candidate(self.estimates)
+            logger.info(f"Submitting block to queue {queue}: {self.estimates}")
+            previous = self.queue
+            self.queue = queue
+            try:
+                job_id = super().submit(command, tasks_per_node, job_name)
+            finally:
+                self.queue = previous
+            if job_id is not None:
+                self.choices[job_id] = queue
+            return job_id
@@ -0,0 +1,280 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Elastic scaling policies for Chiltepin resources.
+
+Parsl grows and shrinks the number of blocks of each resource with a scaling
+strategy.  The following resource configuration options control it:
+
+- ``strategy``: "simple" (the default), "htex_auto_scale" (also scales in
+  idle blocks of busy resources), or "none" (only ``init_blocks`` are ever
+  provisioned)
+- ``parallelism``: ratio of provisioned task slots to active tasks, from 0
+  (as few blocks as possible) to 1 (as many blocks as needed, the default)
+- ``max_idletime``: seconds a resource must be idle before its blocks are
+  scaled in
+- ``scale_in_grace``: seconds after a resource was last busy (or after a
+  burst ended) during which its blocks are kept
+
+Parsl applies a single strategy and idle timeout to all resources, so the
+resources that set ``strategy`` must agree (except for "none", which is
+applied to each resource by pinning its number of blocks), and the largest
+``max_idletime`` is used.  ``scale_in_grace`` and :func:`burst` are applied
+to each resource separately by the :class:`ScalingPolicy` of the workflow.
+
+Examples
+--------
+Provision blocks ahead of a fan-out instead of waiting for the scaling
+strategy to react to the queued tasks::
+
+    from chiltepin.scaling import burst
+
+    with run_workflow("config.yaml"):
+        with burst("compute", blocks=4):
+            futures = [forecast(member, executor=["compute"]) for member in range(64)]
+        results = [f.result() for f in futures]
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from parsl.jobs.states import JobState
+
+_policy: Optional["ScalingPolicy"] = None
+
+
+def current_policy() -> Optional["ScalingPolicy"]:
+    """Return the scaling policy of the active workflow, or None
+
+    Returns
+    -------
+
+    ScalingPolicy | None
+    """
+    return _policy
+
+
+def activate_policy(policy: Optional["ScalingPolicy"]) -> None:
+    """Make the given policy the one used by burst()
+
+    Parameters
+    ----------
+
+    policy: ScalingPolicy | None
+        The policy to activate, or None to deactivate the current policy
+    """
+    global _policy
+    _policy = policy
+
+
+def _active_blocks(executor: Any) -> int:
+    """Return the number of running and pending blocks of an executor"""
+    return sum(
+        1
+        for status in executor.status_facade.values()
+        if status.state in (JobState.RUNNING, JobState.PENDING)
+    )
+
+
+class ScalingPolicy:
+    """Per-resource scaling rules layered on top of Parsl's scaling strategy
+
+    The policy raises the ``min_blocks`` of a resource's provider while its
+    blocks should be kept, which stops Parsl's strategy from scaling them in,
+    and restores it afterwards.  Blocks are kept during a :meth:`burst`, and
+    for ``scale_in_grace`` seconds after a burst ends or after the resource
+    was last busy.
+
+    Parameters
+    ----------
+
+    executors: Dict[str, Any]
+        The Parsl executors of the workflow, keyed by resource label
+
+    resources: Dict[str, Dict[str, Any]]
+        Configurations of the resources, keyed by resource label
+
+    period: float
+        Seconds between two applications of the policy by its thread
+
+    clock: Callable[[], float]
+        Function returning the current time in seconds. Defaults to
+        time.monotonic.
+    """
+
+    def __init__(
+        self,
+        executors: Dict[str, Any],
+        resources: Dict[str, Dict[str, Any]],
+        period: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        # Only executors that provision blocks can be scaled
+        self.executors = {
+            label: executor
+            for label, executor in executors.items()
+            if getattr(executor, "provider", None) is not None
+        }
+        self.grace = {
+            label: float(resources.get(label, {}).get("scale_in_grace", 0))
+            for label in self.executors
+        }
+        self.period = period
+        self.clock = clock
+        self._min_blocks = {
+            label: executor.provider.min_blocks
+            for label, executor in self.executors.items()
+        }
+        self._holds: Dict[str, List[List[Any]]] = {
+            label: [] for label in self.executors
+        }
+        self._last_busy: Dict[str, Optional[float]] = dict.fromkeys(self.executors)
+        self._busy_blocks = dict.fromkeys(self.executors, 0)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _executor(self, label: str) -> Any:
+        if label not in self.executors:
+            raise ValueError(f"Resource '{label}' does not provision blocks")
+        return self.executors[label]
+
+    def floor(self, label: str) -> int:
+        """Return the number of blocks the policy currently keeps for a resource
+
+        Parameters
+        ----------
+
+        label: str
+            Label of the resource
+
+        Returns
+        -------
+
+        int
+        """
+        self._executor(label)
+        with self._lock:
+            return self._floor(label)
+
+    def _floor(self, label: str) -> int:
+        holds = [blocks for blocks, _ in self._holds[label]]
+        return max([self._min_blocks[label], self._busy_blocks[label]] + holds)
+
+    def _apply(self, label: str) -> None:
+        executor = self.executors[label]
+        executor.provider.min_blocks = min(
+            self._floor(label), executor.provider.max_blocks
+        )
+
+    def step(self) -> None:
+        """Apply the policy once to every resource"""
+        now = self.clock()
+        with self._lock:
+            for label, executor in self.executors.items():
+                self._holds[label] = [
+                    hold
+                    for hold in self._holds[label]
+                    if hold[1] is None or hold[1] > now
+                ]
+                if self.grace[label] > 0:
+                    if executor.outstanding() > 0:
+                        self._last_busy[label] = now
+                        self._busy_blocks[label] = max(
+                            self._busy_blocks[label], _active_blocks(executor)
+                        )
+                    elif (
+                        self._last_busy[label] is None
+                        or now - self._last_busy[label] >= self.grace[label]
+                    ):
+                        self._busy_blocks[label] = 0
+                self._apply(label)
+
+    @contextmanager
+    def burst(self, label: str, blocks: int, grace: Optional[float] = None):
+        """Provision blocks ahead of a known fan-out
+
+        Blocks are requested right away, up to ``max_blocks``, instead of
+        when Parsl's strategy notices the queued tasks, and they are kept
+        until the ``with`` block exits plus ``grace`` seconds.
+
+        Parameters
+        ----------
+
+        label: str
+            Label of the resource
+
+        blocks: int
+            Number of blocks to provision
+
+        grace: float | None
+            Seconds to keep the blocks after the ``with`` block exits. If
+            None, the ``scale_in_grace`` of the resource is used.
+        """
+        executor = self._executor(label)
+        if blocks < 1:
+            raise ValueError("blocks must be at least 1")
+        hold: List[Any] = [blocks, None]
+        with self._lock:
+            self._holds[label].append(hold)
+            self._apply(label)
+            missing = executor.provider.min_blocks - _active_blocks(executor)
+        if missing > 0:
+            executor.scale_out_facade(missing)
+        try:
+            yield
+        finally:
+            grace = self.grace[label] if grace is None else grace
+            with self._lock:
+                if grace > 0:
+                    hold[1] = self.clock() + grace
+                else:
+                    self._holds[label].remove(hold)
+                self._apply(label)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.period):
+            self.step()
+
+    def start(self) -> None:
+        """Start applying the policy periodically in a background thread"""
+        self._thread = threading.Thread(
+            target=self._run, name="chiltepin-scaling", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and restore the original min_blocks"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            for label, executor in self.executors.items():
+                executor.provider.min_blocks = self._min_blocks[label]
+
+
+@contextmanager
+def burst(resource: str, blocks: int, grace: Optional[float] = None):
+    """Provision blocks of a resource of the active workflow ahead of a fan-out
+
+    See :meth:`ScalingPolicy.burst`.
+
+    Parameters
+    ----------
+
+    resource: str
+        Label of the resource
+
+    blocks: int
+        Number of blocks to provision
+
+    grace: float | None
+        Seconds to keep the blocks after the ``with`` block exits. If None,
+        the ``scale_in_grace`` of the resource is used.
+    """
+    policy = current_policy()
+    if policy is None:
+        raise RuntimeError("burst() can only be used inside a running workflow")
+    with policy.burst(resource, blocks, grace):
+        yield
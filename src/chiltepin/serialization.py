@@ -0,0 +1,445 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Serializers for large python task arguments and results.
+
+Parsl serializes the arguments and the result of every task with dill, and the
+serialized bytes are copied several more times on their way through the
+interchange.  For large NumPy arrays (and the xarray and pandas objects built
+on them) this adds up to several copies of every array.  A python task can use
+one of the serializers of this module instead::
+
+    @python_task(serializer="shm")
+    def smooth(field):
+        ...
+
+The serializers use pickle protocol 5, which hands the memory of arrays to the
+serializer as out-of-band buffers instead of copying them into the pickle.
+The buffers are written once, outside of the Parsl message, and only their
+location travels with the task, which maps them without copying:
+
+- "shm": the buffers are written to shared memory (``/dev/shm``). Only for
+  resources on the same node as the workflow, such as localhost resources.
+- "file": the buffers are written to files in a directory.  Use
+  ``FileSerializer(directory)`` with a directory on a shared file system for
+  resources on other nodes.
+
+Arguments and results without out-of-band buffers are left to Parsl.  When
+the future of a task that uses a serializer is passed to another such task,
+the result is handed over without going through the workflow process.
+Custom serializers can be created by subclassing :class:`Serializer`.
+"""
+
+import abc
+import mmap
+import os
+import pickle
+import tempfile
+import threading
+import uuid
+from concurrent.futures import Future
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from chiltepin.futures import TaskFuture
+
+# Keyword arguments that Parsl handles itself
+_PARSL_KWARGS = (
+    "inputs",
+    "outputs",
+    "stdout",
+    "stderr",
+    "walltime",
+    "parsl_resource_specification",
+)
+
+# Alignment of buffers in files, large enough for any NumPy dtype
+_ALIGNMENT = 64
+
+
+class Encoded:
+    """An object encoded by a serializer
+
+    Parameters
+    ----------
+
+    serializer: Serializer
+        The serializer that encoded the object
+
+    header: bytes
+        Pickle of the object, without its out-of-band buffers
+
+    frames: Any
+        The out-of-band buffers as stored by the serializer
+    """
+
+    def __init__(self, serializer: "Serializer", header: bytes, frames: Any):
+        self.serializer = serializer
+        self.header = header
+        self.frames = frames
+
+    def decode(self) -> Any:
+        """Return the decoded object"""
+        return pickle.loads(self.header, buffers=self.serializer.load(self.frames))
+
+    def release(self) -> None:
+        """Free the storage used by the buffers"""
+        self.serializer.release(self.frames)
+
+
+class Serializer(abc.ABC):
+    """Base class of the serializers for python tasks
+
+    Subclasses store the out-of-band buffers of pickle protocol 5 by
+    implementing :meth:`store` and :meth:`load`, and :meth:`release` if the
+    storage must be freed.
+    """
+
+    def encode(self, obj: Any) -> Any:
+        """Encode an object
+
+        Parameters
+        ----------
+
+        obj: Any
+            The object to encode
+
+        Returns
+        -------
+
+        Any
+            An Encoded object, or ``obj`` itself if it has no out-of-band
+            buffers or cannot be pickled
+        """
+        pickled = pickle_buffers(obj)
+        if pickled is None or not pickled[1]:
+            return obj
+        header, buffers = pickled
+        return Encoded(self, header, self.store(buffers))
+
+    @abc.abstractmethod
+    def store(self, buffers: List[memoryview]) -> Any:
+        """Store buffers and return what is needed to load them
+
+        Parameters
+        ----------
+
+        buffers: List[memoryview]
+            The contiguous out-of-band buffers of an object
+
+        Returns
+        -------
+
+        Any
+            A picklable description of the stored buffers
+        """
+
+    @abc.abstractmethod
+    def load(self, frames: Any) -> List[Any]:
+        """Load the buffers described by the result of :meth:`store`
+
+        Parameters
+        ----------
+
+        frames: Any
+            The result of :meth:`store`
+
+        Returns
+        -------
+
+        List[Any]
+            Objects supporting the buffer protocol, in the order they were
+            stored
+        """
+
+    def release(self, frames: Any) -> None:
+        """Free the storage of buffers once they are no longer needed
+
+        Parameters
+        ----------
+
+        frames: Any
+            The result of :meth:`store`
+        """
+
+
+def pickle_buffers(obj: Any) -> Optional[Tuple[bytes, List[memoryview]]]:
+    """Pickle an object with its large buffers out of band
+
+    Parameters
+    ----------
+
+    obj: Any
+        The object to pickle
+
+    Returns
+    -------
+
+    Tuple[bytes, List[memoryview]] | None
+        The pickle of the object without its out-of-band buffers, and those
+        buffers, or None if the object cannot be pickled
+    """
+    buffers: List[pickle.PickleBuffer] = []
+    try:
+        header = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    except Exception:
+        # Leave objects that only dill can serialize to Parsl
+        return None
+    return header, [buffer.raw() for buffer in buffers]
+
+
+def write_buffers(path: str, buffers: List[memoryview]) -> List[Tuple[int, int]]:
+    """Write buffers to a file, aligned so that they can be mapped as arrays
+
+    Parameters
+    ----------
+
+    path: str
+        The file to write
+
+    buffers: List[memoryview]
+        Contiguous buffers to write
+
+    Returns
+    -------
+
+    List[Tuple[int, int]]
+        Offset and size of each buffer in the file
+    """
+    offsets = []
+    position = 0
+    with open(path, "wb") as f:
+        for buffer in buffers:
+            position = -(-position // _ALIGNMENT) * _ALIGNMENT
+            f.seek(position)
+            f.write(buffer)
+            offsets.append((position, buffer.nbytes))
+            position += buffer.nbytes
+    return offsets
+
+
+def map_buffers(path: str, offsets: List[Tuple[int, int]]) -> List[Any]:
+    """Map the buffers written by write_buffers() without copying them
+
+    The mapping is private, so the buffers are writable, and it stays valid
+    after the file is removed.
+
+    Parameters
+    ----------
+
+    path: str
+        The file to map
+
+    offsets: List[Tuple[int, int]]
+        Offset and size of each buffer in the file
+
+    Returns
+    -------
+
+    List[Any]
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return [bytearray() for _ in offsets]
+        view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+    return [view[offset : offset + size] for offset, size in offsets]
+
+
+class FileSerializer(Serializer):
+    """Serializer that writes buffers to a file and maps them when loading
+
+    Parameters
+    ----------
+
+    directory: str | None
+        Directory for the files. It must be visible to the resources that
+        run the tasks. If None, the default temporary directory is used.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+
+    def store(self, buffers: List[memoryview]) -> Tuple[str, List[Tuple[int, int]]]:
+        directory = self.directory or tempfile.gettempdir()
+        path = os.path.join(directory, f"chiltepin-{uuid.uuid4().hex}")
+        return path, write_buffers(path, buffers)
+
+    def load(self, frames: Tuple[str, List[Tuple[int, int]]]) -> List[Any]:
+        return map_buffers(*frames)
+
+    def release(self, frames: Tuple[str, List[Tuple[int, int]]]) -> None:
+        # Mappings of the file stay valid after it is removed
+        try:
+            os.remove(frames[0])
+        except FileNotFoundError:
+            pass
+
+
+class SharedMemorySerializer(FileSerializer):
+    """Serializer that hands buffers over in shared memory on the same node"""
+
+    def __init__(self):
+        if not os.path.isdir("/dev/shm"):
+            raise RuntimeError("Shared memory serialization needs /dev/shm")
+        super().__init__("/dev/shm")
+
+
+# Serializers that can be selected by name
+SERIALIZERS: Dict[str, Callable[[], Serializer]] = {
+    "shm": SharedMemorySerializer,
+    "file": FileSerializer,
+}
+
+
+def get_serializer(serializer: Union[str, Serializer, None]) -> Optional[Serializer]:
+    """Return the serializer for a serializer name or instance
+
+    Parameters
+    ----------
+
+    serializer: str | Serializer | None
+        One of the names in SERIALIZERS, a Serializer, or None for Parsl's
+        serialization
+
+    Returns
+    -------
+
+    Serializer | None
+    """
+    if serializer is None or isinstance(serializer, Serializer):
+        return serializer
+    if serializer not in SERIALIZERS:
+        raise ValueError(
+            f"Invalid serializer '{serializer}', must be one of {list(SERIALIZERS)}"
+        )
+    return SERIALIZERS[serializer]()
+
+
+def _decode(value: Any) -> Any:
+    return value.decode() if isinstance(value, Encoded) else value
+
+
+def wrap(function: Callable, serializer: Serializer) -> Callable:
+    """Wrap a task function to decode its arguments and encode its result
+
+    Parameters
+    ----------
+
+    function: Callable
+        The task function
+
+    serializer: Serializer
+        The serializer for the result
+
+    Returns
+    -------
+
+    Callable
+    """
+
+    @wraps(function)
+    def run(*args, **kwargs):
+        args = tuple(_decode(arg) for arg in args)
+        kwargs = {key: _decode(value) for key, value in kwargs.items()}
+        return serializer.encode(function(*args, **kwargs))
+
+    return run
+
+
+class DecodedFuture(TaskFuture):
+    """Future for the decoded result of a task that uses a serializer
+
+    Parameters
+    ----------
+
+    task_future: Future
+        The future of the task, which resolves to the encoded result
+    """
+
+    def __init__(self, task_future: Future):
+        super().__init__(task_future)
+        self.task_future = task_future
+        self._lock = threading.Lock()
+        # The result is kept until it is decoded and every task using it is done
+        self._users = 1
+        self._encoded: Any = None
+        task_future.add_done_callback(self._resolve)
+
+    def _resolve(self, task_future: Future) -> None:
+        exception = task_future.exception()
+        if exception is not None:
+            self.set_exception(exception)
+            return
+        self._encoded = task_future.result()
+        try:
+            value = _decode(self._encoded)
+        except Exception as e:
+            self.set_exception(e)
+        else:
+            self.set_result(value)
+        finally:
+            self.release()
+
+    def acquire(self) -> bool:
+        """Keep the encoded result for one more task, if it still exists"""
+        with self._lock:
+            if self._users == 0:
+                return False
+            self._users += 1
+            return True
+
+    def release(self) -> None:
+        """Drop one use of the encoded result"""
+        with self._lock:
+            self._users -= 1
+            unused = self._users == 0
+        if unused and isinstance(self._encoded, Encoded):
+            self._encoded.release()
+
+
+def encode_arguments(
+    args: Tuple[Any, ...], kwargs: Dict[str, Any], serializer: Serializer
+) -> Tuple[Tuple[Any, ...], Dict[str, Any], List[Callable[[], None]]]:
+    """Encode the arguments of a task before it is submitted
+
+    Parameters
+    ----------
+
+    args: Tuple[Any, ...]
+        Positional arguments of the task
+
+    kwargs: Dict[str, Any]
+        Keyword arguments of the task
+
+    serializer: Serializer
+        The serializer to encode the arguments with
+
+    Returns
+    -------
+
+    Tuple[Tuple[Any, ...], Dict[str, Any], List[Callable[[], None]]]
+        The encoded arguments, and the functions to call once the task is done
+    """
+    releases: List[Callable[[], None]] = []
+
+    def encode(value: Any) -> Any:
+        if isinstance(value, DecodedFuture):
+            # Hand the encoded result over directly while it is kept
+            if value.acquire():
+                releases.append(value.release)
+                return value.task_future
+            if value.exception() is not None:
+                return value
+            value = value.result()
+        elif isinstance(value, Future):
+            return value
+        encoded = serializer.encode(value)
+        if isinstance(encoded, Encoded):
+            releases.append(encoded.release)
+        return encoded
+
+    args = tuple(encode(arg) for arg in args)
+    kwargs = {
+        key: value if key in _PARSL_KWARGS else encode(value)
+        for key, value in kwargs.items()
+    }
+    return args, kwargs, releases
@@ -0,0 +1,251 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Result stores that pass large task results between tasks by reference.
+
+The result of a python task normally travels back to the workflow process,
+and from there to every task that uses it.  A python task with a
+``result_store`` writes large results to a directory instead, and its future
+resolves to a small :class:`Proxy` that only records where the result is::
+
+    @python_task(result_store="/scratch/myproject/results")
+    def forecast(member):
+        ...
+
+    @python_task
+    def verify(field):
+        ...
+
+    fields = [forecast(m, executor=["compute"]) for m in range(30)]
+    scores = [verify(f, executor=["compute"]) for f in fields]
+
+Python tasks resolve proxies passed as arguments before they run, so
+``verify`` receives the field itself.  Array data is memory mapped, so only
+the parts that a task reads are loaded.  The directory must be visible to the
+resources that run the consumers: a node-local directory such as ``/dev/shm``
+is enough when they run on the same node, and a shared file system is needed
+otherwise.  In the workflow process, :meth:`Proxy.resolve` loads a result.
+
+Stored results are kept until :meth:`ResultStore.evict` or
+:meth:`ResultStore.clear` is called.
+"""
+
+import glob
+import os
+import pickle
+import uuid
+from functools import wraps
+from typing import Any, Callable, List, Tuple, Union
+
+from chiltepin.serialization import map_buffers, pickle_buffers, write_buffers
+
+# Prefix of the names of the files of stored results
+_PREFIX = "chiltepin-result-"
+
+
+class Proxy:
+    """Reference to a result in a result store
+
+    Pickling a proxy only pickles the reference.  The result is loaded the
+    first time it is used, and attributes, items and iteration are forwarded
+    to it.
+
+    Parameters
+    ----------
+
+    path: str
+        File holding the result
+
+    offsets: List[Tuple[int, int]]
+        Offset and size in the file of the pickle of the result, followed by
+        those of its out-of-band buffers
+    """
+
+    def __init__(self, path: str, offsets: List[Tuple[int, int]]):
+        self._path = path
+        self._offsets = offsets
+
+    @property
+    def path(self) -> str:
+        """File holding the result"""
+        return self._path
+
+    def resolve(self) -> Any:
+        """Load the result, or return it if it was loaded already
+
+        Returns
+        -------
+
+        Any
+        """
+        if "_value" not in self.__dict__:
+            header, *buffers = map_buffers(self._path, self._offsets)
+            self._value = pickle.loads(header, buffers=buffers)
+        return self._value
+
+    def __reduce__(self):
+        return Proxy, (self._path, self._offsets)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.resolve()[key]
+
+    def __len__(self) -> int:
+        return len(self.resolve())
+
+    def __iter__(self):
+        return iter(self.resolve())
+
+    def __array__(self, *args, **kwargs):
+        return self.resolve().__array__(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"Proxy({self._path!r})"
+
+
+def resolve(value: Any) -> Any:
+    """Return the result a proxy refers to, or the value itself
+
+    Parameters
+    ----------
+
+    value: Any
+
+    Returns
+    -------
+
+    Any
+    """
+    return value.resolve() if isinstance(value, Proxy) else value
+
+
+def resolve_arguments(function: Callable) -> Callable:
+    """Wrap a task function to resolve the proxies it is called with
+
+    Parameters
+    ----------
+
+    function: Callable
+
+    Returns
+    -------
+
+    Callable
+    """
+
+    @wraps(function)
+    def run(*args, **kwargs):
+        args = tuple(resolve(arg) for arg in args)
+        kwargs = {key: resolve(value) for key, value in kwargs.items()}
+        return function(*args, **kwargs)
+
+    return run
+
+
+class ResultStore:
+    """Directory in which python tasks store their large results
+
+    Parameters
+    ----------
+
+    directory: str
+        Directory for the results. It is created if needed, and must be
+        visible to the resources that run the tasks using the results.
+
+    threshold: int
+        Results smaller than this many bytes when pickled are returned
+        directly instead of being stored
+    """
+
+    def __init__(self, directory: str, threshold: int = 2**20):
+        self.directory = directory
+        self.threshold = threshold
+
+    def put(self, obj: Any) -> Any:
+        """Store an object if it is large
+
+        Parameters
+        ----------
+
+        obj: Any
+            The object to store
+
+        Returns
+        -------
+
+        Any
+            A Proxy for the stored object, or ``obj`` itself if it is
+            smaller than the threshold or cannot be pickled
+        """
+        pickled = pickle_buffers(obj)
+        if pickled is None:
+            return obj
+        header, buffers = pickled
+        if len(header) + sum(buffer.nbytes for buffer in buffers) < self.threshold:
+            return obj
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{_PREFIX}{uuid.uuid4().hex}")
+        return Proxy(path, write_buffers(path, [memoryview(header), *buffers]))
+
+    def wrap(self, function: Callable) -> Callable:
+        """Wrap a task function to store its result
+
+        Parameters
+        ----------
+
+        function: Callable
+
+        Returns
+        -------
+
+        Callable
+        """
+
+        @wraps(function)
+        def run(*args, **kwargs):
+            return self.put(function(*args, **kwargs))
+
+        return run
+
+    def evict(self, proxy: Proxy) -> None:
+        """Delete a stored result
+
+        Proxies that were already resolved keep working.
+
+        Parameters
+        ----------
+
+        proxy: Proxy
+            Proxy for the result to delete
+        """
+        try:
+            os.remove(proxy.path)
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        """Delete all the results stored in the directory"""
+        for path in glob.glob(os.path.join(self.directory, _PREFIX + "*")):
+            os.remove(path)
+
+
+def get_result_store(store: Union[str, ResultStore, None]) -> Union[ResultStore, None]:
+    """Return the result store for a directory or store
+
+    Parameters
+    ----------
+
+    store: str | ResultStore | None
+        A directory, a ResultStore, or None
+
+    Returns
+    -------
+
+    ResultStore | None
+    """
+    if store is None or isinstance(store, ResultStore):
+        return store
+    return ResultStore(store)
@@ -10,6 +10,13 @@ Available Decorators
 - :func:`python_task`: Execute Python functions as workflow tasks
 - :func:`bash_task`: Execute shell commands as workflow tasks
 - :func:`join_task`: Coordinate multiple tasks without blocking workflow execution
+- :func:`mpi_task`: Launch MPI applications on MPI resources as workflow tasks
+
+Available Functions
+-------------------
+- :func:`submit_bounded`: Lazily submit tasks for an iterable of items, keeping a
+  bounded number of them outstanding
+- :func:`check_priority`: Check the ``priority`` argument of a task
 
 For comprehensive usage examples and best practices, see the :doc:`tasks` documentation.
 
@@ -38,11 +45,143 @@ Define a bash task::
     exit_code = list_files("/tmp", executor=["compute"]).result()
 """
 
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 from functools import wraps
 from inspect import Parameter, signature
-from typing import Callable
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set, Union
 
 from parsl.app.app import bash_app, join_app, python_app
+from parsl.app.errors import BashExitFailure
+
+from chiltepin import configure, metrics, serialization, store
+from chiltepin.futures import TaskFuture
+
+_window: Optional["SubmissionWindow"] = None
+_resources: Optional[Dict[str, Dict[str, Any]]] = None
+
+
+def current_resources() -> Optional[Dict[str, Dict[str, Any]]]:
+    """Return the configurations of the resources loaded by the active workflow
+
+    Returns
+    -------
+
+    Dict[str, Dict[str, Any]] | None
+        Resource configurations keyed by resource label, or None if there is
+        no active workflow
+    """
+    return _resources
+
+
+def activate_resources(resources: Optional[Dict[str, Dict[str, Any]]]) -> None:
+    """Make the given resource configurations the ones tasks are checked against
+
+    Parameters
+    ----------
+
+    resources: Dict[str, Dict[str, Any]] | None
+        Resource configurations keyed by resource label, or None to stop
+        checking tasks
+    """
+    global _resources
+    _resources = resources
+
+
+def current_window() -> Optional["SubmissionWindow"]:
+    """Return the submission window of the active workflow, or None
+
+    Returns
+    -------
+
+    SubmissionWindow | None
+    """
+    return _window
+
+
+def activate_window(window: Optional["SubmissionWindow"]) -> None:
+    """Make the given window the one that bounds task submission
+
+    Parameters
+    ----------
+
+    window: SubmissionWindow | None
+        The window to activate, or None to stop bounding submissions
+    """
+    global _window
+    _window = window
+
+
+class SubmissionWindow:
+    """Bounds the number of outstanding python and bash tasks
+
+    Submitting a task takes a slot in the window, and the slot is freed when
+    the task's future is done.  When the window is full, submissions made
+    from the thread that created the window block until a slot is freed.
+    Submissions made from other threads, such as the threads that run task
+    completion callbacks, are counted but never blocked, because blocking
+    them could prevent the completions that free the slots.
+
+    Parameters
+    ----------
+
+    max_outstanding: int
+        Maximum number of outstanding tasks
+    """
+
+    def __init__(self, max_outstanding: int):
+        if max_outstanding < 1:
+            raise ValueError("max_outstanding must be at least 1")
+        self.max_outstanding = max_outstanding
+        self.outstanding = 0
+        self._owner = threading.get_ident()
+        self._lock = threading.Condition()
+
+    def acquire(self) -> None:
+        """Take a slot, blocking if the window is full and this is the owner thread"""
+        with self._lock:
+            if threading.get_ident() == self._owner:
+                self._lock.wait_for(lambda: self.outstanding < self.max_outstanding)
+            self.outstanding += 1
+
+    def release(self) -> None:
+        """Free a slot"""
+        with self._lock:
+            self.outstanding -= 1
+            self._lock.notify_all()
+
+    def submit(self, submit: Callable[[], Future]) -> Future:
+        """Submit a task inside the window
+
+        Parameters
+        ----------
+
+        submit: Callable[[], Future]
+            Function that submits the task and returns its future
+
+        Returns
+        -------
+
+        Future
+        """
+        self.acquire()
+        try:
+            future = submit()
+        except BaseException:
+            self.release()
+            raise
+        future.add_done_callback(lambda _: self.release())
+        return future
+
+
+def _submit(submit: Callable[[], Future]) -> Future:
+    """Submit a task through the active submission window, if there is one"""
+    window = current_window()
+    future = submit() if window is None else window.submit(submit)
+    recorder = metrics.current()
+    if recorder is not None:
+        recorder.track_task(future)
+    return future
 
 
 def _create_filtered_wrapper(function: Callable) -> Callable:
@@ -83,6 +222,43 @@ def _create_filtered_wrapper(function: Callable) -> Callable:
     return wrapper
 
 
+def _check_parameters(function: Callable) -> None:
+    """Reject task functions with a parameter that task calls reserve
+
+    Calls of every task take a ``priority`` argument for themselves, so a
+    parameter of the same name would never receive its argument.
+    """
+    if "priority" in signature(function).parameters:
+        raise ValueError(
+            f"Task function '{function.__name__}' cannot have a 'priority' "
+            "parameter, the name is reserved for the priority of the task"
+        )
+
+
+def check_priority(priority: Optional[float]) -> None:
+    """Check the priority argument of a task
+
+    Priorities are numbers, and lower values run first.  None means the task
+    has no priority and runs after the tasks that have one.
+
+    Parameters
+    ----------
+
+    priority: float | None
+        The priority to check
+
+    Raises
+    ------
+
+    ValueError
+        If the priority is not None or a number
+    """
+    if priority is None:
+        return
+    if isinstance(priority, bool) or not isinstance(priority, (int, float)):
+        raise ValueError(f"Task priority must be a number, not {priority!r}")
+
+
 class MethodWrapper:
     """Wrapper that preserves method behavior for decorated functions.
 
@@ -110,21 +286,49 @@ class MethodWrapper:
         """Support standalone function calls."""
         return self.wrapper_func(*args, **kwargs)
 
+    def __getattr__(self, name):
+        """Expose the attributes of the wrapper, such as helpers of the task."""
+        if name == "wrapper_func":
+            raise AttributeError(name)
+        return getattr(self.wrapper_func, name)
 
-def python_task(function: Callable) -> Callable:
+
+def python_task(
+    function: Optional[Callable] = None,
+    *,
+    serializer: Union[str, "serialization.Serializer", None] = None,
+    result_store: Union[str, "store.ResultStore", None] = None,
+) -> Callable:
     """Decorator function for making Chiltepin python tasks.
 
     The decorator transforms the function into a Parsl python_app but adds an executor
     argument such that the executor for the function can be chosen dynamically at runtime.
 
+    The decorator can be used bare (``@python_task``) or with arguments
+    (``@python_task(serializer="shm")``).
+
+    Calls of the task accept a ``priority`` argument, see :func:`bash_task`.
+    The function cannot have a parameter named ``priority``.
+
     Parameters
     ----------
 
-    function: Callable
+    function: Callable | None
         The function to be decorated to yield a Python workflow task. This function can be a
         stand-alone function or a class method. If it is a class method, it can make use of
         `self` to access object state.
 
+    serializer: str | Serializer | None
+        Serializer for large arguments and results, such as NumPy arrays: "shm",
+        "file", or a :class:`chiltepin.serialization.Serializer`. If None, Parsl's
+        serialization is used. See :mod:`chiltepin.serialization`.
+
+    result_store: str | ResultStore | None
+        Directory or :class:`chiltepin.store.ResultStore` in which to store large
+        results. The future of the task then resolves to a
+        :class:`chiltepin.store.Proxy` for the result, which python tasks receive as
+        the result itself. See :mod:`chiltepin.store`.
+
 
     Returns
     -------
@@ -133,16 +337,55 @@ def python_task(function: Callable) -> Callable:
 
     """
 
-    def function_wrapper(
-        *args,
-        executor="all",
-        **kwargs,
-    ):
-        return python_app(_create_filtered_wrapper(function), executors=executor)(
-            *args, **kwargs
-        )
-
-    return MethodWrapper(function, function_wrapper)
+    def decorator(function: Callable) -> Callable:
+        _check_parameters(function)
+        codec = serialization.get_serializer(serializer)
+        results = store.get_result_store(result_store)
+
+        def task_function() -> Callable:
+            run = store.resolve_arguments(_create_filtered_wrapper(function))
+            if results is not None:
+                run = results.wrap(run)
+            if codec is not None:
+                run = serialization.wrap(run, codec)
+            return run
+
+        def function_wrapper(
+            *args,
+            executor="all",
+            priority=None,
+            **kwargs,
+        ):
+            if "parsl_resource_specification" in kwargs:
+                _check_resource_spec(executor, kwargs["parsl_resource_specification"])
+            _add_priority(executor, priority, kwargs)
+            if codec is None:
+                return _submit(
+                    lambda: python_app(task_function(), executors=executor)(
+                        *args, **kwargs
+                    )
+                )
+
+            args, kwargs, releases = serialization.encode_arguments(args, kwargs, codec)
+            try:
+                task_future = _submit(
+                    lambda: python_app(task_function(), executors=executor)(
+                        *args, **kwargs
+                    )
+                )
+            except BaseException:
+                for release in releases:
+                    release()
+                raise
+            for release in releases:
+                task_future.add_done_callback(lambda _, release=release: release())
+            return serialization.DecodedFuture(task_future)
+
+        return MethodWrapper(function, function_wrapper)
+
+    if function is None:
+        return decorator
+    return decorator(function)
 
 
 def bash_task(function: Callable) -> Callable:
@@ -151,6 +394,16 @@ def bash_task(function: Callable) -> Callable:
     The decorator transforms the function into a Parsl bash_app but adds an executor
     argument such that the executor for the function can be chosen dynamically at runtime.
 
+    Calls of the task also accept a ``priority`` argument, a number where
+    lower values are dispatched to workers first.  Queued tasks with a
+    priority run before queued tasks without one, so urgent tasks do not
+    wait behind large numbers of routine ones.  Priorities order the tasks
+    that are ready to run on the same resource.  They are not supported on
+    MPI resources.  Transfer and deletion tasks take the same priorities
+    (see :func:`chiltepin.data.transfer_task`), while MPI and join tasks
+    raise a ValueError when given one.  Since calls of every task take the
+    ``priority`` argument, the function cannot have a parameter of that name.
+
     Parameters
     ----------
 
@@ -167,14 +420,21 @@ def bash_task(function: Callable) -> Callable:
     Callable
 
     """
+    _check_parameters(function)
 
     def function_wrapper(
         *args,
         executor="all",
+        priority=None,
         **kwargs,
     ):
-        return bash_app(_create_filtered_wrapper(function), executors=executor)(
-            *args, **kwargs
+        if "parsl_resource_specification" in kwargs:
+            _check_resource_spec(executor, kwargs["parsl_resource_specification"])
+        _add_priority(executor, priority, kwargs)
+        return _submit(
+            lambda: bash_app(_create_filtered_wrapper(function), executors=executor)(
+                *args, **kwargs
+            )
         )
 
     return MethodWrapper(function, function_wrapper)
@@ -187,6 +447,10 @@ def join_task(function: Callable) -> Callable:
     accomplishes the same thing.  This decorator is added to provide API consistency so that
     users can use @join_task rather than @join_app along with @python_task and @bash_task.
 
+    Join tasks run in the workflow itself rather than on a resource, so calls
+    given a ``priority`` raise a ValueError.  The function cannot have a
+    parameter named ``priority``.
+
     Parameters
     ----------
 
@@ -203,11 +467,330 @@ def join_task(function: Callable) -> Callable:
     Callable
 
     """
+    _check_parameters(function)
 
     def function_wrapper(
         *args,
+        priority=None,
         **kwargs,
     ):
+        _reject_priority("join", priority)
         return join_app(_create_filtered_wrapper(function))(*args, **kwargs)
 
     return MethodWrapper(function, function_wrapper)
+
+
+def mpi_task(
+    function: Optional[Callable] = None,
+    *,
+    num_nodes: int = 1,
+    ranks_per_node: int = 1,
+    launcher_options: Optional[str] = None,
+) -> Callable:
+    """Decorator function for making Chiltepin MPI tasks.
+
+    The decorated function returns the command line of an MPI application,
+    without a launcher.  The task launches it with the MPI launcher of the
+    resource (``srun`` or ``mpiexec``) on the requested number of nodes and
+    ranks, and its future resolves to the exit code, like a bash task.  A
+    non-zero exit code raises ``BashExitFailure``.
+
+    The decorator can be used bare (``@mpi_task``) or with arguments
+    (``@mpi_task(num_nodes=2, ranks_per_node=64)``).  The resource
+    specification can be overridden per call by passing a
+    ``parsl_resource_specification`` dictionary.  When a workflow is active,
+    the specification is checked against the configuration of the selected
+    resources when the task is submitted.  On resources that are not MPI
+    resources, tasks asking for one node and one rank per node run their
+    command without a launcher, which is useful for testing.  MPI resources
+    do not support task priorities, so calls given a ``priority`` raise a
+    ValueError, and the function cannot have a parameter of that name.
+
+    The time taken by the launcher to start the ranks is measured separately
+    from the time taken by the application, and both are recorded in the
+    metrics of the active workflow.  Ranks record their start time in a
+    marker file in the working directory of the task, so ranks on other nodes
+    are only counted if that directory is on a shared file system.
+
+    Parameters
+    ----------
+
+    function: Callable | None
+        The function to be decorated to yield an MPI workflow task. It must
+        return a string containing the command to launch. This function can be
+        a stand-alone function or a class method.
+
+    num_nodes: int
+        Number of nodes to launch the application on
+
+    ranks_per_node: int
+        Number of MPI ranks to launch on each node
+
+    launcher_options: str | None
+        Additional options passed to the MPI launcher
+
+
+    Returns
+    -------
+
+    Callable
+
+    """
+
+    def decorator(function: Callable) -> Callable:
+        _check_parameters(function)
+        command_function = _create_filtered_wrapper(function)
+
+        def run(*args, stdout=None, stderr=None, **kwargs):
+            return _launch_mpi(command_function(*args, **kwargs), stdout, stderr)
+
+        def resource_specification(
+            parsl_resource_specification: Optional[Dict[str, Any]] = None,
+        ) -> Dict[str, Any]:
+            """Return the resource specification of a call of the task"""
+            spec: Dict[str, Any] = {
+                "num_nodes": num_nodes,
+                "ranks_per_node": ranks_per_node,
+            }
+            if launcher_options is not None:
+                spec["launcher_options"] = launcher_options
+            spec.update(parsl_resource_specification or {})
+            # Count the ranks of the nodes actually asked for
+            spec.setdefault(
+                "num_ranks", int(spec["num_nodes"]) * int(spec["ranks_per_node"])
+            )
+            return spec
+
+        def function_wrapper(
+            *args,
+            executor="all",
+            parsl_resource_specification=None,
+            priority=None,
+            **kwargs,
+        ):
+            _reject_priority("MPI", priority)
+            spec = resource_specification(parsl_resource_specification)
+            if _check_mpi_spec(executor, spec):
+                kwargs["parsl_resource_specification"] = spec
+            recorder = metrics.current()
+            app_future = _submit(
+                lambda: python_app(run, executors=executor)(*args, **kwargs)
+            )
+            return _track_mpi(function.__name__, spec, app_future, recorder)
+
+        # Let schedulers such as MPIPacker size calls before submitting them
+        function_wrapper.resource_specification = resource_specification
+        return MethodWrapper(function, function_wrapper)
+
+    if function is None:
+        return decorator
+    return decorator(function)
+
+
+def _selected_resources(executor: Union[str, list]) -> Dict[str, Dict[str, Any]]:
+    """Return the configurations of the active resources a task may run on"""
+    resources = current_resources()
+    if resources is None:
+        return {}
+    labels = list(resources) if executor == "all" else executor
+    return {label: resources[label] for label in labels if label in resources}
+
+
+def _check_resource_spec(executor: Union[str, list], spec: Dict[str, Any]) -> None:
+    """Check a resource specification against the selected MPI resources
+
+    This catches tasks that ask for more nodes or ranks than a resource can
+    ever provide when they are submitted, instead of leaving them waiting in
+    the queue.
+    """
+    for label, config in _selected_resources(executor).items():
+        if config.get("mpi", False):
+            configure.check_resource_spec(label, config, spec)
+
+
+def _add_priority(
+    executor: Union[str, list], priority: Optional[float], kwargs: Dict[str, Any]
+) -> None:
+    """Add a task priority to the resource specification in the task's kwargs
+
+    High throughput executors, including those of Globus Compute endpoints,
+    queue tasks by the "priority" of their resource specification.  MPI
+    executors reject the key.
+    """
+    check_priority(priority)
+    if priority is None:
+        return
+    selected = _selected_resources(executor)
+    mpi = sorted(label for label, config in selected.items() if config.get("mpi"))
+    if mpi:
+        raise ValueError(f"Task priorities are not supported on MPI resources: {mpi}")
+    spec = dict(kwargs.get("parsl_resource_specification") or {})
+    spec["priority"] = priority
+    kwargs["parsl_resource_specification"] = spec
+
+
+def _reject_priority(kind: str, priority: Optional[float]) -> None:
+    """Raise if a task that cannot be prioritized is given a priority"""
+    if priority is not None:
+        raise ValueError(f"{kind} tasks do not support priorities")
+
+
+def _check_mpi_spec(executor: Union[str, list], spec: Dict[str, Any]) -> bool:
+    """Check an MPI resource specification against the selected resources
+
+    Returns whether the specification should be passed to the executors, which
+    is the case unless all selected resources are non-MPI resources.
+    """
+    selected = _selected_resources(executor)
+    mpi = [label for label, config in selected.items() if config.get("mpi", False)]
+    if mpi and len(mpi) < len(selected):
+        raise ValueError(
+            "MPI tasks cannot be submitted to both MPI and non-MPI resources: "
+            f"{sorted(selected)}"
+        )
+    if not mpi and selected:
+        if int(spec.get("num_nodes", 1)) > 1 or int(spec.get("ranks_per_node", 1)) > 1:
+            raise ValueError(
+                f"Resources {sorted(selected)} are not MPI resources and can only "
+                "run MPI tasks with one node and one rank per node"
+            )
+        return False
+    _check_resource_spec(executor, spec)
+    return True
+
+
+def _launch_mpi(
+    command: str,
+    stdout: Optional[Union[str, tuple]] = None,
+    stderr: Optional[Union[str, tuple]] = None,
+) -> Dict[str, Any]:
+    """Launch an MPI command and time how long the ranks took to start
+
+    This runs on the worker, where Parsl sets ``PARSL_MPI_PREFIX`` to the
+    launcher command for the task's resource specification.
+    """
+    import os
+    import shlex
+    import subprocess
+    import tempfile
+    import time
+
+    from parsl.utils import get_std_fname_mode
+
+    def open_stream(name, spec):
+        if spec is None:
+            return None
+        filename, mode = get_std_fname_mode(name, spec)
+        if os.path.dirname(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+        return open(filename, mode)
+
+    prefix = os.environ.get("PARSL_MPI_PREFIX", "")
+    fd, marker = tempfile.mkstemp(prefix=".chiltepin-mpi-", dir=os.getcwd())
+    os.close(fd)
+    # Every rank appends its start time to the marker before running the command
+    script = f"date +%s.%N >> {shlex.quote(marker)}\n{command}"
+    out = open_stream("stdout", stdout)
+    err = open_stream("stderr", stderr)
+    try:
+        start = time.time()
+        returncode = subprocess.call(
+            f"{prefix} /bin/bash -c {shlex.quote(script)}",
+            shell=True,
+            stdout=out,
+            stderr=err,
+        )
+        end = time.time()
+        with open(marker) as f:
+            starts = [float(line) for line in f if line.strip()]
+    finally:
+        os.remove(marker)
+        for stream in (out, err):
+            if stream is not None:
+                stream.close()
+    first = min(max(min(starts, default=end), start), end)
+    return {
+        "returncode": returncode,
+        "ranks_started": len(starts),
+        "launch": first - start,
+        "run": end - first,
+    }
+
+
+def _track_mpi(
+    name: str,
+    spec: Dict[str, Any],
+    app_future: Future,
+    recorder: Optional[metrics.WorkflowMetrics],
+) -> Future:
+    """Return a future for the exit code of an MPI task and record its timings"""
+    future = TaskFuture(app_future)
+
+    def done(f: Future) -> None:
+        exception = f.exception()
+        if exception is not None:
+            future.set_exception(exception)
+            return
+        report = dict(f.result())
+        report.update(
+            name=name,
+            num_nodes=int(spec.get("num_nodes", 1)),
+            num_ranks=int(spec.get("num_ranks", 1)),
+        )
+        if recorder is not None:
+            recorder.record_mpi(report)
+        if report["returncode"] != 0:
+            future.set_exception(BashExitFailure(name, report["returncode"]))
+        else:
+            future.set_result(report["returncode"])
+
+    app_future.add_done_callback(done)
+    return future
+
+
+def submit_bounded(
+    task: Callable[..., Future],
+    items: Iterable[Any],
+    max_outstanding: int,
+    **kwargs,
+) -> Iterator[Future]:
+    """Submit a task for each item, keeping a bounded number outstanding
+
+    Items are taken from ``items`` only when fewer than ``max_outstanding``
+    tasks are outstanding, so ``items`` can be a generator that produces a
+    very large number of items lazily.  Futures are yielded as their tasks
+    finish, so only the outstanding futures are kept in memory.
+
+    Parameters
+    ----------
+
+    task: Callable[..., Future]
+        The task to submit. It is called with each item followed by ``kwargs``.
+
+    items: Iterable[Any]
+        The items to submit tasks for
+
+    max_outstanding: int
+        Maximum number of tasks that are submitted but not yet yielded
+
+    **kwargs
+        Additional keyword arguments passed to every call of the task, such
+        as ``executor``.
+
+    Yields
+    ------
+
+    Future
+        The futures of the submitted tasks, in the order they finish
+    """
+    if max_outstanding < 1:
+        raise ValueError("max_outstanding must be at least 1")
+    outstanding: Set[Future] = set()
+    for item in items:
+        if len(outstanding) >= max_outstanding:
+            done, outstanding = wait(outstanding, return_when=FIRST_COMPLETED)
+            yield from done
+        outstanding.add(task(item, **kwargs))
+    while outstanding:
+        done, outstanding = wait(outstanding, return_when=FIRST_COMPLETED)
+        yield from done
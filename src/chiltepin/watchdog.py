@@ -0,0 +1,262 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Watchdog that keeps Globus Compute endpoints running.
+
+A dead endpoint is otherwise only noticed when the tasks of a workflow stop
+making progress.  :class:`EndpointWatchdog` checks a set of endpoints with
+cheap local probes and restarts the ones that failed::
+
+    $ chiltepin endpoint watch compute service --status-file status.json
+
+Each endpoint is probed through its ``daemon.pid`` file, which the endpoint
+refreshes while it runs, and the tail of its ``endpoint.log``.  An endpoint
+is
+
+- "running" if its process is alive and its PID file is fresh,
+- "unresponsive" if its process is alive but its PID file is stale,
+- "dead" if its PID file names a process that no longer exists, and
+- "stopped" if it has no PID file.
+
+Dead and unresponsive endpoints are restarted with
+:func:`chiltepin.endpoint.start` (unresponsive ones are stopped first).
+Stopped endpoints were usually stopped on purpose, so they are left alone
+unless ``restart_stopped`` is set.  Failed restarts are retried after an
+exponential backoff with random jitter, so that endpoints that fail together
+are not restarted in lockstep.  The state of every endpoint is written as
+JSON to the status file after each check.
+"""
+
+import json
+import os
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+import chiltepin.endpoint as endpoint
+
+# Words marking the log lines reported as the last error of an endpoint
+_ERROR_LEVELS = ("ERROR", "CRITICAL")
+
+
+def _last_error(log_path: Path, size: int = 16384) -> Optional[str]:
+    # Return the last error line in the tail of an endpoint log
+    try:
+        with open(log_path, "rb") as f:
+            f.seek(max(0, f.seek(0, os.SEEK_END) - size))
+            lines = f.read().decode(errors="replace").splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        if any(level in line for level in _ERROR_LEVELS):
+            return line.strip()
+    return None
+
+
+class EndpointWatchdog:
+    """Check endpoints and restart the ones that failed
+
+    Parameters
+    ----------
+
+    names: List[str]
+        Names of the endpoints to watch
+
+    config_dir: str | None
+        Path to endpoint configuration directory where endpoint information
+        is stored. If None (the default), then $HOME/.globus_compute is used
+
+    interval: float
+        Seconds between checks
+
+    status_file: str | None
+        File to write the state of the endpoints to as JSON after each check.
+        If None, the state is not written.
+
+    stale_after: float
+        Seconds after which the PID file of a running endpoint is stale
+
+    backoff: float
+        Seconds to wait before retrying a failed restart, doubled after each
+        consecutive failure
+
+    max_backoff: float
+        Maximum number of seconds between restart attempts
+
+    jitter: float
+        Fraction by which restart delays are randomly lengthened or shortened
+
+    start_timeout: float | None
+        Seconds to wait for a restarted endpoint to run
+
+    restart_stopped: bool
+        Whether to also start endpoints that are stopped, rather than only
+        the dead and unresponsive ones
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        config_dir: Optional[str] = None,
+        interval: float = 30.0,
+        status_file: Optional[str] = None,
+        stale_after: float = 600.0,
+        backoff: float = 10.0,
+        max_backoff: float = 600.0,
+        jitter: float = 0.5,
+        start_timeout: Optional[float] = 300.0,
+        restart_stopped: bool = False,
+    ):
+        self.names = list(names)
+        self.config_dir = config_dir
+        self.interval = interval
+        self.status_file = status_file
+        self.stale_after = stale_after
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.start_timeout = start_timeout
+        self.restart_stopped = restart_stopped
+        self.states: Dict[str, Dict[str, Any]] = {
+            name: {
+                "status": None,
+                "pid": None,
+                "restarts": 0,
+                "failures": 0,
+                "next_restart": None,
+                "last_error": None,
+                "checked": None,
+            }
+            for name in self.names
+        }
+
+    def _endpoint_dir(self, name: str) -> Path:
+        config_dir = (
+            Path(self.config_dir)
+            if self.config_dir
+            else Path.home() / ".globus_compute"
+        )
+        return config_dir / name
+
+    def probe(self, name: str) -> Dict[str, Any]:
+        """Probe an endpoint without contacting Globus Compute
+
+        Parameters
+        ----------
+
+        name: str
+            Name of the endpoint to probe
+
+        Returns
+        -------
+
+        Dict[str, Any]
+            The "status" and "pid" of the endpoint, and the "last_error" in
+            the tail of its log
+        """
+        endpoint_dir = self._endpoint_dir(name)
+        pid_path = endpoint_dir / "daemon.pid"
+        result = {"status": "stopped", "pid": None}
+        try:
+            result["pid"] = int(pid_path.read_text().strip())
+            age = time.time() - pid_path.stat().st_mtime
+        except (OSError, ValueError):
+            pass
+        else:
+            if not psutil.pid_exists(result["pid"]):
+                result["status"] = "dead"
+            elif age > self.stale_after:
+                result["status"] = "unresponsive"
+            else:
+                result["status"] = "running"
+        result["last_error"] = _last_error(endpoint_dir / "endpoint.log")
+        return result
+
+    def _delay(self, failures: int) -> float:
+        delay = min(self.max_backoff, self.backoff * 2 ** max(0, failures - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def restart(self, name: str, status: str) -> None:
+        """Restart an endpoint that is not running
+
+        Parameters
+        ----------
+
+        name: str
+            Name of the endpoint to restart
+
+        status: str
+            Status of the endpoint found by :meth:`probe`
+        """
+        if status == "unresponsive":
+            endpoint.stop(name, config_dir=self.config_dir, timeout=self.start_timeout)
+        elif status == "dead":
+            # The endpoint will not start while the PID file of the dead process exists
+            (self._endpoint_dir(name) / "daemon.pid").unlink(missing_ok=True)
+        endpoint.start(name, config_dir=self.config_dir, timeout=self.start_timeout)
+
+    def check(self) -> Dict[str, Dict[str, Any]]:
+        """Probe every endpoint once and restart the ones that are due
+
+        Returns
+        -------
+
+        Dict[str, Dict[str, Any]]
+            The state of each endpoint
+        """
+        for name in self.names:
+            state = self.states[name]
+            state.update(self.probe(name))
+            state["checked"] = time.time()
+            if state["status"] == "running" or (
+                state["status"] == "stopped" and not self.restart_stopped
+            ):
+                state["failures"] = 0
+                state["next_restart"] = None
+                continue
+            if (
+                state["next_restart"] is not None
+                and time.time() < state["next_restart"]
+            ):
+                continue
+            try:
+                self.restart(name, state["status"])
+            except Exception as e:
+                state["failures"] += 1
+                state["last_error"] = f"Restart failed: {e}"
+                state["next_restart"] = time.time() + self._delay(state["failures"])
+            else:
+                state["restarts"] += 1
+                state["failures"] = 0
+                state["next_restart"] = None
+                state.update(self.probe(name))
+        self.write_status()
+        return self.states
+
+    def write_status(self) -> None:
+        """Write the state of the endpoints to the status file"""
+        if self.status_file is None:
+            return
+        # Replace the file at once, so readers never see a partial status
+        partial = f"{self.status_file}.tmp"
+        with open(partial, "w") as f:
+            json.dump({"updated": time.time(), "endpoints": self.states}, f, indent=2)
+        os.replace(partial, self.status_file)
+
+    def run(self, checks: Optional[int] = None) -> None:
+        """Check the endpoints every ``interval`` seconds
+
+        Parameters
+        ----------
+
+        checks: int | None
+            Number of checks to run. If None, checks run until interrupted.
+        """
+        count = 0
+        while checks is None or count < checks:
+            self.check()
+            count += 1
+            if checks is None or count < checks:
+                time.sleep(self.interval)
@@ -15,6 +15,13 @@ from typing import Any, Dict, List, Optional, Union
 import parsl
 from globus_compute_sdk import Client
 
+import chiltepin.critical_path
+import chiltepin.dashboard
+import chiltepin.data
+import chiltepin.endpoint
+import chiltepin.metrics
+import chiltepin.scaling
+import chiltepin.tasks
 from chiltepin import configure
 
 # Module-level logger for cleanup warnings
@@ -30,6 +37,14 @@ def run_workflow(
     client: Optional[Client] = None,
     log_file: Optional[str] = None,
     log_level: Optional[int] = None,
+    metrics: Optional[chiltepin.metrics.WorkflowMetrics] = None,
+    max_transfers: Optional[int] = None,
+    max_transfers_per_pair: Optional[int] = None,
+    max_outstanding: Optional[int] = None,
+    transfer_timeout: Optional[float] = 3600.0,
+    critical_path: bool = False,
+    dashboard_port: Optional[int] = None,
+    check_endpoints: bool = False,
 ):
     """Context manager for Chiltepin workflows.
 
@@ -53,6 +68,52 @@ def run_workflow(
         Path to Parsl log file. If None, no file logging is configured.
     log_level : int, optional
         Logging level (e.g., logging.DEBUG). Only used if log_file is provided.
+    metrics : chiltepin.metrics.WorkflowMetrics, optional
+        Object in which to record workflow metrics, such as transfer
+        telemetry. If None, a new one is created. Pass your own to inspect
+        the metrics after the workflow exits. A summary is logged at INFO
+        level when the workflow exits.
+    max_transfers : int, optional
+        Maximum number of transfer and deletion tasks that may run at the
+        same time. Additional tasks wait in a priority queue (see the
+        ``priority`` argument of :func:`chiltepin.data.transfer_task`).
+        If None, the number is not limited.
+    max_transfers_per_pair : int, optional
+        Maximum number of transfer and deletion tasks that may run at the
+        same time between the same pair of endpoints. If None, the number
+        is not limited.
+    max_outstanding : int, optional
+        Maximum number of python and bash tasks that may be outstanding
+        (submitted but not finished) at the same time. When the limit is
+        reached, submitting another task from the thread that entered the
+        workflow blocks until an earlier task finishes. This bounds the
+        memory used by huge task graphs. If None, the number is not limited.
+    transfer_timeout : float, optional
+        Maximum number of seconds to wait, when the workflow exits, for the
+        next of its queued and running transfer and deletion tasks to finish.
+        If none finishes for that long, the tasks that have not been started
+        are canceled. If None, wait until all of them are done. Tasks that
+        have not been started are always canceled if the workflow exits with
+        an exception. Transfer and deletion tasks are only queued, and waited
+        for, when ``max_transfers``, ``max_transfers_per_pair`` or
+        ``max_outstanding`` is set.
+    critical_path : bool, optional
+        Whether to analyze the critical path of the workflow when it exits.
+        The analysis is logged with the metrics summary and recorded in
+        ``metrics`` (see :mod:`chiltepin.critical_path`). Finished tasks are
+        then kept until the workflow exits, with their arguments and results.
+    dashboard_port : int, optional
+        Port on which to serve a live dashboard of the workflow on the
+        loopback interface, or 0 for a free port (see
+        :mod:`chiltepin.dashboard`). Its URL is logged at INFO level. If
+        None, no dashboard is served.
+    check_endpoints : bool, optional
+        Whether to render the endpoint template for each Globus Compute
+        resource before loading the resources, so that invalid resource
+        configurations fail before any task is submitted (see
+        :func:`chiltepin.endpoint.render_template`). Endpoints configured
+        with a different template than Chiltepin's may accept configurations
+        that this check rejects.
 
     Yields
     ------
@@ -106,10 +167,57 @@ def run_workflow(
         level = log_level if log_level is not None else log_module.INFO
         logger_handler = parsl.set_file_logger(filename=log_file, level=level)
 
-    # Initialize dfk to None before attempting to load
+    # Initialize dfk, the transfer scheduler, the scaling policy and the
+    # dashboard to None before attempting to load
     dfk = None
+    scheduler = None
+    policy = None
+    dashboard = None
+
+    # Collect metrics for the tasks submitted in this workflow
+    if metrics is None:
+        metrics = chiltepin.metrics.WorkflowMetrics()
 
     try:
+        # Bound the number of outstanding tasks, if requested
+        window = (
+            chiltepin.tasks.SubmissionWindow(max_outstanding)
+            if max_outstanding is not None
+            else None
+        )
+
+        # Schedule the transfer tasks submitted in this workflow, if it is
+        # limited in any way, otherwise they are submitted right away
+        if any(
+            limit is not None
+            for limit in (max_transfers, max_transfers_per_pair, max_outstanding)
+        ):
+            scheduler = chiltepin.data.TransferScheduler(
+                max_in_flight=max_transfers,
+                max_per_pair=max_transfers_per_pair,
+            )
+
+        # Remember the loaded resources so tasks can be checked against them
+        resources = {"local": configure.normalize(config_dict.get("local", {}))}
+        resources.update(
+            {
+                label: configure.normalize(resource_config)
+                for label, resource_config in configure.resource_configs(
+                    config_dict
+                ).items()
+                if include is None or label in include
+            }
+        )
+
+        # Check the endpoint configurations of Globus Compute resources up front
+        for label in resources if check_endpoints else []:
+            resource_config = config_dict.get(label, {})
+            if resource_config.get("endpoint"):
+                try:
+                    chiltepin.endpoint.render_template(resource_config)
+                except ValueError as e:
+                    raise ValueError(f"Resource '{label}': {e}") from None
+
         # Load configuration
         parsl_config = configure.load(
             config_dict,
@@ -118,9 +226,30 @@ def run_workflow(
             run_dir=run_dir,
         )
 
+        # Keep the records of finished tasks for the critical path analysis
+        if critical_path:
+            parsl_config.garbage_collect = False
+
         # Load Parsl with the configuration
         dfk = parsl.load(parsl_config)
 
+        # Apply the per-resource scaling rules on top of Parsl's strategy
+        policy = chiltepin.scaling.ScalingPolicy(
+            dfk.executors, resources, period=parsl_config.strategy_period
+        )
+        policy.start()
+
+        chiltepin.metrics.activate(metrics)
+        chiltepin.data.activate_scheduler(scheduler)
+        chiltepin.tasks.activate_window(window)
+        chiltepin.tasks.activate_resources(resources)
+        chiltepin.scaling.activate_policy(policy)
+
+        if dashboard_port is not None:
+            dashboard = chiltepin.dashboard.Dashboard(
+                metrics, dashboard_port, dfk=dfk, scheduler=scheduler
+            )
+            dashboard.start()
         yield
     finally:
         # Check if we're cleaning up during exception handling
@@ -129,6 +258,21 @@ def run_workflow(
         cleanup_exception = None
         cleanup_tb = None  # Preserve original traceback
 
+        # Submit the remaining queued transfers, or drop them if the workflow failed
+        chiltepin.data.activate_scheduler(None)
+        if scheduler is not None:
+            done = scheduler.shutdown(wait=not user_exception, timeout=transfer_timeout)
+            if not done and not user_exception:
+                _logger.warning(
+                    f"No transfer finished for {transfer_timeout} seconds, "
+                    "canceled the transfers that had not started"
+                )
+        chiltepin.tasks.activate_window(None)
+        chiltepin.tasks.activate_resources(None)
+        chiltepin.scaling.activate_policy(None)
+        if policy is not None:
+            policy.stop()
+
         # Attempt all cleanup operations, catching exceptions
         if dfk is not None:
             try:
@@ -143,6 +287,26 @@ def run_workflow(
                     cleanup_exception = e
                     cleanup_tb = sys.exc_info()[2]
 
+        # Analyze the task graph of the finished workflow
+        if critical_path and dfk is not None:
+            try:
+                metrics.record_critical_path(
+                    chiltepin.critical_path.CriticalPath.from_task_records(
+                        dfk.tasks.values()
+                    )
+                )
+            except Exception:
+                _logger.warning("Critical path analysis failed", exc_info=True)
+
+        if dashboard is not None:
+            dashboard.stop()
+
+        # Stop recording metrics and summarize them
+        chiltepin.metrics.activate(None)
+        summary = metrics.summary()
+        if summary:
+            _logger.info(summary)
+
         # Always call parsl.clear()
         try:
             parsl.clear()
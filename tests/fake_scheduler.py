@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+
+"""Fake Slurm and PBS Pro commands for testing batch providers offline.
+
+The script behaves like sbatch, squeue, sacct, scancel, qsub, qstat or qdel
+depending on the name it is invoked as.  Use :func:`install` to create those
+commands in a directory, and put the directory at the front of PATH.  The
+state of the fake scheduler lives in the directory named by the
+FAKE_SCHEDULER_DIR environment variable:
+
+- ``queues.json`` maps each partition or queue to the seconds until a new job
+  would start there ("start") and the number of jobs waiting in it ("queued").
+  Other partitions and queues do not exist.
+- ``submitted.jsonl`` records each submitted job with its partition or queue.
+"""
+
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+COMMANDS = ("sbatch", "squeue", "sacct", "scancel", "qsub", "qstat", "qdel")
+
+
+def install(directory, queues):
+    """Create the fake scheduler commands and state in a directory
+
+    Parameters
+    ----------
+
+    directory: pathlib.Path
+        Directory in which to create the commands and state files
+
+    queues: Dict[str, Dict[str, float]]
+        The "start" and "queued" values of each partition or queue
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    for command in COMMANDS:
+        path = directory / command
+        if not path.exists():
+            path.symlink_to(os.path.abspath(__file__))
+    os.chmod(os.path.abspath(__file__), 0o755)
+    (directory / "queues.json").write_text(json.dumps(queues))
+
+
+def submitted(directory):
+    """Return the jobs submitted to the fake scheduler in a directory"""
+    path = directory / "submitted.jsonl"
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def _submit(state, queue):
+    """Record a submitted job and return its id"""
+    path = os.path.join(state, "submitted.jsonl")
+    count = 0
+    if os.path.exists(path):
+        with open(path) as f:
+            count = len(f.readlines())
+    job_id = str(1000 + count)
+    with open(path, "a") as f:
+        f.write(json.dumps({"job_id": job_id, "queue": queue}) + "\n")
+    return job_id
+
+
+def main(command, args):
+    state = os.environ["FAKE_SCHEDULER_DIR"]
+    with open(os.path.join(state, "queues.json")) as f:
+        queues = json.load(f)
+    options = dict(re.findall(r"--([\w-]+)=(\S+)", " ".join(args)))
+
+    if command == "sbatch":
+        if "--test-only" in args:
+            partition = options.get("partition")
+            if partition not in queues:
+                print("sbatch: error: invalid partition specified", file=sys.stderr)
+                return 1
+            start = datetime.now() + timedelta(seconds=queues[partition]["start"])
+            print(
+                f"sbatch: Job 999 to start at {start.strftime('%Y-%m-%dT%H:%M:%S')} "
+                f"using 1 processors on nodes n1 in partition {partition}",
+                file=sys.stderr,
+            )
+            return 0
+        with open(args[-1]) as f:
+            match = re.search(r"#SBATCH --partition=(\S+)", f.read())
+        print(f"Submitted batch job {_submit(state, match and match.group(1))}")
+        return 0
+    if command == "qsub":
+        queue = args[args.index("-q") + 1] if "-q" in args else None
+        print(f"{_submit(state, queue)}.fake")
+        return 0
+    if command == "qstat" and "-Q" in args:
+        name = args[args.index("-Q") + 1]
+        if name not in queues:
+            print(f"qstat: Unknown queue {name}", file=sys.stderr)
+            return 1
+        print("Queue   Max Tot Ena Str Que Run Hld Wat Trn Ext Type")
+        queued = queues[name]["queued"]
+        print(f"{name} 0 {queued} yes yes {queued} 0 0 0 0 0 Exec")
+        return 0
+    if command == "qstat":
+        print(json.dumps({"Jobs": {}}))
+        return 0
+    # Accounting is disabled, and no job status is known
+    return 1 if command == "sacct" else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(os.path.basename(sys.argv[0]), sys.argv[1:]))
@@ -0,0 +1,420 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for chiltepin.backends module.
+
+These tests exercise the transfer backend interface and the polling logic in
+chiltepin.data using the simulated local backend and a mocked Globus client,
+so they run without credentials or a network.
+"""
+
+import logging
+import pathlib
+from unittest import mock
+
+import pytest
+
+import chiltepin.data as data
+from chiltepin import run_workflow
+from chiltepin.backends import (
+    ACTIVE,
+    FAILED,
+    SUCCEEDED,
+    GlobusTransferBackend,
+    LocalTransferBackend,
+    TransferBackend,
+)
+from chiltepin.metrics import WorkflowMetrics
+
+
+class FakeClock:
+    """Manually advanced clock for driving the simulated backend."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def endpoints(tmp_path):
+    """Create source and destination endpoint directories."""
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    src.mkdir()
+    dst.mkdir()
+    (src / "a.dat").write_bytes(b"x" * 1000)
+    (src / "tree").mkdir()
+    (src / "tree" / "b.dat").write_bytes(b"y" * 500)
+    (src / "tree" / "c.dat").write_bytes(b"z" * 500)
+    return {"src": str(src), "dst": str(dst)}
+
+
+class TestLocalTransferBackend:
+    """Test the simulated local transfer backend."""
+
+    def test_is_transfer_backend(self, endpoints):
+        """Test that the local backend satisfies the backend protocol."""
+        assert isinstance(LocalTransferBackend(endpoints), TransferBackend)
+
+    def test_resolve_endpoint(self, endpoints):
+        """Test endpoint name resolution."""
+        backend = LocalTransferBackend(endpoints)
+        assert backend.resolve_endpoint("src") == "src"
+        assert backend.resolve_endpoint("nowhere") is None
+        assert LocalTransferBackend().resolve_endpoint("anything") == "anything"
+
+    def test_invalid_settings(self):
+        """Test that bad bandwidth and latency values are rejected."""
+        with pytest.raises(ValueError, match="bandwidth"):
+            LocalTransferBackend(bandwidth=0)
+        with pytest.raises(ValueError, match="latency"):
+            LocalTransferBackend(latency=-1)
+
+    def test_transfer_progress(self, endpoints):
+        """Test that progress follows the configured latency and bandwidth."""
+        clock = FakeClock()
+        backend = LocalTransferBackend(
+            endpoints, bandwidth=100, latency=2.0, clock=clock
+        )
+        task_id = backend.submit_transfer("src", "dst", [("a.dat", "a.dat")])
+
+        status = backend.poll(task_id)
+        assert status["status"] == ACTIVE
+        assert status["bytes_transferred"] == 0
+
+        clock.now = 7.0
+        status = backend.poll(task_id)
+        assert status["status"] == ACTIVE
+        assert status["bytes_transferred"] == 500
+        assert status["files_transferred"] == 0
+        assert not (pathlib.Path(endpoints["dst"]) / "a.dat").exists()
+
+        clock.now = 12.0
+        status = backend.poll(task_id)
+        assert status == {
+            "status": SUCCEEDED,
+            "bytes_transferred": 1000,
+            "files_transferred": 1,
+            "faults": 0,
+        }
+        assert (pathlib.Path(endpoints["dst"]) / "a.dat").read_bytes() == b"x" * 1000
+
+    def test_recursive_transfer(self, endpoints):
+        """Test a recursive directory transfer with several items."""
+        clock = FakeClock()
+        backend = LocalTransferBackend(endpoints, bandwidth=100, clock=clock)
+        task_id = backend.submit_transfer(
+            "src", "dst", [("tree", "copy"), ("a.dat", "a.dat")], recursive=True
+        )
+
+        clock.now = 6.0
+        assert backend.poll(task_id)["files_transferred"] == 1
+
+        clock.now = 20.0
+        status = backend.poll(task_id)
+        assert status["status"] == SUCCEEDED
+        assert status["files_transferred"] == 3
+        dst = pathlib.Path(endpoints["dst"])
+        assert (dst / "copy" / "b.dat").exists()
+        assert (dst / "copy" / "c.dat").exists()
+        assert (dst / "a.dat").exists()
+
+    def test_directory_without_recursive_fails(self, endpoints):
+        """Test that a non-recursive directory transfer fails."""
+        backend = LocalTransferBackend(endpoints)
+        task_id = backend.submit_transfer("src", "dst", [("tree", "tree")])
+        status = backend.poll(task_id)
+        assert status["status"] == FAILED
+        assert status["faults"] == 1
+
+    def test_missing_source_fails(self, endpoints):
+        """Test that a transfer of a missing file fails."""
+        backend = LocalTransferBackend(endpoints)
+        task_id = backend.submit_transfer("src", "dst", [("missing", "missing")])
+        assert backend.poll(task_id)["status"] == FAILED
+
+    def test_delete(self, endpoints):
+        """Test deleting files and directories."""
+        backend = LocalTransferBackend(endpoints)
+        src = pathlib.Path(endpoints["src"])
+
+        task_id = backend.submit_delete("src", ["tree"])
+        assert backend.poll(task_id)["status"] == FAILED
+        assert (src / "tree").exists()
+
+        task_id = backend.submit_delete("src", ["tree", "a.dat"], recursive=True)
+        assert backend.poll(task_id)["status"] == SUCCEEDED
+        assert not (src / "tree").exists()
+        assert not (src / "a.dat").exists()
+
+    def test_absolute_paths(self, endpoints):
+        """Test that paths are used as they are without an endpoint mapping."""
+        src = pathlib.Path(endpoints["src"]) / "a.dat"
+        dst = pathlib.Path(endpoints["dst"]) / "copy.dat"
+        backend = LocalTransferBackend()
+        task_id = backend.submit_transfer("here", "there", [(str(src), str(dst))])
+        assert backend.poll(task_id)["status"] == SUCCEEDED
+        assert dst.read_bytes() == src.read_bytes()
+
+    def test_cancel(self, endpoints):
+        """Test canceling an active task."""
+        clock = FakeClock()
+        backend = LocalTransferBackend(endpoints, latency=10.0, clock=clock)
+        task_id = backend.submit_transfer("src", "dst", [("a.dat", "a.dat")])
+        backend.cancel(task_id)
+        clock.now = 20.0
+        assert backend.poll(task_id)["status"] == FAILED
+        assert not (pathlib.Path(endpoints["dst"]) / "a.dat").exists()
+
+
+class TestDataWithLocalBackend:
+    """Test chiltepin.data functions against the simulated backend."""
+
+    def test_transfer_and_delete(self, endpoints):
+        """Test a synchronous transfer followed by a deletion."""
+        backend = LocalTransferBackend(endpoints, bandwidth=1e6, latency=0.05)
+        assert data.transfer(
+            "src", "dst", "a.dat", "a.dat", polling_interval=0.01, backend=backend
+        )
+        assert (pathlib.Path(endpoints["dst"]) / "a.dat").exists()
+
+        assert data.delete("dst", "a.dat", polling_interval=0.01, backend=backend)
+        assert not (pathlib.Path(endpoints["dst"]) / "a.dat").exists()
+
+    def test_transfer_timeout(self, endpoints):
+        """Test that a transfer that does not finish in time returns False."""
+        backend = LocalTransferBackend(endpoints, latency=60.0)
+        assert not data.transfer(
+            "src",
+            "dst",
+            "a.dat",
+            "a.dat",
+            timeout=0.05,
+            polling_interval=0.01,
+            backend=backend,
+        )
+
+    def test_transfer_failure(self, endpoints):
+        """Test that a failed transfer returns False."""
+        backend = LocalTransferBackend(endpoints)
+        assert not data.transfer(
+            "src", "dst", "missing", "missing", polling_interval=0.01, backend=backend
+        )
+
+    def test_progress_reports(self, endpoints):
+        """Test that progress callbacks receive telemetry after every poll."""
+        backend = LocalTransferBackend(endpoints, bandwidth=20000, latency=0.01)
+        reports = []
+        assert data.transfer(
+            "src",
+            "dst",
+            "a.dat",
+            "a.dat",
+            polling_interval=0.01,
+            backend=backend,
+            progress=reports.append,
+        )
+        assert len(reports) > 1
+        assert reports[0]["status"] == ACTIVE
+        final = reports[-1]
+        assert final["status"] == SUCCEEDED
+        assert final["bytes_transferred"] == 1000
+        assert final["files_transferred"] == 1
+        assert final["faults"] == 0
+        assert final["rate"] > 0
+        assert final["elapsed"] >= 0.05
+        assert all(r["task_id"] == final["task_id"] for r in reports)
+
+    def test_bad_endpoints(self, endpoints):
+        """Test that unknown endpoint names raise errors."""
+        backend = LocalTransferBackend(endpoints)
+        with pytest.raises(RuntimeError, match="Source endpoint 'nowhere'"):
+            data.transfer("nowhere", "dst", "a.dat", "a.dat", backend=backend)
+        with pytest.raises(RuntimeError, match="Destination endpoint 'nowhere'"):
+            data.transfer("src", "nowhere", "a.dat", "a.dat", backend=backend)
+        with pytest.raises(RuntimeError, match="Source endpoint 'nowhere'"):
+            data.delete("nowhere", "a.dat", backend=backend)
+
+    def test_transfer_task(self, endpoints, tmp_path):
+        """Test transfer_task and delete_task in a workflow."""
+        backend = LocalTransferBackend(endpoints, bandwidth=1e6)
+        metrics = WorkflowMetrics()
+        with run_workflow(
+            {},
+            run_dir=str(tmp_path / "runinfo"),
+            log_file=str(tmp_path / "parsl.log"),
+            log_level=logging.DEBUG,
+            metrics=metrics,
+        ):
+            stage = data.transfer_task(
+                "src",
+                "dst",
+                "tree",
+                "tree",
+                polling_interval=0.01,
+                recursive=True,
+                backend=backend,
+                executor=["local"],
+            )
+            assert stage.result() is True
+            cleanup = data.delete_task(
+                "dst",
+                "tree",
+                polling_interval=0.01,
+                backend=backend,
+                executor=["local"],
+                inputs=[stage],
+            )
+            assert cleanup.result() is True
+        assert not (pathlib.Path(endpoints["dst"]) / "tree").exists()
+
+        # The final reports of both tasks are recorded in the workflow metrics
+        transfer, delete = metrics.transfers
+        assert transfer["kind"] == "transfer"
+        assert transfer["bytes_transferred"] == 1000
+        assert transfer["files_transferred"] == 2
+        assert delete["kind"] == "delete"
+        assert delete["dst_ep"] is None
+
+    def test_invalid_priority(self, endpoints):
+        """Test that invalid priorities are rejected without a scheduler."""
+        backend = LocalTransferBackend(endpoints)
+        assert data.current_scheduler() is None
+        with pytest.raises(ValueError, match="must be a number, not 'high'"):
+            data.transfer_task(
+                "src", "dst", "a.dat", "a.dat", backend=backend, priority="high"
+            )
+        with pytest.raises(ValueError, match="must be a number, not 'high'"):
+            data.delete_task("src", "a.dat", backend=backend, priority="high")
+
+    def test_transfer_task_error(self, endpoints, tmp_path):
+        """Test that transfer_task futures propagate task exceptions."""
+        backend = LocalTransferBackend(endpoints)
+        with run_workflow({}, run_dir=str(tmp_path / "runinfo")):
+            future = data.transfer_task(
+                "nowhere", "dst", "a.dat", "a.dat", backend=backend, executor=["local"]
+            )
+            with pytest.raises(RuntimeError, match="Source endpoint 'nowhere'"):
+                future.result()
+
+
+class TestGlobusTransferBackend:
+    """Test the Globus backend with a mocked TransferClient."""
+
+    @pytest.fixture
+    def client(self):
+        client = mock.Mock()
+        client.endpoint_search.return_value = [
+            {"display_name": "other", "id": "id-0"},
+            {"display_name": "my-ep", "id": "id-1"},
+        ]
+        client.submit_transfer.return_value = {"task_id": "task-1"}
+        client.submit_delete.return_value = {"task_id": "task-2"}
+        return client
+
+    def test_login_when_no_client(self, client):
+        """Test that a client is obtained via login when none is given."""
+        with mock.patch(
+            "chiltepin.endpoint.login", return_value={"transfer": client}
+        ) as login:
+            backend = GlobusTransferBackend()
+        login.assert_called_once()
+        assert backend.client is client
+
+    def test_resolve_endpoint(self, client):
+        """Test resolving by display name and by id."""
+        backend = GlobusTransferBackend(client)
+        assert backend.resolve_endpoint("my-ep") == "id-1"
+        assert backend.resolve_endpoint("id-0") == "id-0"
+        assert backend.resolve_endpoint("missing") is None
+
+    def test_submit_transfer(self, client):
+        """Test that all items are added to the transfer request."""
+        backend = GlobusTransferBackend(client)
+        with mock.patch("globus_sdk.TransferData") as transfer_data:
+            task_id = backend.submit_transfer(
+                "id-0", "id-1", [("a", "b"), ("c", "d")], recursive=True
+            )
+        assert task_id == "task-1"
+        assert transfer_data.return_value.add_item.call_count == 2
+
+    def test_submit_delete(self, client):
+        """Test that all paths are added to the delete request."""
+        backend = GlobusTransferBackend(client)
+        with mock.patch("globus_sdk.DeleteData") as delete_data:
+            task_id = backend.submit_delete("id-0", ["a", "b"], recursive=True)
+        assert task_id == "task-2"
+        delete_data.assert_called_once_with(client, "id-0", recursive=True)
+        assert delete_data.return_value.add_item.call_count == 2
+
+    def test_poll(self, client):
+        """Test that task documents are translated into status dicts."""
+        client.get_task.return_value = {
+            "status": "ACTIVE",
+            "bytes_transferred": 10,
+            "files_transferred": None,
+            "faults": 0,
+        }
+        backend = GlobusTransferBackend(client)
+        assert backend.poll("task-1") == {
+            "status": ACTIVE,
+            "bytes_transferred": 10,
+            "files_transferred": 0,
+            "faults": 0,
+        }
+
+    def test_cancel(self, client):
+        """Test that cancel calls through to the client."""
+        GlobusTransferBackend(client).cancel("task-1")
+        client.cancel_task.assert_called_once_with("task-1")
+
+    @pytest.mark.parametrize(
+        "method, call",
+        [
+            ("get_task", lambda backend: backend.poll("task-1")),
+            (
+                "submit_transfer",
+                lambda backend: backend.submit_transfer("id-0", "id-1", [("a", "b")]),
+            ),
+            ("submit_delete", lambda backend: backend.submit_delete("id-0", ["a"])),
+        ],
+    )
+    def test_api_errors(self, client, method, call):
+        """Test that Globus API errors are translated to RuntimeErrors."""
+
+        class FakeAPIError(Exception):
+            def __init__(self, consent_required):
+                super().__init__("API Error")
+                self.info = mock.Mock(consent_required=consent_required)
+
+        backend = GlobusTransferBackend(client)
+        with (
+            mock.patch("globus_sdk.TransferAPIError", FakeAPIError),
+            mock.patch("globus_sdk.TransferData"),
+            mock.patch("globus_sdk.DeleteData"),
+        ):
+            getattr(client, method).side_effect = FakeAPIError(True)
+            with pytest.raises(RuntimeError, match="ConsentRequired"):
+                call(backend)
+            getattr(client, method).side_effect = FakeAPIError(False)
+            with pytest.raises(RuntimeError, match="API Error"):
+                call(backend)
+
+    def test_default_backend(self, client):
+        """Test that data functions use the Globus backend of the given client."""
+        client.get_task.return_value = {
+            "status": "SUCCEEDED",
+            "bytes_transferred": 3,
+            "files_transferred": 1,
+            "faults": 0,
+        }
+        with mock.patch("globus_sdk.TransferData"), mock.patch("globus_sdk.DeleteData"):
+            assert data.transfer(
+                "other", "my-ep", "a", "b", polling_interval=0.01, client=client
+            )
+            assert data.delete("my-ep", "b", polling_interval=0.01, client=client)
+        client.submit_transfer.assert_called_once()
+        client.submit_delete.assert_called_once()
+        client.get_task.assert_any_call("task-1")
+        client.get_task.assert_any_call("task-2")
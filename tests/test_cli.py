@@ -13,6 +13,7 @@ The tests validate:
 """
 
 import argparse
+import json
 import sys
 from unittest import mock
 
@@ -62,6 +63,80 @@ class TestCLIParsing:
             assert args["name"] == "test-ep"
             assert args["config_dir"] == "/custom/dir"
 
+    def test_endpoint_configure_keep_alive(self):
+        """Test parsing endpoint configure with keep-alive options."""
+        with mock.patch.object(
+            sys,
+            "argv",
+            [
+                "chiltepin",
+                "endpoint",
+                "configure",
+                "test-ep",
+                "--idle-heartbeats-soft",
+                "0",
+                "--heartbeat-period",
+                "10",
+            ],
+        ):
+            args = vars(cli.root_parser.parse_args())
+            assert args["idle_heartbeats_soft"] == 0
+            assert args["heartbeat_period"] == 10
+            # Options that are not given use the defaults of configure()
+            assert "idle_heartbeats_hard" not in args
+            assert "in_process" not in args
+
+    def test_endpoint_configure_in_process(self):
+        """Test parsing endpoint configure with --in-process."""
+        with mock.patch.object(
+            sys,
+            "argv",
+            ["chiltepin", "endpoint", "configure", "test-ep", "--in-process"],
+        ):
+            args = vars(cli.root_parser.parse_args())
+            assert args["in_process"] is True
+
+    def test_endpoint_cold_start_command(self):
+        """Test parsing the endpoint cold-start command."""
+        with mock.patch.object(
+            sys,
+            "argv",
+            [
+                "chiltepin",
+                "endpoint",
+                "cold-start",
+                "test-ep",
+                "-f",
+                "c.yaml",
+                "-r",
+                "gc",
+            ],
+        ):
+            args = vars(cli.root_parser.parse_args())
+            assert args["func"].__name__ == "cli_cold_start"
+            assert args["name"] == "test-ep"
+            assert args["config_file"] == "c.yaml"
+            assert args["resource"] == "gc"
+
+    def test_endpoint_watch_command(self):
+        """Test parsing the endpoint watch command."""
+        with mock.patch.object(
+            sys,
+            "argv",
+            ["chiltepin", "endpoint", "watch", "ep1", "ep2", "--interval", "5"],
+        ):
+            args = vars(cli.root_parser.parse_args())
+            assert args["func"].__name__ == "cli_watch"
+            assert args["names"] == ["ep1", "ep2"]
+            assert args["interval"] == 5.0
+            assert args["status_file"] is None
+            assert args["restart_stopped"] is False
+
+        with mock.patch.object(
+            sys, "argv", ["chiltepin", "endpoint", "watch", "ep1", "--restart-stopped"]
+        ):
+            assert cli.root_parser.parse_args().restart_stopped is True
+
     def test_endpoint_list_command(self):
         """Test parsing the endpoint list command."""
         with mock.patch.object(sys, "argv", ["chiltepin", "endpoint", "list"]):
@@ -70,6 +145,18 @@ class TestCLIParsing:
             assert args["func"].__name__ == "cli_list"
             assert args["config_dir"] is None
 
+    def test_endpoint_list_filters(self):
+        """Test parsing the endpoint list command with filters."""
+        with mock.patch.object(
+            sys,
+            "argv",
+            ["chiltepin", "endpoint", "list", "ep-*", "--status", "Running", "--json"],
+        ):
+            args = vars(cli.root_parser.parse_args())
+            assert args["pattern"] == "ep-*"
+            assert args["status"] == "Running"
+            assert args["output_format"] == "json"
+
     def test_endpoint_start_command(self):
         """Test parsing the endpoint start command."""
         with mock.patch.object(
@@ -111,6 +198,44 @@ class TestCLIParsing:
                 cli.root_parser.parse_args()
 
 
+class TestCLIColdStart:
+    """Test the cli_cold_start function with mocked endpoint.measure_cold_start()."""
+
+    @mock.patch("chiltepin.cli.endpoint.measure_cold_start")
+    def test_cold_start_with_resource(self, mock_measure, tmp_path, capsys):
+        """Test measuring with the configuration of a resource."""
+        config_file = tmp_path / "config.yaml"
+        config_file.write_text("gc:\n  endpoint: x\n  provider: slurm\n")
+        mock_measure.return_value = {
+            "first_task": 95.5,
+            "warm_task": 0.5,
+            "cold_start": 95.0,
+        }
+
+        cli.cli_cold_start("ep", config_file=str(config_file), resource="gc")
+
+        mock_measure.assert_called_once_with(
+            "ep", config={"endpoint": "x", "provider": "slurm"}, config_dir=None
+        )
+        assert "Cold start:    95.00s" in capsys.readouterr().out
+
+    def test_resource_requires_file(self, capsys):
+        """Test that a resource cannot be given without a file."""
+        with pytest.raises(SystemExit):
+            cli.cli_cold_start("ep", resource="gc")
+        assert "--resource requires --file" in capsys.readouterr().err
+
+    @mock.patch("chiltepin.cli.endpoint.measure_cold_start")
+    def test_file_requires_resource(self, mock_measure, tmp_path, capsys):
+        """Test that a file cannot be given without a resource."""
+        config_file = tmp_path / "config.yaml"
+        config_file.write_text("gc:\n  endpoint: x\n")
+        with pytest.raises(SystemExit):
+            cli.cli_cold_start("ep", config_file=str(config_file))
+        assert "--file requires --resource" in capsys.readouterr().err
+        mock_measure.assert_not_called()
+
+
 class TestCLIList:
     """Test the cli_list function with mocked endpoint.show()."""
 
@@ -179,7 +304,22 @@ class TestCLIList:
 
         cli.cli_list(config_dir="/custom/dir")
 
-        mock_show.assert_called_once_with(config_dir="/custom/dir")
+        mock_show.assert_called_once_with(
+            config_dir="/custom/dir", pattern="*", status=None, cache_ttl=None
+        )
+
+    @mock.patch("chiltepin.cli.endpoint.show")
+    def test_list_json(self, mock_show, capsys):
+        """Test listing endpoints as JSON."""
+        mock_ep_info = {"endpoint1": {"id": None, "status": "Initialized"}}
+        mock_show.return_value = mock_ep_info
+
+        cli.cli_list(pattern="end*", status="initialized", output_format="json")
+
+        mock_show.assert_called_once_with(
+            config_dir=None, pattern="end*", status="initialized", cache_ttl=None
+        )
+        assert json.loads(capsys.readouterr().out) == mock_ep_info
 
     @mock.patch("chiltepin.cli.endpoint.show")
     def test_list_formatting(self, mock_show, capsys):
@@ -208,6 +348,73 @@ class TestCLIList:
         long_id_pos = lines[1].index("87654321")
         assert short_id_pos == long_id_pos
 
+    @mock.patch("chiltepin.cli.endpoint.measure_cold_start")
+    def test_main_with_resource(self, mock_measure, tmp_path, capsys):
+        """Test measuring a resource of a configuration file from the command line."""
+        config_file = tmp_path / "config.yaml"
+        config_file.write_text("gc:\n  endpoint: x\n")
+        mock_measure.return_value = {
+            "first_task": 10.0,
+            "warm_task": 1.0,
+            "cold_start": 9.0,
+        }
+        argv = ["chiltepin", "endpoint", "cold-start", "ep"]
+        argv += ["--file", str(config_file), "--resource", "gc"]
+
+        with mock.patch.object(sys, "argv", argv):
+            cli.main()
+
+        mock_measure.assert_called_once_with(
+            "ep", config={"endpoint": "x"}, config_dir=None
+        )
+        assert "First task:    10.00s" in capsys.readouterr().out
+
+    @mock.patch("chiltepin.cli.endpoint.measure_cold_start")
+    def test_main_with_unknown_resource(self, mock_measure, tmp_path, capsys):
+        """Test that an unknown resource is reported as a usage error."""
+        config_file = tmp_path / "config.yaml"
+        config_file.write_text("gc:\n  endpoint: x\nhpc:\n  provider: slurm\n")
+        argv = ["chiltepin", "endpoint", "cold-start", "ep"]
+        argv += ["-f", str(config_file), "-r", "missing"]
+
+        with mock.patch.object(sys, "argv", argv):
+            with pytest.raises(SystemExit) as exc_info:
+                cli.main()
+
+        assert exc_info.value.code == 2
+        err = capsys.readouterr().err
+        assert "usage: chiltepin endpoint cold-start" in err
+        assert "resource 'missing' is not in" in err
+        assert "choose from ['gc', 'hpc']" in err
+        mock_measure.assert_not_called()
+
+
+class TestCLIWatch:
+    """Test the cli_watch function with a mocked EndpointWatchdog."""
+
+    @mock.patch("chiltepin.cli.watchdog.EndpointWatchdog")
+    def test_watch(self, mock_watchdog):
+        """Test that the watchdog runs with the given options."""
+        cli.cli_watch(["a", "b"], config_dir="/d", interval=5.0, status_file="s")
+
+        mock_watchdog.assert_called_once_with(
+            ["a", "b"],
+            config_dir="/d",
+            interval=5.0,
+            status_file="s",
+            restart_stopped=False,
+        )
+        mock_watchdog.return_value.run.assert_called_once_with()
+
+    @mock.patch("chiltepin.cli.watchdog.EndpointWatchdog")
+    def test_watch_interrupted(self, mock_watchdog):
+        """Test that the watchdog stops quietly on Ctrl-C."""
+        mock_watchdog.return_value.run.side_effect = KeyboardInterrupt
+
+        cli.cli_watch(["a"])
+
+        mock_watchdog.return_value.run.assert_called_once_with()
+
 
 class TestCLIMainSafely:
     """Test the main() function safely by mocking parse_args to avoid calling real functions.
@@ -281,7 +488,13 @@ class TestCLIIntegration:
             {
                 "argv": ["chiltepin", "endpoint", "list"],
                 "expected_func_name": "cli_list",
-                "expected_args": {"config_dir": None},
+                "expected_args": {
+                    "config_dir": None,
+                    "pattern": "*",
+                    "status": None,
+                    "output_format": "table",
+                    "cache_ttl": None,
+                },
             },
         ]
 
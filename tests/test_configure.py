@@ -7,6 +7,7 @@ Executors and Providers with correct parameters.
 """
 
 import pathlib
+import sys
 import tempfile
 from unittest import mock
 
@@ -348,6 +349,181 @@ class TestCreateMPIExecutor:
         assert executor.max_workers_per_block == 4
 
 
+class TestNormalize:
+    """Test normalize() function."""
+
+    def test_normalize_defaults(self):
+        """Test that defaults are filled in without modifying the input."""
+        config = {"max_workers_per_node": 2}
+        normalized = configure.normalize(config)
+        assert normalized == {
+            "max_workers_per_node": 2,
+            "mpi": False,
+            "provider": "localhost",
+            "nodes_per_block": 1,
+            "init_blocks": 0,
+            "min_blocks": 0,
+            "max_blocks": 1,
+            "parallelism": 1,
+            "environment": [],
+        }
+        assert config == {"max_workers_per_node": 2}
+
+    def test_normalize_mpi(self):
+        """Test the MPI defaults."""
+        normalized = configure.normalize({"mpi": True, "provider": "slurm"})
+        assert normalized["max_mpi_apps"] == 1
+        assert normalized["mpi_launcher"] == "srun"
+        normalized = configure.normalize({"mpi": True, "mpi_launcher": "aprun"})
+        assert normalized["mpi_launcher"] == "aprun"
+
+
+class TestCheckResourceSpec:
+    """Test check_resource_spec() function."""
+
+    def test_spec_fits(self):
+        """Test a specification that fits the resource."""
+        config = {"mpi": True, "nodes_per_block": 4, "cores_per_node": 8}
+        configure.check_resource_spec(
+            "mpi", config, {"num_nodes": 4, "ranks_per_node": 8, "num_ranks": 32}
+        )
+
+    def test_not_mpi_resource(self):
+        """Test that non-MPI resources are rejected."""
+        with pytest.raises(ValueError, match="not an MPI resource"):
+            configure.check_resource_spec("compute", {}, {"num_nodes": 1})
+
+    def test_too_many_nodes(self):
+        """Test a specification asking for more nodes than a block has."""
+        with pytest.raises(ValueError, match="needs 2 nodes .* only has 1"):
+            configure.check_resource_spec("mpi", {"mpi": True}, {"num_nodes": 2})
+
+    def test_too_many_ranks_per_node(self):
+        """Test a specification asking for more ranks than cores per node."""
+        config = {"mpi": True, "cores_per_node": 4}
+        with pytest.raises(ValueError, match="8 ranks per node"):
+            configure.check_resource_spec("mpi", config, {"ranks_per_node": 8})
+        # Without cores_per_node, ranks per node are not limited
+        configure.check_resource_spec("mpi", {"mpi": True}, {"ranks_per_node": 8})
+
+    def test_inconsistent_ranks(self):
+        """Test a specification asking for more ranks than nodes can hold."""
+        with pytest.raises(ValueError, match="needs 5 ranks"):
+            configure.check_resource_spec(
+                "mpi",
+                {"mpi": True},
+                {"num_nodes": 1, "ranks_per_node": 4, "num_ranks": 5},
+            )
+
+
+class TestStrategyOptions:
+    """Test configure.strategy_options() function."""
+
+    def test_no_scaling_options(self):
+        assert configure.strategy_options({"a": {}, "b": {"provider": "slurm"}}) == {}
+
+    def test_strategy_and_idletime(self):
+        resources = {
+            "a": {"strategy": "htex_auto_scale", "max_idletime": 30},
+            "b": {"strategy": "none", "max_idletime": 300},
+            "c": {},
+        }
+        assert configure.strategy_options(resources) == {
+            "strategy": "htex_auto_scale",
+            "max_idletime": 300.0,
+        }
+
+    def test_only_none(self):
+        assert configure.strategy_options({"a": {"strategy": "none"}}) == {
+            "strategy": "none"
+        }
+
+    def test_conflicting_strategies(self):
+        resources = {"a": {"strategy": "simple"}, "b": {"strategy": "htex_auto_scale"}}
+        with pytest.raises(ValueError, match="same scaling strategy"):
+            configure.strategy_options(resources)
+
+    def test_invalid_strategy(self):
+        with pytest.raises(ValueError, match="Invalid strategy 'fast'"):
+            configure.strategy_options({"a": {"strategy": "fast"}})
+
+
+class TestMonitoring:
+    """Test the monitoring block of configurations."""
+
+    @pytest.fixture
+    def hub(self):
+        with (
+            mock.patch.dict(sys.modules, {"sqlalchemy": mock.MagicMock()}),
+            mock.patch("chiltepin.configure.MonitoringHub") as hub,
+        ):
+            yield hub
+
+    def test_resource_configs(self):
+        """Test that settings are not resource configurations."""
+        config = {"monitoring": None, "compute": {"provider": "slurm"}}
+        assert configure.resource_configs(config) == {"compute": {"provider": "slurm"}}
+
+    def test_defaults(self, hub):
+        """Test that an empty block samples resources at a coarse interval."""
+        configure.create_monitoring_hub(None)
+        hub.assert_called_once_with(
+            workflow_name=None,
+            logging_endpoint=None,
+            resource_monitoring_enabled=True,
+            resource_monitoring_interval=configure.MONITORING_INTERVAL,
+        )
+
+    def test_database_path(self, hub, tmp_path):
+        """Test that database paths are made absolute and their directory created."""
+        database = tmp_path / "monitoring" / "workflow.db"
+        configure.create_monitoring_hub(
+            {
+                "database": str(database),
+                "resource_monitoring": False,
+                "resource_monitoring_interval": 5,
+                "workflow_name": "forecast",
+            }
+        )
+        hub.assert_called_once_with(
+            workflow_name="forecast",
+            logging_endpoint=f"sqlite:///{database}",
+            resource_monitoring_enabled=False,
+            resource_monitoring_interval=5.0,
+        )
+        assert database.parent.is_dir()
+
+    def test_database_url(self, hub):
+        """Test that database URLs are used as they are."""
+        configure.create_monitoring_hub({"database": "sqlite:////tmp/w.db"})
+        assert hub.call_args.kwargs["logging_endpoint"] == "sqlite:////tmp/w.db"
+
+    def test_requires_sqlalchemy(self):
+        """Test that monitoring without sqlalchemy raises ImportError."""
+        with mock.patch.dict(sys.modules, {"sqlalchemy": None}):
+            with pytest.raises(ImportError, match=r"chiltepin\[monitoring\]"):
+                configure.load({"monitoring": None})
+
+    def test_load(self, hub):
+        """Test that load enables monitoring and does not load it as a resource."""
+        config = configure.load(
+            {"monitoring": {"workflow_name": "forecast"}, "compute": {}}
+        )
+        assert config.monitoring is hub.return_value
+        assert [ex.label for ex in config.executors] == ["local", "compute"]
+
+    def test_load_without_monitoring(self):
+        """Test that monitoring is off without a monitoring block."""
+        assert configure.load({}).monitoring is None
+
+    def test_create_hub(self, tmp_path):
+        """Test creating a Parsl MonitoringHub."""
+        pytest.importorskip("sqlalchemy")
+        hub = configure.create_monitoring_hub({"database": str(tmp_path / "w.db")})
+        assert hub.logging_endpoint == f"sqlite:///{tmp_path / 'w.db'}"
+        assert hub.resource_monitoring_interval == configure.MONITORING_INTERVAL
+
+
 class TestCreateGlobusComputeExecutor:
     """Test create_globus_compute_executor() function."""
 
@@ -461,6 +637,42 @@ class TestCreateGlobusComputeExecutor:
         assert uec["mpi"] is False  # Default
         assert uec["mpi_launcher"] == "srun"  # Default for slurm
 
+    def test_globus_compute_executor_submit_options(self):
+        """Test GlobusComputeExecutor batching and rate limit options."""
+        config = {
+            "endpoint": "12345678-1234-5678-1234-567812345678",
+            "batch_size": 512,
+            "api_burst_limit": 8,
+            "api_burst_window_s": 4,
+            "amqp_port": 443,
+        }
+        executor = configure.create_globus_compute_executor(
+            "gc-batch", config, client=mock.Mock()
+        )
+
+        gce = executor.executor
+        assert type(gce) is configure.Executor
+        assert gce.batch_size == 512
+        assert gce.api_burst_limit == 8
+        assert gce.api_burst_window_s == 4
+        assert gce.amqp_port == 443
+        # Executor options are not passed to the endpoint
+        assert "batch_size" not in gce.user_endpoint_config
+
+
+class TestUserEndpointConfig:
+    """Test user_endpoint_config() function."""
+
+    def test_keep_alive_only_when_set(self):
+        """Test that keep-alive options are only sent when they are set."""
+        assert "idle_heartbeats_soft" not in configure.user_endpoint_config({})
+        uec = configure.user_endpoint_config(
+            {"idle_heartbeats_soft": 0, "heartbeat_period": 10}
+        )
+        assert uec["idle_heartbeats_soft"] == 0
+        assert uec["heartbeat_period"] == 10
+        assert "idle_heartbeats_hard" not in uec
+
 
 class TestCreateExecutor:
     """Test create_executor() dispatcher function."""
@@ -638,6 +850,51 @@ class TestLoad:
         ]
         assert len(gc_executors) == 1
 
+    def test_load_shares_client(self):
+        """Test that Globus Compute resources share one client."""
+        resources = {
+            "gc-a": {"endpoint": "99999999-8888-7777-6666-555555555555"},
+            "gc-b": {"endpoint": "11111111-2222-3333-4444-555555555555"},
+            "htex": {"provider": "localhost"},
+        }
+        with mock.patch("chiltepin.configure.Client") as client_class:
+            config = configure.load(resources)
+        client_class.assert_called_once_with()
+        clients = [
+            ex.executor.client
+            for ex in config.executors
+            if isinstance(ex, GlobusComputeExecutor)
+        ]
+        assert clients == [client_class.return_value] * 2
+
+    def test_load_shares_equivalent_endpoints(self):
+        """Test that resources using the same user endpoint share an executor."""
+        endpoint = "99999999-8888-7777-6666-555555555555"
+        resources = {
+            "gc-a": {"endpoint": endpoint, "partition": "compute"},
+            "gc-b": {"endpoint": endpoint, "partition": "compute", "cores_per_node": 1},
+            "gc-c": {"endpoint": endpoint, "partition": "debug"},
+            "gc-d": {"endpoint": endpoint, "partition": "compute", "batch_size": 8},
+        }
+        assert configure.shared_endpoints(resources) == {"gc-a": ["gc-a", "gc-b"]}
+
+        config = configure.load(resources, client=mock.Mock())
+        executors = {ex.label: ex for ex in config.executors}
+        assert executors["gc-b"].executor is executors["gc-a"].executor
+        assert executors["gc-c"].executor is not executors["gc-a"].executor
+        assert executors["gc-d"].executor is not executors["gc-a"].executor
+
+        # The shared executor is only shut down by the resource that created it
+        with mock.patch.object(executors["gc-a"].executor, "shutdown") as shutdown:
+            executors["gc-b"].shutdown()
+            shutdown.assert_not_called()
+
+    def test_load_without_endpoints_creates_no_client(self):
+        """Test that no client is created without Globus Compute resources."""
+        with mock.patch("chiltepin.configure.Client") as client_class:
+            configure.load({"htex": {"provider": "localhost"}})
+        client_class.assert_not_called()
+
     def test_load_overrides_default_local(self):
         """Test that user-defined 'local' resource overrides the default."""
         resources = {
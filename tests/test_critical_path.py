@@ -0,0 +1,202 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for chiltepin.critical_path module."""
+
+import json
+import logging
+from concurrent.futures import Future
+from unittest import mock
+
+import pytest
+
+import chiltepin.data as data
+import chiltepin.metrics as metrics
+from chiltepin import run_workflow
+from chiltepin.backends import LocalTransferBackend
+from chiltepin.critical_path import CriticalPath
+from chiltepin.futures import TaskFuture
+from chiltepin.tasks import join_task, python_task
+
+
+def make_tasks():
+    """Create a diamond of tasks: prep -> (forecast, diag) -> post."""
+    return {
+        0: {"name": "prep", "resource": "local", "submitted": 100.0, "finished": 102.0},
+        1: {
+            "name": "forecast",
+            "resource": "compute",
+            "submitted": 100.0,
+            "finished": 112.0,
+            "depends": [0],
+        },
+        2: {
+            "name": "diag",
+            "resource": "local",
+            "submitted": 100.0,
+            "finished": 105.0,
+            "depends": [0],
+        },
+        3: {
+            "name": "post",
+            "resource": "local",
+            "submitted": 100.0,
+            "finished": 113.0,
+            "depends": [1, 2],
+        },
+        # Never finished, so it is ignored
+        4: {"name": "lost", "resource": "local", "submitted": 100.0, "finished": None},
+    }
+
+
+class TestCriticalPath:
+    """Test CriticalPath with a synthetic task graph."""
+
+    def test_path_and_slack(self):
+        report = CriticalPath(make_tasks())
+        assert report.makespan == pytest.approx(13.0)
+        assert report.path == [0, 1, 3]
+        assert report.tasks[2]["slack"] == pytest.approx(7.0)
+        assert report.tasks[2]["critical"] is False
+        assert all(report.tasks[t]["slack"] == pytest.approx(0.0) for t in (0, 1, 3))
+        assert 4 not in report.tasks
+
+    def test_late_submission_starts_path(self):
+        tasks = make_tasks()
+        # Post was only submitted after both of its dependencies had finished
+        tasks[3].update(submitted=120.0, finished=121.0)
+        report = CriticalPath(tasks)
+        assert report.path == [3]
+        assert report.makespan == pytest.approx(21.0)
+
+    def test_resources(self):
+        resources = CriticalPath(make_tasks()).resources()
+        assert list(resources) == ["compute", "local"]
+        assert resources["compute"]["tasks"] == 1
+        assert resources["compute"]["duration"] == pytest.approx(10.0)
+        assert resources["local"]["fraction"] == pytest.approx(3.0 / 13.0)
+
+    def test_exports(self):
+        report = CriticalPath(make_tasks())
+        data = json.loads(report.to_json())
+        assert data["critical_path"] == [0, 1, 3]
+        assert data["tasks"]["2"]["slack"] == pytest.approx(7.0)
+        dot = report.to_dot()
+        assert dot.startswith("digraph workflow {")
+        assert "1 -> 3 [color=red, penwidth=2];" in dot
+        assert "0 -> 2;" in dot
+        summary = report.summary()
+        assert "Critical path: 3 of 4 tasks, 13.0s of the 13.0s makespan" in summary
+        assert "compute: 1 tasks, 10.0s (76.9% of the makespan)" in summary
+        assert "7.0s  diag (task 2) on local" in summary
+
+    def test_from_task_records(self, caplog):
+        app_future = Future()
+        app_future.tid = 0
+        records = [
+            {"id": 0, "func_name": "prep", "time_invoked": None, "time_returned": None},
+            {
+                "id": 1,
+                "func_name": "stage",
+                "depends": [TaskFuture(app_future), Future()],
+                "joins": None,
+            },
+        ]
+        with caplog.at_level(logging.WARNING, logger="chiltepin.critical_path"):
+            report = CriticalPath.from_task_records(records)
+        assert report.tasks == {}
+        assert "ignored 1 dependencies" in caplog.text
+
+    def test_empty(self):
+        report = CriticalPath({})
+        assert report.path == []
+        assert report.summary() == ""
+
+
+class TestWorkflowIntegration:
+    """Test the critical path analysis of run_workflow."""
+
+    def test_critical_path(self, tmp_path, caplog):
+        @python_task
+        def wait(seconds, *deps):
+            import time
+
+            time.sleep(seconds)
+            return seconds
+
+        @join_task
+        def chain():
+            return wait(0.5, wait(0.2, executor=["local"]), executor=["local"])
+
+        m = metrics.WorkflowMetrics()
+        with caplog.at_level(logging.INFO, logger="chiltepin.workflow"):
+            with run_workflow(
+                {}, run_dir=str(tmp_path / "runinfo"), metrics=m, critical_path=True
+            ):
+                short = wait(0.1, executor=["local"])
+                joined = chain()
+                wait(0.1, short, joined, executor=["local"]).result()
+
+        report = m.critical_path
+        names = [report.tasks[t]["name"] for t in report.path]
+        assert names == ["wait", "wait", "chain", "wait"]
+        assert report.tasks[short.tid]["critical"] is False
+        assert "Critical path: 4 of 5 tasks" in caplog.text
+
+    def test_transfer_and_serializer_tasks(self, tmp_path, caplog):
+        @python_task(serializer="file")
+        def size(path, *deps):
+            import os
+
+            return os.path.getsize(path)
+
+        @python_task
+        def double(value):
+            return 2 * value
+
+        (tmp_path / "data.txt").write_text("data")
+        backend = LocalTransferBackend(
+            {"src": str(tmp_path), "dst": str(tmp_path)}, latency=0.2
+        )
+        m = metrics.WorkflowMetrics()
+        with caplog.at_level(logging.WARNING, logger="chiltepin.critical_path"):
+            with run_workflow(
+                {}, run_dir=str(tmp_path / "runinfo"), metrics=m, critical_path=True
+            ):
+                copy = data.transfer_task(
+                    "src",
+                    "dst",
+                    "data.txt",
+                    "copy.txt",
+                    polling_interval=0.01,
+                    backend=backend,
+                    executor=["local"],
+                )
+                copied = size(str(tmp_path / "copy.txt"), copy, executor=["local"])
+                assert double(copied, executor=["local"]).result() == 8
+
+        report = m.critical_path
+        names = [report.tasks[t]["name"] for t in report.path]
+        assert names == ["_transfer_app", "size", "double"]
+        assert report.path[:2] == [copy.tid, copied.tid]
+        assert "ignored" not in caplog.text
+
+    def test_analysis_failure(self, tmp_path, caplog):
+        m = metrics.WorkflowMetrics()
+        with mock.patch.object(
+            CriticalPath, "from_task_records", side_effect=ValueError("cycle")
+        ):
+            with caplog.at_level(logging.WARNING, logger="chiltepin.workflow"):
+                with run_workflow(
+                    {}, run_dir=str(tmp_path / "runinfo"), metrics=m, critical_path=True
+                ):
+                    pass
+        # The failure is logged without failing the workflow
+        assert m.critical_path is None
+        assert "Critical path analysis failed" in caplog.text
+        assert "ValueError: cycle" in caplog.text
+
+    def test_disabled_by_default(self, tmp_path):
+        m = metrics.WorkflowMetrics()
+        with run_workflow({}, run_dir=str(tmp_path / "runinfo"), metrics=m):
+            pass
+        assert m.critical_path is None
@@ -0,0 +1,104 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for chiltepin.dashboard module."""
+
+import json
+import logging
+import re
+import urllib.error
+import urllib.request
+from concurrent.futures import Future
+from unittest import mock
+
+import pytest
+from parsl.dataflow.states import States
+
+import chiltepin.metrics as metrics
+from chiltepin import run_workflow
+from chiltepin.dashboard import Dashboard
+from chiltepin.data import TransferScheduler
+from chiltepin.tasks import python_task
+
+
+def get(url):
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return response.headers["Content-Type"], response.read().decode()
+
+
+class TestDashboard:
+    """Test the Dashboard server."""
+
+    def test_pages(self):
+        dashboard = Dashboard(metrics.WorkflowMetrics(), 0)
+        dashboard.start()
+        try:
+            content_type, page = get(dashboard.url)
+            assert content_type == "text/html"
+            assert "api/status" in page
+            content_type, body = get(dashboard.url + "api/status")
+            assert content_type == "application/json"
+            status = json.loads(body)
+            assert status["executors"] == {}
+            assert status["queued_transfers"] == 0
+            assert status["uptime"] >= 0
+            with pytest.raises(urllib.error.HTTPError):
+                get(dashboard.url + "missing")
+        finally:
+            dashboard.stop()
+
+    def test_outstanding_tasks(self):
+        dfk = mock.Mock()
+        dfk.tasks = {
+            0: {"executor": "local", "status": States.pending},
+            1: {"executor": "local", "status": States.launched},
+            2: {"executor": "local", "status": States.exec_done},
+        }
+        scheduler = TransferScheduler(max_in_flight=1)
+        scheduler.submit(Future, ("a", "b"))
+        scheduler.submit(Future, ("a", "b"))
+        dashboard = Dashboard(
+            metrics.WorkflowMetrics(), 0, dfk=dfk, scheduler=scheduler
+        )
+        try:
+            status = dashboard.status()
+        finally:
+            dashboard.stop()
+        assert status["executors"]["local"] == {
+            "pending": 1,
+            "running": 1,
+            "done": 0,
+            "failed": 0,
+        }
+        assert status["queued_transfers"] == 1
+
+
+class TestWorkflowIntegration:
+    """Test the dashboard of run_workflow."""
+
+    def test_dashboard(self, tmp_path, caplog):
+        @python_task
+        def succeed():
+            return True
+
+        @python_task
+        def fail():
+            raise RuntimeError("failed")
+
+        with caplog.at_level(logging.INFO, logger="chiltepin.dashboard"):
+            with run_workflow({}, run_dir=str(tmp_path / "runinfo"), dashboard_port=0):
+                url = re.search(r"Workflow dashboard at (\S+)", caplog.text).group(1)
+                succeed(executor=["local"]).result()
+                with pytest.raises(RuntimeError):
+                    fail(executor=["local"]).result()
+                status = json.loads(get(url + "api/status")[1])
+        assert status["executors"]["local"] == {
+            "pending": 0,
+            "running": 0,
+            "done": 1,
+            "failed": 1,
+        }
+        assert sum(count for _, count in status["throughput"]) == 2
+        assert {task["name"] for task in status["slowest"]} == {"succeed", "fail"}
+        # The dashboard stops with the workflow
+        with pytest.raises(urllib.error.URLError):
+            get(url)
@@ -2,7 +2,9 @@
 
 import logging
 import pathlib
+import threading
 import uuid
+from concurrent.futures import Future
 from unittest import mock
 
 import pytest
@@ -10,6 +12,8 @@ import pytest
 import chiltepin.data as data
 import chiltepin.endpoint as endpoint
 from chiltepin import run_workflow
+from chiltepin.backends import LocalTransferBackend
+from chiltepin.metrics import WorkflowMetrics
 
 
 # Set up fixture to initialize and cleanup Parsl
@@ -250,3 +254,260 @@ def test_data_delete_other_api_error(config):
                     polling_interval=10,
                     client=config["client"],
                 )
+
+
+class TestTransferScheduler:
+    """Test the TransferScheduler with plain futures standing in for tasks."""
+
+    @staticmethod
+    def make_task(started, name):
+        """Return a submit function that records its start and a future to finish it."""
+        task_future = Future()
+
+        def submit():
+            started.append(name)
+            return task_future
+
+        return submit, task_future
+
+    def test_invalid_limits(self):
+        with pytest.raises(ValueError, match="max_in_flight"):
+            data.TransferScheduler(max_in_flight=0)
+        with pytest.raises(ValueError, match="max_per_pair"):
+            data.TransferScheduler(max_per_pair=0)
+
+    def test_invalid_priority(self):
+        scheduler = data.TransferScheduler()
+        with pytest.raises(ValueError, match="must be a number, not 'critical'"):
+            scheduler.submit(lambda: Future(), ("a", "b"), priority="critical")
+
+    def test_unlimited(self):
+        started = []
+        scheduler = data.TransferScheduler()
+        tasks = [self.make_task(started, i) for i in range(5)]
+        futures = [scheduler.submit(submit, ("a", "b")) for submit, _ in tasks]
+        assert started == [0, 1, 2, 3, 4]
+        assert scheduler.in_flight == 5
+        for i, (_, task_future) in enumerate(tasks):
+            task_future.set_result(i)
+        assert [f.result() for f in futures] == [0, 1, 2, 3, 4]
+        assert scheduler.in_flight == 0
+
+    def test_priority_order(self):
+        started = []
+        scheduler = data.TransferScheduler(max_in_flight=1)
+        first, first_future = self.make_task(started, "first")
+        background, background_future = self.make_task(started, "background")
+        normal, normal_future = self.make_task(started, "normal")
+        critical, critical_future = self.make_task(started, "critical")
+        scheduler.submit(first, ("a", "b"))
+        scheduler.submit(background, ("a", "b"))
+        scheduler.submit(normal, ("a", "b"), priority=10)
+        scheduler.submit(critical, ("a", "b"), priority=-1.5)
+        assert started == ["first"]
+        assert scheduler.pending == 3
+
+        first_future.set_result(True)
+        critical_future.set_result(True)
+        normal_future.set_result(True)
+        assert started == ["first", "critical", "normal", "background"]
+
+    def test_per_pair_limit(self):
+        started = []
+        scheduler = data.TransferScheduler(max_in_flight=3, max_per_pair=1)
+        ab1, ab1_future = self.make_task(started, "ab1")
+        ab2, _ = self.make_task(started, "ab2")
+        cd1, _ = self.make_task(started, "cd1")
+        scheduler.submit(ab1, ("a", "b"))
+        scheduler.submit(ab2, ("a", "b"), priority=0)
+        scheduler.submit(cd1, ("c", "d"))
+        assert started == ["ab1", "cd1"]
+
+        ab1_future.set_result(True)
+        assert started == ["ab1", "cd1", "ab2"]
+
+    def test_waits_for_dependencies(self):
+        started = []
+        scheduler = data.TransferScheduler(max_in_flight=1)
+        dep = Future()
+        blocked, _ = self.make_task(started, "blocked")
+        ready, ready_future = self.make_task(started, "ready")
+        scheduler.submit(blocked, ("a", "b"), priority=0, depends=[dep])
+        scheduler.submit(ready, ("a", "b"))
+        assert started == ["ready"]
+
+        dep.set_result(None)
+        assert started == ["ready"]
+        ready_future.set_result(True)
+        assert started == ["ready", "blocked"]
+
+    def test_exceptions(self):
+        scheduler = data.TransferScheduler(max_in_flight=1)
+
+        def broken_submit():
+            raise RuntimeError("submit failed")
+
+        future = scheduler.submit(broken_submit, ("a", "b"))
+        with pytest.raises(RuntimeError, match="submit failed"):
+            future.result()
+        assert scheduler.in_flight == 0
+
+        task_future = Future()
+        future = scheduler.submit(lambda: task_future, ("a", "b"))
+        task_future.set_exception(RuntimeError("task failed"))
+        with pytest.raises(RuntimeError, match="task failed"):
+            future.result()
+        assert scheduler.in_flight == 0
+
+    def test_forwards_task_attributes(self):
+        scheduler = data.TransferScheduler(max_in_flight=1)
+        running, running_future = self.make_task([], "running")
+        queued, queued_future = self.make_task([], "queued")
+        scheduler.submit(running, ("a", "b"))
+        future = scheduler.submit(queued, ("a", "b"))
+        assert future.tid is None
+        assert future.task_status() == "pending"
+
+        queued_future.tid = 7
+        running_future.set_result(True)
+        assert future.app_future is queued_future
+        assert future.tid == 7
+
+    def test_shutdown(self):
+        started = []
+        scheduler = data.TransferScheduler(max_in_flight=1)
+        running, running_future = self.make_task(started, "running")
+        queued, _ = self.make_task(started, "queued")
+        scheduler.submit(running, ("a", "b"))
+        queued_result = scheduler.submit(queued, ("a", "b"))
+
+        scheduler.shutdown(wait=False)
+        assert queued_result.cancelled()
+
+        # Waiting blocks until the running task is done
+        timer = threading.Timer(0.1, running_future.set_result, args=(True,))
+        timer.start()
+        scheduler.shutdown(wait=True)
+        assert scheduler.in_flight == 0
+        assert started == ["running"]
+
+    def test_shutdown_timeout(self):
+        started = []
+        scheduler = data.TransferScheduler(max_in_flight=1)
+        running, _ = self.make_task(started, "running")
+        queued, _ = self.make_task(started, "queued")
+        scheduler.submit(running, ("a", "b"))
+        queued_result = scheduler.submit(queued, ("a", "b"))
+
+        # The running task never finishes
+        assert scheduler.shutdown(wait=True, timeout=0.1) is False
+        assert queued_result.cancelled()
+        assert started == ["running"]
+
+    def test_argument_dependencies(self):
+        """Test that futures in any argument are waited for."""
+        started = []
+        scheduler = data.TransferScheduler()
+        positional, nested = Future(), Future()
+        submit, _ = self.make_task(started, "task")
+        data.activate_scheduler(scheduler)
+        try:
+            data._schedule(
+                submit,
+                ("a", "b"),
+                None,
+                ("a", "b", positional, "out"),
+                {"inputs": [[nested]]},
+            )
+        finally:
+            data.activate_scheduler(None)
+        positional.set_result("in")
+        assert started == []
+        nested.set_result(None)
+        assert started == ["task"]
+
+    def test_workflow_priorities(self, tmp_path):
+        """Test that run_workflow schedules transfer tasks by priority."""
+        (tmp_path / "data.txt").write_text("data")
+        # Use a separate source endpoint per task to identify them in the metrics
+        names = ("first", "bulk", "stage")
+        endpoints = {name: str(tmp_path) for name in names}
+        endpoints["dst"] = str(tmp_path / "dst")
+        backend = LocalTransferBackend(endpoints, latency=0.2)
+        metrics = WorkflowMetrics()
+        with run_workflow(
+            {},
+            run_dir=str(tmp_path / "runinfo"),
+            metrics=metrics,
+            max_transfers=1,
+        ):
+            assert data.current_scheduler().max_in_flight == 1
+            futures = [
+                data.transfer_task(
+                    name,
+                    "dst",
+                    "data.txt",
+                    f"{name}.txt",
+                    polling_interval=0.01,
+                    backend=backend,
+                    priority=priority,
+                    executor=["local"],
+                )
+                for name, priority in zip(names, (5, None, 0))
+            ]
+        assert data.current_scheduler() is None
+        assert all(f.result() for f in futures)
+
+        # The prioritized transfer overtakes the one without a priority
+        assert [t["src_ep"] for t in metrics.transfers] == ["first", "stage", "bulk"]
+
+    def test_workflow_without_limits(self, tmp_path):
+        """Test that unlimited workflows submit transfer tasks right away."""
+        with run_workflow({}, run_dir=str(tmp_path / "runinfo")):
+            assert data.current_scheduler() is None
+
+    def test_workflow_transfer_timeout(self, tmp_path, caplog):
+        """Test that a warning is logged when queued transfers time out."""
+        with mock.patch.object(
+            data.TransferScheduler, "shutdown", return_value=False
+        ) as shutdown:
+            with caplog.at_level(logging.WARNING, logger="chiltepin.workflow"):
+                with run_workflow(
+                    {},
+                    run_dir=str(tmp_path / "runinfo"),
+                    max_transfers_per_pair=1,
+                    transfer_timeout=5,
+                ):
+                    pass
+        shutdown.assert_called_once_with(wait=True, timeout=5)
+        assert "No transfer finished for 5 seconds" in caplog.text
+
+    def test_workflow_task_future(self, tmp_path):
+        """Test that transfer and delete tasks return futures of their Parsl tasks."""
+        (tmp_path / "data.txt").write_text("data")
+        backend = LocalTransferBackend({"src": str(tmp_path), "dst": str(tmp_path)})
+        with run_workflow({}, run_dir=str(tmp_path / "runinfo")):
+            copy = data.transfer_task(
+                "src",
+                "dst",
+                "data.txt",
+                "copy.txt",
+                polling_interval=0.01,
+                backend=backend,
+                executor=["local"],
+            )
+            assert copy.result() is True
+            cleanup = data.delete_task(
+                "dst",
+                "copy.txt",
+                polling_interval=0.01,
+                backend=backend,
+                executor=["local"],
+                inputs=[copy],
+            )
+            assert cleanup.result() is True
+        for future in (copy, cleanup):
+            assert future.tid == future.app_future.tid
+            assert future.task_record["func_name"] in ("_transfer_app", "_delete_app")
+            assert future.task_status() == "exec_done"
+        assert cleanup.tid > copy.tid
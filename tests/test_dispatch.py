@@ -0,0 +1,76 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for chiltepin.dispatch module."""
+
+from concurrent.futures import Future
+
+import pytest
+
+from chiltepin.dispatch import Dispatcher
+
+
+class OneSlot(Dispatcher):
+    """Dispatcher that runs one task at a time."""
+
+    def __init__(self):
+        super().__init__()
+        self.queue = []
+        self.busy = False
+
+    def submit(self, submit):
+        entry = {"submit": submit, "future": Future()}
+        with self._lock:
+            self.queue.append(entry)
+        self._dispatch()
+        return entry["future"]
+
+    def _select(self):
+        if self.busy or not self.queue:
+            return []
+        self.busy = True
+        return [self.queue.pop(0)]
+
+    def _release(self, entry):
+        with self._lock:
+            self.busy = False
+
+
+class TestDispatcher:
+    """Test the Dispatcher base class."""
+
+    def test_is_abstract(self):
+        with pytest.raises(TypeError):
+            Dispatcher()
+
+    def test_results(self):
+        dispatcher = OneSlot()
+        tasks = [Future(), Future()]
+        futures = [dispatcher.submit(lambda t=t: t) for t in tasks]
+        assert len(dispatcher.queue) == 1
+        tasks[0].set_result("first")
+        tasks[1].set_exception(RuntimeError("second"))
+        assert futures[0].result() == "first"
+        with pytest.raises(RuntimeError, match="second"):
+            futures[1].result()
+        assert not dispatcher.busy
+
+    def test_submission_failure_frees_room(self):
+        dispatcher = OneSlot()
+
+        def fail():
+            raise RuntimeError("cannot submit")
+
+        running, task = Future(), Future()
+        dispatcher.submit(lambda: running)
+        failed = dispatcher.submit(fail)
+        queued = dispatcher.submit(lambda: task)
+        assert len(dispatcher.queue) == 2
+
+        running.set_result(None)
+        with pytest.raises(RuntimeError, match="cannot submit"):
+            failed.result()
+        # The room of the failed task went to the next one
+        assert dispatcher.busy
+        assert dispatcher.queue == []
+        task.set_result(1)
+        assert queued.result() == 1
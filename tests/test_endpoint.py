@@ -1,13 +1,16 @@
 # SPDX-License-Identifier: Apache-2.0
 
+import json
 import os
 import pathlib
+import platform
 import shutil
 import tempfile
 import time
 from unittest.mock import MagicMock, mock_open, patch
 from uuid import UUID
 
+import jsonschema
 import pytest
 import yaml
 
@@ -72,6 +75,8 @@ class TestEndpointIntegration:
         # Configure an endpoint with a config_dir
         endpoint.configure("bar", config_dir=f"{config_dir_test}")
         assert os.path.exists(f"{config_dir_test}/bar/config.yaml")
+        with open(f"{config_dir_test}/bar/user_config_schema.json") as f:
+            assert json.load(f) == endpoint.user_config_schema()
 
     def test_show_initialized_default_config_dir(self):
         """Test listing endpoint in Initialized state (default config_dir)."""
@@ -458,6 +463,36 @@ class TestConfigure:
                     # The function should return False when yaml.dump fails
                     assert result is False
 
+    def test_login_path_cache(self, tmp_path):
+        """Test that the login PATH is cached per host in the config directory."""
+        cache_path = tmp_path / endpoint._LOGIN_PATH_CACHE
+        cache_path.write_text(
+            json.dumps({"other": {"time": time.time(), "path": "/other/bin"}})
+        )
+        path = endpoint._capture_login_path(tmp_path)
+        # Separate processes read the PATH from the cache
+        with patch("subprocess.Popen") as mock_popen:
+            assert endpoint._capture_login_path(tmp_path) == path
+            mock_popen.assert_not_called()
+        cache = json.loads(cache_path.read_text())
+        assert cache["other"]["path"] == "/other/bin"
+        assert cache[platform.node()]["path"] == path
+
+        # Expired and unreadable caches are replaced
+        cache[platform.node()] = {"time": 0, "path": "/expired/bin"}
+        cache_path.write_text(json.dumps(cache))
+        assert endpoint._capture_login_path(tmp_path) == path
+        cache_path.write_text("[")
+        assert endpoint._capture_login_path(tmp_path) == path
+        assert list(json.loads(cache_path.read_text())) == [platform.node()]
+        cache_path.write_text("[]")
+        assert endpoint._capture_login_path(tmp_path) == path
+        assert list(json.loads(cache_path.read_text())) == [platform.node()]
+
+        # The cache is only an optimization
+        with patch("tempfile.NamedTemporaryFile", side_effect=OSError):
+            assert endpoint._capture_login_path(tmp_path / "missing") == path
+
     def test_path_capture_timeout(self):
         """Test configure when PATH capture subprocess times out."""
         import subprocess
@@ -531,6 +566,51 @@ class TestConfigure:
             with pytest.raises(RuntimeError, match="Failed to capture system PATH"):
                 endpoint.configure("path_fail_test", config_dir=str(config_dir_test))
 
+    def test_in_process(self, tmp_path):
+        """Test configuring endpoints with the endpoint library."""
+        endpoint.configure("first", config_dir=str(tmp_path), in_process=True)
+        config = yaml.safe_load((tmp_path / "first" / "config.yaml").read_text())
+        assert config["display_name"] == "first"
+        assert config["debug"] is True
+        assert (tmp_path / "first" / "user_config_schema.json").exists()
+
+        # The login PATH is only captured once per host
+        with patch("subprocess.Popen") as mock_popen:
+            endpoint.configure("second", config_dir=str(tmp_path), in_process=True)
+            mock_popen.assert_not_called()
+        environment = (tmp_path / "second" / "user_environment.yaml").read_text()
+        assert environment.count("\nPATH: ") == 1
+        cache = json.loads((tmp_path / endpoint._LOGIN_PATH_CACHE).read_text())
+        assert list(cache) == [platform.node()]
+
+        with pytest.raises(RuntimeError, match="Failed to configure endpoint 'first'"):
+            endpoint.configure("first", config_dir=str(tmp_path), in_process=True)
+
+    def test_in_process_matches_command(self, tmp_path):
+        """Test that both ways of configuring produce the same files."""
+        endpoint.configure("ep", config_dir=str(tmp_path / "lib"), in_process=True)
+        endpoint.configure("ep", config_dir=str(tmp_path / "cli"))
+
+        def files(root):
+            return {
+                path.relative_to(root): path.read_text().replace(str(root), "<dir>")
+                for path in root.rglob("*")
+                if path.is_file()
+            }
+
+        lib, cli = files(tmp_path / "lib" / "ep"), files(tmp_path / "cli" / "ep")
+        assert sorted(lib) == sorted(cli)
+        for path in lib:
+            assert lib[path] == cli[path], path
+
+    def test_user_path_is_replaced(self, tmp_path):
+        """Test that setting the PATH again replaces it."""
+        path = tmp_path / "user_environment.yaml"
+        path.write_text("# comment\nOTHER: value")
+        endpoint._set_user_path(path, "/a/bin")
+        endpoint._set_user_path(path, "/b/bin")
+        assert path.read_text() == "# comment\nOTHER: value\nPATH: /b/bin\n"
+
 
 class TestStart:
     """Tests for start() function."""
@@ -778,3 +858,250 @@ class TestDelete:
                 ):
                     with pytest.raises(RuntimeError, match="Error deleting endpoint"):
                         endpoint.delete("test_endpoint", timeout=5)
+
+
+class TestShow:
+    """Test show() function with fake endpoint directories."""
+
+    @pytest.fixture
+    def config_dir(self, tmp_path):
+        for name, endpoint_id, pid_age in [
+            ("ep-new", None, None),
+            ("ep-up", "11111111-1111-1111-1111-111111111111", 0),
+            ("ep-down", "22222222-2222-2222-2222-222222222222", None),
+            ("other", "33333333-3333-3333-3333-333333333333", 300),
+        ]:
+            ep_dir = tmp_path / name
+            ep_dir.mkdir()
+            (ep_dir / "config.yaml").write_text("engine: {}\n")
+            if endpoint_id:
+                (ep_dir / "endpoint.json").write_text(
+                    json.dumps({"endpoint_id": endpoint_id})
+                )
+            if pid_age is not None:
+                pid_path = ep_dir / "daemon.pid"
+                pid_path.write_text("1")
+                mtime = time.time() - pid_age
+                os.utime(pid_path, (mtime, mtime))
+        (tmp_path / "not-an-endpoint").mkdir()
+        return tmp_path
+
+    def test_matches_get_endpoints(self, config_dir):
+        from globus_compute_endpoint.endpoint.endpoint import Endpoint
+
+        assert endpoint.show(config_dir=str(config_dir)) == Endpoint.get_endpoints(
+            config_dir
+        )
+
+    def test_matches_get_endpoints_listing(self, config_dir):
+        """Test that the same directories as get_endpoints are endpoints."""
+        from globus_compute_endpoint.endpoint.endpoint import Endpoint
+
+        (config_dir / ".hidden").mkdir()
+        (config_dir / ".hidden" / "config.yaml").write_text("engine: {}\n")
+        (config_dir / "json-config").mkdir()
+        (config_dir / "json-config" / "config.json").write_text("{}")
+        (config_dir / "linked").symlink_to(config_dir / "ep-up")
+        (config_dir / "config.yaml").write_text("engine: {}\n")
+
+        shown = endpoint.show(config_dir=str(config_dir))
+        assert shown == Endpoint.get_endpoints(config_dir)
+        assert {".hidden", "json-config", "linked"} <= set(shown)
+        assert list(endpoint.show(config_dir=str(config_dir), pattern=".*")) == [
+            ".hidden"
+        ]
+
+    def test_filters(self, config_dir):
+        assert list(endpoint.show(config_dir=str(config_dir), pattern="ep-*")) == [
+            "ep-down",
+            "ep-new",
+            "ep-up",
+        ]
+        assert endpoint.show(config_dir=str(config_dir), status="running") == {
+            "ep-up": {
+                "id": "11111111-1111-1111-1111-111111111111",
+                "status": "Running",
+            }
+        }
+        assert list(
+            endpoint.show(
+                config_dir=str(config_dir), pattern="o*", status="Disconnected"
+            )
+        ) == ["other"]
+
+    def test_missing_config_dir(self, tmp_path):
+        assert endpoint.show(config_dir=str(tmp_path / "missing")) == {}
+        assert endpoint.show(config_dir=str(tmp_path / "missing"), cache_ttl=60) == {}
+
+    def test_cache(self, config_dir):
+        listing = endpoint.show(config_dir=str(config_dir), cache_ttl=60)
+        assert (config_dir / ".chiltepin_endpoints.json").exists()
+        shutil.rmtree(config_dir / "ep-new")
+
+        # The cached listing is filtered like a scan
+        assert endpoint.show(config_dir=str(config_dir), cache_ttl=60) == listing
+        assert list(
+            endpoint.show(config_dir=str(config_dir), pattern="ep-n*", cache_ttl=60)
+        ) == ["ep-new"]
+
+        # An expired or unused cache is not read
+        assert "ep-new" not in endpoint.show(config_dir=str(config_dir))
+        assert "ep-new" not in endpoint.show(config_dir=str(config_dir), cache_ttl=0)
+
+    def test_unreadable_endpoint_id(self, config_dir, caplog):
+        (config_dir / "ep-up" / "endpoint.json").write_text("{")
+        with caplog.at_level("WARNING", logger="chiltepin.endpoint"):
+            info = endpoint.show(config_dir=str(config_dir), pattern="ep-up")
+        assert info["ep-up"]["id"] == "[failed to read endpoint id]"
+        assert "Failed to read endpoint id: [JSONDecodeError]" in caplog.text
+        assert str(config_dir / "ep-up") in caplog.text
+
+    def test_exists_reads_one_directory(self, config_dir):
+        with patch(
+            "chiltepin.endpoint._endpoint_status", wraps=endpoint._endpoint_status
+        ) as mock_status:
+            assert endpoint.is_running("ep-up", config_dir=str(config_dir))
+            assert not endpoint.exists("ep-*", config_dir=str(config_dir))
+        assert mock_status.call_count == 1
+
+
+class TestRenderTemplate:
+    """Tests for render_template() function."""
+
+    @pytest.mark.parametrize(
+        "config, engine, provider",
+        [
+            ({}, "GlobusComputeEngine", "LocalProvider"),
+            (
+                {"provider": "slurm", "partition": "p"},
+                "GlobusComputeEngine",
+                "SlurmProvider",
+            ),
+            ({"provider": "pbspro", "mpi": True}, "GlobusMPIEngine", "PBSProProvider"),
+        ],
+    )
+    def test_valid_configs(self, config, engine, provider):
+        """Test that valid resource configurations render the expected engine."""
+        rendered = yaml.safe_load(endpoint.render_template({"endpoint": "x", **config}))
+        assert rendered["engine"]["type"] == engine
+        assert rendered["engine"]["provider"]["type"] == provider
+
+    def test_values_are_quoted(self):
+        """Test that values cannot inject YAML into the configuration."""
+        config = {"environment": ["module load a", "x: 1"], "account": "a\nqos: b"}
+        rendered = yaml.safe_load(endpoint.render_template(config))
+        assert rendered["engine"]["provider"]["worker_init"] == "module load a\nx: 1"
+
+    def test_shell_escape(self):
+        """Test that the shell_escape filter quotes values for the shell."""
+        template = (
+            "engine:\n  type: GlobusComputeEngine\n  provider:\n"
+            "    type: LocalProvider\n"
+            "    worker_init: {{ account|shell_escape }}\n"
+            "    max_blocks: {{ cores_per_node|shell_escape }}\n"
+        )
+        config = {"account": "a; rm -rf ~", "cores_per_node": 4}
+        rendered = yaml.safe_load(endpoint.render_template(config, template=template))
+        assert rendered["engine"]["provider"]["worker_init"] == "'a; rm -rf ~'"
+        assert rendered["engine"]["provider"]["max_blocks"] == 4
+
+    def test_quote_values(self):
+        """Test that variables are quoted like endpoints quote them."""
+        quoted = endpoint._quote_values(
+            {"a": "x", "b": [1, 2.5, None, True], "c": {"d": "y"}}
+        )
+        assert quoted == {"a": '"x"', "b": [1, 2.5, "null", True], "c": {"d": '"y"'}}
+        assert endpoint._shell_escape('"1"') == '"1"'
+        assert endpoint._shell_escape("2") == "2"
+        with pytest.raises(ValueError, match="set is not a valid"):
+            endpoint._quote_values({"a": {1}})
+
+    @pytest.mark.parametrize(
+        "config, message",
+        [
+            ({"provider": "lsf"}, "'provider': 'lsf' is not one of"),
+            ({"walltime": "10 minutes"}, "'walltime': '10 minutes' does not match"),
+            ({"cores_per_node": 0}, "'cores_per_node': 0 is less than the minimum"),
+        ],
+    )
+    def test_invalid_configs(self, config, message):
+        """Test that invalid resource configurations are rejected."""
+        with pytest.raises(ValueError, match=message):
+            endpoint.render_template(config)
+
+    @pytest.mark.parametrize(
+        "walltime", ["30", "10:00", "01:30:00", "100:00:00", "2-12", "1-00:30:00"]
+    )
+    def test_walltimes(self, walltime):
+        """Test that the walltime formats of the schedulers are accepted."""
+        config = {"provider": "slurm", "walltime": walltime}
+        rendered = yaml.safe_load(endpoint.render_template(config))
+        assert rendered["engine"]["provider"]["walltime"] == walltime
+
+    def test_additional_variables(self):
+        """Test that variables added to custom templates are accepted."""
+        schema = endpoint.user_config_schema()
+        jsonschema.validate({"provider": "slurm", "qos": "debug"}, schema)
+
+    def test_invalid_template(self):
+        """Test that templates rendering invalid configurations are rejected."""
+        template = "engine:\n  type: GlobusComputeEngine\n  bogus: {{ queue }}\n"
+        with pytest.raises(ValueError, match="Invalid user endpoint configuration"):
+            endpoint.render_template({}, template=template)
+
+    def test_cache(self):
+        """Test that rendered templates are cached."""
+        config = {"provider": "slurm", "partition": "cached"}
+        rendered = endpoint.render_template(config)
+        with patch("chiltepin.endpoint.load_config_yaml") as mock_load:
+            assert endpoint.render_template(dict(config)) is rendered
+            mock_load.assert_not_called()
+
+
+class TestKeepAlive:
+    """Tests for the keep-alive settings of endpoint templates."""
+
+    def test_make_template(self):
+        """Test that configure options become the template defaults."""
+        assert endpoint.make_template() == endpoint.endpoint_template
+        template = endpoint.make_template(heartbeat_period=10, idle_heartbeats_soft=0)
+        rendered = yaml.safe_load(endpoint.render_template({}, template=template))
+        assert rendered["heartbeat_period"] == 10
+        assert rendered["idle_heartbeats_soft"] == 0
+        assert rendered["idle_heartbeats_hard"] == 5760
+
+    def test_resource_overrides(self):
+        """Test that resource options override the template defaults."""
+        template = endpoint.make_template(idle_heartbeats_soft=0)
+        rendered = yaml.safe_load(
+            endpoint.render_template({"idle_heartbeats_soft": 240}, template=template)
+        )
+        assert rendered["idle_heartbeats_soft"] == 240
+        with pytest.raises(ValueError, match="'heartbeat_period': 0 is less than"):
+            endpoint.render_template({"heartbeat_period": 0})
+
+
+class TestMeasureColdStart:
+    """Tests for measure_cold_start() function."""
+
+    def test_measure(self):
+        """Test that two tasks are timed with the resource's configuration."""
+        endpoint_id = "12345678-1234-5678-1234-567812345678"
+        with patch("chiltepin.endpoint.show", return_value={"ep": {"id": endpoint_id}}):
+            with patch("chiltepin.endpoint.Executor") as mock_executor:
+                timings = endpoint.measure_cold_start(
+                    "ep", config={"provider": "slurm"}, client=MagicMock()
+                )
+        kwargs = mock_executor.call_args.kwargs
+        assert kwargs["endpoint_id"] == endpoint_id
+        assert kwargs["user_endpoint_config"]["provider"] == "slurm"
+        executor = mock_executor.return_value.__enter__.return_value
+        assert executor.submit.call_count == 2
+        assert set(timings) == {"first_task", "warm_task", "cold_start"}
+        assert timings["cold_start"] >= 0
+
+    def test_not_configured(self):
+        """Test that unknown endpoints are reported."""
+        with patch("chiltepin.endpoint.show", return_value={}):
+            with pytest.raises(RuntimeError, match="Endpoint 'ep' is not configured"):
+                endpoint.measure_cold_start("ep", client=MagicMock())
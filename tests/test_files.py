@@ -0,0 +1,123 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for chiltepin.files module."""
+
+import mmap
+import sys
+from unittest import mock
+
+import pytest
+from parsl.data_provider.files import File
+
+from chiltepin import run_workflow
+from chiltepin.files import MappedFile, open_mapped
+from chiltepin.tasks import bash_task, python_task
+
+
+class TestMappedFile:
+    """Test MappedFile class."""
+
+    def test_layout_survives_cleancopy(self):
+        file = MappedFile("out.bin", dtype="float32", shape=[2, 3], offset=8)
+        copy = file.cleancopy()
+        assert isinstance(copy, MappedFile)
+        assert (copy.dtype, copy.shape, copy.offset, copy.order) == (
+            "float32",
+            (2, 3),
+            8,
+            "C",
+        )
+        assert str(copy) == "out.bin"
+
+
+class TestOpenMapped:
+    """Test open_mapped() function without a data type."""
+
+    def test_raw_bytes(self, tmp_path):
+        path = tmp_path / "data.bin"
+        path.write_bytes(b"0123456789")
+        assert bytes(open_mapped(File(str(path)))) == b"0123456789"
+        assert bytes(open_mapped(str(path), offset=2, shape=(3,))) == b"234"
+        assert bytes(open_mapped(MappedFile(path, offset=7))) == b"789"
+
+    def test_offset_beyond_granularity(self, tmp_path):
+        path = tmp_path / "data.bin"
+        offset = mmap.ALLOCATIONGRANULARITY + 5
+        path.write_bytes(b"\0" * offset + b"tail")
+        assert bytes(open_mapped(path, offset=offset)) == b"tail"
+
+    def test_modes(self, tmp_path):
+        path = tmp_path / "data.bin"
+        path.write_bytes(b"abc")
+        view = open_mapped(path, mode="c")
+        view[0] = ord("x")
+        assert path.read_bytes() == b"abc"
+        view = open_mapped(path, mode="r+")
+        view[0] = ord("x")
+        view.obj.flush()
+        assert path.read_bytes() == b"xbc"
+        with pytest.raises(TypeError):
+            open_mapped(path)[0] = ord("y")
+        with pytest.raises(ValueError, match="Invalid mode 'w\\+'"):
+            open_mapped(path, mode="w+")
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "empty.bin"
+        path.write_bytes(b"")
+        assert bytes(open_mapped(path)) == b""
+
+
+class TestOpenMappedArrays:
+    """Test open_mapped() function with a data type."""
+
+    def test_array(self, tmp_path):
+        numpy = pytest.importorskip("numpy")
+        file = MappedFile(tmp_path / "field.bin", dtype="float32", shape=(2, 3))
+        field = open_mapped(file, mode="w+")
+        field[:] = numpy.arange(6).reshape(2, 3)
+        field.flush()
+        assert open_mapped(file)[1, 2] == 5.0
+        assert isinstance(open_mapped(file), numpy.memmap)
+
+    def test_layout(self, tmp_path):
+        numpy = mock.Mock()
+        file = MappedFile(
+            tmp_path / "field.bin", dtype="float64", shape=(4,), offset=8, order="F"
+        )
+        with mock.patch.dict(sys.modules, {"numpy": numpy}):
+            assert open_mapped(file, mode="r+") is numpy.memmap.return_value
+        numpy.memmap.assert_called_once_with(
+            str(tmp_path / "field.bin"),
+            dtype="float64",
+            mode="r+",
+            offset=8,
+            shape=(4,),
+            order="F",
+        )
+
+    def test_without_numpy(self, tmp_path):
+        path = tmp_path / "field.bin"
+        path.write_bytes(b"\0" * 8)
+        with mock.patch.dict(sys.modules, {"numpy": None}):
+            with pytest.raises(ImportError, match="numpy is required"):
+                open_mapped(path, dtype="float32")
+
+
+def test_file_handoff_in_workflow(tmp_path):
+    """Test mapping the output of a bash task in a python task."""
+
+    @bash_task
+    def write_output(outputs=()):
+        return f"printf 'header-0123456789' > {outputs[0]}"
+
+    @python_task
+    def read_region(start, stop, inputs=()):
+        from chiltepin.files import open_mapped
+
+        return bytes(open_mapped(inputs[0])[start:stop])
+
+    output = MappedFile(str(tmp_path / "output.bin"), offset=7)
+    with run_workflow({}, run_dir=str(tmp_path / "runinfo")):
+        writer = write_output(outputs=[output], executor=["local"])
+        region = read_region(2, 5, inputs=[writer.outputs[0]], executor=["local"])
+        assert region.result() == b"234"
@@ -0,0 +1,36 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for chiltepin.futures module."""
+
+from concurrent.futures import Future
+from unittest import mock
+
+from chiltepin.futures import TaskFuture
+
+
+class TestTaskFuture:
+    """Test TaskFuture."""
+
+    def test_not_submitted(self):
+        """Test the attributes of a task that has not been submitted."""
+        future = TaskFuture()
+        assert future.tid is None
+        assert future.task_record is None
+        assert future.task_status() == "pending"
+
+    def test_forwards_to_app_future(self):
+        """Test that Parsl task attributes are read from the AppFuture."""
+        app_future = mock.Mock(spec=["tid", "task_record", "task_status"])
+        app_future.tid = 3
+        app_future.task_record = {"id": 3}
+        app_future.task_status.return_value = "running"
+        future = TaskFuture(app_future)
+        assert future.tid == 3
+        assert future.task_record == {"id": 3}
+        assert future.task_status() == "running"
+
+    def test_plain_future(self):
+        """Test wrapping a future that is not a Parsl AppFuture."""
+        future = TaskFuture(Future())
+        assert future.tid is None
+        assert future.task_status() == "pending"
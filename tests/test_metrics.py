@@ -0,0 +1,228 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for chiltepin.metrics module."""
+
+import logging
+import threading
+from concurrent.futures import Future
+from unittest import mock
+
+import parsl
+import pytest
+
+import chiltepin.data as data
+import chiltepin.metrics as metrics
+from chiltepin import run_workflow
+from chiltepin.backends import LocalTransferBackend
+from chiltepin.tasks import python_task
+
+
+def make_report(src_ep, dst_ep, status="SUCCEEDED", nbytes=1000, elapsed=2.0):
+    """Create a transfer report like those produced by chiltepin.data."""
+    return {
+        "kind": "transfer" if dst_ep else "delete",
+        "src_ep": src_ep,
+        "dst_ep": dst_ep,
+        "status": status,
+        "bytes_transferred": nbytes,
+        "files_transferred": 1 if nbytes else 0,
+        "faults": 0 if status == "SUCCEEDED" else 1,
+        "elapsed": elapsed,
+    }
+
+
+class TestFormatBytes:
+    """Test format_bytes() function."""
+
+    def test_format_bytes(self):
+        assert metrics.format_bytes(12) == "12 B"
+        assert metrics.format_bytes(1500) == "1.5 KB"
+        assert metrics.format_bytes(2.5e9) == "2.5 GB"
+        assert metrics.format_bytes(3e15) == "3000.0 TB"
+
+
+class TestWorkflowMetrics:
+    """Test the WorkflowMetrics class."""
+
+    def test_empty_summary(self):
+        assert metrics.WorkflowMetrics().summary() == ""
+        assert metrics.WorkflowMetrics().transfer_summary() == {}
+
+    def test_transfer_summary(self):
+        m = metrics.WorkflowMetrics()
+        m.record_transfer(make_report("a", "b"))
+        m.record_transfer(make_report("a", "b", status="FAILED", nbytes=0))
+        m.record_transfer(make_report("c", "b", nbytes=4000, elapsed=1.0))
+        m.record_transfer(make_report("b", None, nbytes=0, elapsed=0.0))
+
+        summary = m.transfer_summary()
+        assert set(summary) == {"a -> b", "c -> b", "b", "all"}
+        assert summary["a -> b"]["tasks"] == 2
+        assert summary["a -> b"]["succeeded"] == 1
+        assert summary["a -> b"]["failed"] == 1
+        assert summary["a -> b"]["faults"] == 1
+        assert summary["a -> b"]["rate"] == 250.0
+        assert summary["b"]["rate"] == 0.0
+        assert summary["all"]["tasks"] == 4
+        assert summary["all"]["bytes"] == 5000
+        assert summary["all"]["files"] == 2
+
+        text = m.summary()
+        lines = text.splitlines()
+        assert lines[0] == "Transfer summary:"
+        assert lines[-1].startswith("  all: 4 tasks (3 succeeded, 1 failed)")
+        assert "c -> b: 1 tasks" in text
+        assert "4.0 KB/s" in text
+
+    def test_records_are_copied(self):
+        m = metrics.WorkflowMetrics()
+        report = make_report("a", "b")
+        m.record_transfer(report)
+        report["status"] = "FAILED"
+        m.transfers.clear()
+        assert m.transfers[0]["status"] == "SUCCEEDED"
+
+    def test_concurrent_records(self):
+        m = metrics.WorkflowMetrics()
+        threads = [
+            threading.Thread(target=m.record_transfer, args=(make_report("a", "b"),))
+            for _ in range(20)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert m.transfer_summary()["all"]["tasks"] == 20
+
+    def test_mpi_summary(self):
+        m = metrics.WorkflowMetrics()
+        for name, returncode, launch, run in [
+            ("forecast", 0, 1.0, 9.0),
+            ("forecast", 1, 3.0, 7.0),
+            ("post", 0, 1.0, 1.0),
+        ]:
+            m.record_mpi(
+                {
+                    "name": name,
+                    "num_nodes": 1,
+                    "num_ranks": 4,
+                    "returncode": returncode,
+                    "launch": launch,
+                    "run": run,
+                }
+            )
+        summary = m.mpi_summary()
+        assert summary["forecast"]["tasks"] == 2
+        assert summary["forecast"]["failed"] == 1
+        assert summary["forecast"]["launch_fraction"] == pytest.approx(0.2)
+        assert summary["all"]["tasks"] == 3
+        assert summary["all"]["launch"] == 5.0
+
+        text = m.summary()
+        assert "MPI summary:" in text
+        assert (
+            "forecast: 2 tasks (1 failed), launch 2.00s, run 8.00s on average, "
+            "20.0% of time launching" in text
+        )
+
+
+class TestTaskSummary:
+    """Test tracking the state of tasks."""
+
+    def test_task_summary(self, tmp_path):
+        m = metrics.WorkflowMetrics()
+
+        @python_task
+        def wait(seconds, *deps):
+            import time
+
+            time.sleep(seconds)
+
+        with run_workflow({}, run_dir=str(tmp_path / "runinfo"), metrics=m):
+            first = wait(1, executor=["local"])
+            second = wait(0, first, executor=["local"])
+            counts = m.task_summary(parsl.dfk().tasks.values())["executors"]["local"]
+            # The second task waits for the first one
+            assert counts["pending"] >= 1
+            assert counts["pending"] + counts["running"] == 2
+            # Unfinished tasks are only counted from their records
+            assert m.task_summary()["executors"] == {}
+            second.result()
+        summary = m.task_summary()
+        assert summary["executors"]["local"] == {
+            "pending": 0,
+            "running": 0,
+            "done": 2,
+            "failed": 0,
+        }
+        assert [task["id"] for task in summary["slowest"]] == [first.tid, second.tid]
+        assert summary["slowest"][0]["duration"] >= 1
+        # Finished records are not counted again
+        assert m.task_summary([first.task_record])["executors"] == summary["executors"]
+
+    def test_throughput_samples(self, monkeypatch):
+        m = metrics.WorkflowMetrics()
+        # Futures that are not Parsl tasks are not counted
+        m.track_task(Future())
+        monkeypatch.setattr(metrics, "_THROUGHPUT_SAMPLES", 2)
+        for now in (0.0, 10.0, 20.0):
+            future = Future()
+            future.task_record = {"id": int(now), "executor": "local"}
+            m.track_task(future)
+            with mock.patch("chiltepin.metrics.time.time", return_value=now):
+                future.set_result(None)
+        summary = m.task_summary()
+        assert summary["throughput"] == [[10.0, 1], [20.0, 1]]
+        assert summary["executors"]["local"]["done"] == 3
+
+    def test_transfer_and_serializer_tasks(self, tmp_path):
+        m = metrics.WorkflowMetrics()
+
+        @python_task(serializer="file")
+        def size(path, *deps):
+            import os
+
+            return os.path.getsize(path)
+
+        (tmp_path / "data.txt").write_text("data")
+        backend = LocalTransferBackend({"src": str(tmp_path), "dst": str(tmp_path)})
+        with run_workflow({}, run_dir=str(tmp_path / "runinfo"), metrics=m):
+            copy = data.transfer_task(
+                "src",
+                "dst",
+                "data.txt",
+                "copy.txt",
+                polling_interval=0.01,
+                backend=backend,
+                executor=["local"],
+            )
+            assert size(str(tmp_path / "copy.txt"), copy, executor=["local"]).result()
+            data.delete_task(
+                "dst", "copy.txt", polling_interval=0.01, backend=backend
+            ).result()
+        summary = m.task_summary()
+        assert summary["executors"]["local"]["done"] == 3
+        assert {task["name"] for task in summary["slowest"]} == {
+            "_transfer_app",
+            "size",
+            "_delete_app",
+        }
+
+
+class TestWorkflowIntegration:
+    """Test that run_workflow activates and summarizes metrics."""
+
+    def test_current_metrics(self, tmp_path, caplog):
+        m = metrics.WorkflowMetrics()
+        assert metrics.current() is None
+        with caplog.at_level(logging.INFO, logger="chiltepin.workflow"):
+            with run_workflow({}, run_dir=str(tmp_path / "runinfo"), metrics=m):
+                assert metrics.current() is m
+                m.record_transfer(make_report("a", "b"))
+        assert metrics.current() is None
+        assert "Transfer summary:" in caplog.text
+
+    def test_default_metrics(self, tmp_path):
+        with run_workflow({}, run_dir=str(tmp_path / "runinfo")):
+            assert isinstance(metrics.current(), metrics.WorkflowMetrics)
+        assert metrics.current() is None
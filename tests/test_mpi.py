@@ -0,0 +1,309 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for chiltepin.mpi module.
+
+The packer is driven with plain futures and a manual clock so that the order
+in which MPI tasks start, and the utilization they achieve, can be checked
+exactly.
+"""
+
+from concurrent.futures import Future
+from unittest import mock
+
+import pytest
+
+from chiltepin.mpi import MPIPacker, pack_first_fit_decreasing, right_size
+from chiltepin.tasks import mpi_task
+
+
+class Clock:
+    """Clock stand-in advanced by the test."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ManualMPITask:
+    """MPI task stand-in whose futures are completed by the test."""
+
+    def __init__(self):
+        self.started = []
+        self.futures = {}
+
+    def __call__(self, name, *depends, parsl_resource_specification=None):
+        self.started.append(name)
+        future = Future()
+        self.futures[name] = future
+        return future
+
+    def finish(self, name):
+        self.futures.pop(name).set_result(name)
+
+
+def submit(packer, task, name, nodes, *args):
+    return packer.submit(
+        task, name, *args, parsl_resource_specification={"num_nodes": nodes}
+    )
+
+
+class TestPackFirstFitDecreasing:
+    """Test the offline first-fit-decreasing packing."""
+
+    def test_packs_largest_first(self):
+        assert pack_first_fit_decreasing([1, 2, 3, 1, 2, 1], 3) == [
+            [2],
+            [1, 0],
+            [4, 3],
+            [5],
+        ]
+
+    def test_task_too_large(self):
+        with pytest.raises(ValueError, match="needs 4 nodes"):
+            pack_first_fit_decreasing([1, 4], 3)
+
+
+class TestRightSize:
+    """Test right_size() suggestions."""
+
+    def test_right_size(self):
+        shapes = [
+            {"num_nodes": 2, "ranks_per_node": 4},
+            {"num_nodes": 2, "ranks_per_node": 4},
+            {"num_nodes": 1, "ranks_per_node": 8},
+            {"num_nodes": 1},
+        ]
+        assert right_size(shapes) == {
+            "nodes_per_block": 2,
+            "max_mpi_apps": 2,
+            "max_blocks": 3,
+            "cores_per_node": 8,
+            "utilization": 1.0,
+        }
+
+    def test_max_nodes_per_block(self):
+        shapes = [{"num_nodes": 3}, {"num_nodes": 2}]
+        suggestion = right_size(shapes, max_nodes_per_block=4)
+        assert suggestion["nodes_per_block"] == 3
+        assert suggestion["max_blocks"] == 2
+        assert suggestion["utilization"] == pytest.approx(5 / 6)
+        # Without a limit, one block holds both tasks
+        assert right_size(shapes)["nodes_per_block"] == 5
+
+    def test_invalid_shapes(self):
+        with pytest.raises(ValueError, match="At least one"):
+            right_size([])
+        with pytest.raises(ValueError, match="needs 3 nodes"):
+            right_size([{"num_nodes": 3}], max_nodes_per_block=2)
+
+
+class TestMPIPacker:
+    """Test the order in which MPIPacker starts MPI tasks."""
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError, match="at least 1"):
+            MPIPacker(0)
+        with pytest.raises(ValueError, match="Invalid policy"):
+            MPIPacker(2, policy="random")
+        with pytest.raises(ValueError, match="max_bypass"):
+            MPIPacker(2, max_bypass=-1)
+        with pytest.raises(ValueError, match="needs 3 nodes"):
+            submit(MPIPacker(2), ManualMPITask(), "big", 3)
+
+    def test_for_resource(self):
+        packer = MPIPacker.for_resource(
+            {"mpi": True, "nodes_per_block": 4, "max_blocks": 2, "max_mpi_apps": 3}
+        )
+        assert packer.nodes_per_block == 4
+        assert packer.blocks == 2
+        assert packer.max_tasks_per_block == 3
+
+    def test_ffd_starts_largest_first_and_backfills(self):
+        task = ManualMPITask()
+        packer = MPIPacker(3, blocks=2)
+        # Hold everything behind a dependency so the whole queue is ordered at once
+        gate = Future()
+        for name, nodes in [("a", 1), ("b", 2), ("c", 3), ("d", 1), ("e", 2)]:
+            submit(packer, task, name, nodes, gate)
+        gate.set_result(None)
+        # c fills block 0, b and a share block 1
+        assert task.started == ["c", "b", "a"]
+        assert packer.busy_nodes == 6
+        assert packer.pending == 2
+
+        task.finish("b")
+        assert task.started[3:] == ["e"]
+        task.finish("a")
+        assert task.started[4:] == ["d"]
+
+    def test_fifo_backfills_behind_blocked_task(self):
+        task = ManualMPITask()
+        packer = MPIPacker(3, policy="fifo")
+        submit(packer, task, "a", 2)
+        submit(packer, task, "b", 2)
+        submit(packer, task, "c", 1)
+        # b does not fit next to a, but c can use the remaining node
+        assert task.started == ["a", "c"]
+        task.finish("a")
+        assert task.started == ["a", "c", "b"]
+
+    @pytest.mark.parametrize("policy", ["ffd", "fifo"])
+    def test_no_starvation(self, policy):
+        """Test that a stream of small tasks cannot hold off a full-block task."""
+        task = ManualMPITask()
+        packer = MPIPacker(2, policy=policy, max_bypass=2)
+        submit(packer, task, "small0", 1)
+        submit(packer, task, "big", 2)
+        # Small tasks keep backfilling the node next to the running one
+        for i in range(1, 4):
+            submit(packer, task, f"small{i}", 1)
+            task.finish(f"small{i - 1}")
+        # big was passed over twice, after which its block was held for it
+        # instead of being backfilled by small3
+        assert task.started == ["small0", "small1", "small2", "big"]
+        task.finish("big")
+        assert task.started[4:] == ["small3"]
+
+    def test_unlimited_bypass(self):
+        task = ManualMPITask()
+        packer = MPIPacker(2, max_bypass=None)
+        submit(packer, task, "small0", 1)
+        submit(packer, task, "big", 2)
+        for i in range(1, 6):
+            submit(packer, task, f"small{i}", 1)
+            task.finish(f"small{i - 1}")
+        assert "big" not in task.started
+
+    def test_max_tasks_per_block(self):
+        task = ManualMPITask()
+        packer = MPIPacker(4, max_tasks_per_block=2)
+        for name in "abc":
+            submit(packer, task, name, 1)
+        assert task.started == ["a", "b"]
+        task.finish("a")
+        assert task.started == ["a", "b", "c"]
+
+    def test_results_and_failures(self):
+        task = ManualMPITask()
+        packer = MPIPacker(2)
+        ok = submit(packer, task, "ok", 1)
+        bad = submit(packer, task, "bad", 1)
+        task.finish("ok")
+        task.futures.pop("bad").set_exception(RuntimeError("mpirun failed"))
+        assert ok.result() == "ok"
+        with pytest.raises(RuntimeError, match="mpirun failed"):
+            bad.result()
+        assert packer.busy_nodes == 0
+
+    def test_submission_errors(self):
+        def broken(name, parsl_resource_specification=None):
+            raise ValueError("cannot submit")
+
+        packer = MPIPacker(1)
+        futures = [submit(packer, broken, name, 1) for name in "ab"]
+        for future in futures:
+            with pytest.raises(ValueError, match="cannot submit"):
+                future.result()
+        assert packer.busy_nodes == 0
+
+
+class TestMPITasks:
+    """Test packing tasks made with the mpi_task decorator."""
+
+    @pytest.fixture
+    def submitted(self):
+        """Capture the app futures of submitted MPI tasks."""
+        futures = []
+
+        def submit(_):
+            futures.append(Future())
+            return futures[-1]
+
+        with mock.patch("chiltepin.tasks._submit", side_effect=submit):
+            yield futures
+
+    @staticmethod
+    def finish(future):
+        future.set_result({"returncode": 0, "launch": 0.0, "run": 0.0})
+
+    def test_decorator_nodes(self, submitted):
+        @mpi_task(num_nodes=2, ranks_per_node=4)
+        def forecast(member):
+            return f"forecast {member}"
+
+        packer = MPIPacker(3)
+        futures = [packer.submit(forecast, member) for member in range(2)]
+        assert len(submitted) == 1
+        assert packer.busy_nodes == 2
+        assert packer.pending == 1
+
+        self.finish(submitted[0])
+        assert futures[0].result() == 0
+        assert len(submitted) == 2
+        self.finish(submitted[1])
+        assert futures[1].result() == 0
+
+    def test_decorator_too_large(self, submitted):
+        @mpi_task(num_nodes=4)
+        def forecast():
+            return "forecast"
+
+        with pytest.raises(ValueError, match="needs 4 nodes"):
+            MPIPacker(3).submit(forecast)
+        assert submitted == []
+
+    def test_call_overrides_decorator(self, submitted):
+        @mpi_task(num_nodes=2)
+        def forecast(member):
+            return f"forecast {member}"
+
+        packer = MPIPacker(3)
+        for member in range(3):
+            packer.submit(
+                forecast, member, parsl_resource_specification={"num_nodes": 1}
+            )
+        assert len(submitted) == 3
+        assert packer.busy_nodes == 3
+
+    def test_method(self, submitted):
+        class Model:
+            @mpi_task(num_nodes=2)
+            def forecast(self, member):
+                return f"forecast {member}"
+
+        model = Model()
+        packer = MPIPacker(3)
+        packer.submit(model.forecast, 0)
+        packer.submit(model.forecast, 1)
+        assert len(submitted) == 1
+        assert packer.busy_nodes == 2
+
+
+class TestUtilization:
+    """Test the utilization reported by MPIPacker."""
+
+    def test_no_tasks(self):
+        packer = MPIPacker(2)
+        assert packer.utilization()["utilization"] == 0.0
+
+    def test_utilization(self):
+        clock = Clock()
+        task = ManualMPITask()
+        packer = MPIPacker(4, clock=clock)
+        submit(packer, task, "a", 3)
+        submit(packer, task, "b", 1)
+        clock.now = 10.0
+        task.finish("b")
+        clock.now = 20.0
+        task.finish("a")
+
+        u = packer.utilization()
+        assert u["tasks"] == 2
+        assert u["elapsed"] == 20.0
+        assert u["busy_node_seconds"] == 70.0
+        assert u["available_node_seconds"] == 80.0
+        assert u["utilization"] == pytest.approx(0.875)
+        assert "87.5% utilization" in packer.summary()
+        assert "2 tasks on 1 x 4 nodes" in packer.summary()
@@ -11,7 +11,7 @@ import pytest
 
 import chiltepin.configure
 from chiltepin import run_workflow
-from chiltepin.tasks import bash_task
+from chiltepin.tasks import bash_task, mpi_task
 
 
 # Set up fixture to initialize and cleanup Parsl
@@ -105,6 +105,39 @@ def test_parsl_hello_mpi(config):
             assert re.match(r"Hello world from host \S+, rank \d+ out of 6", line)
 
 
+def test_mpi_task_hello(config):
+    output_dir = config["output_dir"]
+
+    # Define a bash task to compile the MPI code
+    @bash_task
+    def compile_mpi_hello(dirpath):
+        return f"""
+        cd {dirpath}
+        $CHILTEPIN_MPIF90 -o mpi_hello.exe ../mpi_hello.f90
+        """
+
+    # Define an MPI task to run the MPI program on 3 nodes with 2 ranks each
+    @mpi_task(num_nodes=3, ranks_per_node=2, launcher_options="--overcommit")
+    def run_mpi_hello(dirpath):
+        return f"{dirpath}/mpi_hello.exe"
+
+    future = compile_mpi_hello(output_dir, executor=["compute"])
+    assert future.result() == 0
+
+    stdout = output_dir / "test_mpi_task_hello_run.out"
+    if os.path.exists(stdout):
+        os.remove(stdout)
+    future = run_mpi_hello(output_dir, stdout=(str(stdout), "w"), executor=["mpi"])
+    assert future.result() == 0
+
+    # Check output
+    with open(stdout, "r") as f:
+        lines = [line for line in f if line.startswith("Hello")]
+    assert len(lines) == 6
+    for line in lines:
+        assert re.match(r"Hello world from host \S+, rank \d+ out of 6", line)
+
+
 def test_parsl_pi_mpi(config):
     output_dir = config["output_dir"]
 
@@ -0,0 +1,154 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for chiltepin.pipeline module.
+
+Most tests drive the pipeline with plain futures so that the order in which
+items advance can be controlled exactly.  The last test runs a pipeline of
+real tasks in a workflow.
+"""
+
+import pathlib
+from concurrent.futures import Future
+
+import pytest
+
+from chiltepin import run_workflow
+from chiltepin.pipeline import Pipeline, Stage
+from chiltepin.tasks import python_task
+
+
+class ManualTask:
+    """Task stand-in whose futures are completed by the test."""
+
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+        self.futures = {}
+
+    def __call__(self, value, **kwargs):
+        self.log.append((self.name, value))
+        future = Future()
+        self.futures[value] = future
+        return future
+
+    def finish(self, value, result=None):
+        self.futures.pop(value).set_result(value if result is None else result)
+
+
+class TestStage:
+    """Test Stage construction."""
+
+    def test_invalid_max_in_flight(self):
+        with pytest.raises(ValueError, match="max_in_flight"):
+            Stage(ManualTask("a", []), max_in_flight=0)
+
+    def test_empty_pipeline(self):
+        with pytest.raises(ValueError, match="at least one stage"):
+            Pipeline()
+
+
+class TestPipeline:
+    """Test how items flow through pipeline stages."""
+
+    def test_items_advance_independently(self):
+        log = []
+        first = ManualTask("first", log)
+        second = ManualTask("second", log)
+        pipeline = Pipeline(Stage(first), Stage(second))
+        futures = pipeline.map([1, 2, 3])
+        assert log == [("first", 1), ("first", 2), ("first", 3)]
+
+        # Item 2 moves on without waiting for items 1 and 3
+        first.finish(2, result=20)
+        assert log[-1] == ("second", 20)
+        second.finish(20, result=200)
+        assert futures[1].result() == 200
+        assert not futures[0].done()
+
+    def test_max_in_flight(self):
+        log = []
+        first = ManualTask("first", log)
+        second = ManualTask("second", log)
+        pipeline = Pipeline(Stage(first, max_in_flight=2), Stage(second))
+        pipeline.map([1, 2, 3, 4])
+        assert log == [("first", 1), ("first", 2)]
+
+        first.finish(1)
+        assert log[2:] == [("second", 1), ("first", 3)]
+
+    def test_later_stages_drain_first(self):
+        log = []
+        first = ManualTask("first", log)
+        second = ManualTask("second", log)
+        pipeline = Pipeline(Stage(first, max_in_flight=1), Stage(second))
+        pipeline.map([1, 2])
+        first.finish(1)
+        assert log == [("first", 1), ("second", 1), ("first", 2)]
+
+    def test_pass_item_and_kwargs(self):
+        calls = []
+
+        def task(value, **kwargs):
+            calls.append((value, kwargs))
+            future = Future()
+            future.set_result(value * 10)
+            return future
+
+        pipeline = Pipeline(
+            Stage(task),
+            Stage(task, pass_item=True, executor=["compute"]),
+            Stage(task),
+        )
+        assert pipeline.submit(2).result() == 200
+        assert calls == [(2, {}), (2, {"executor": ["compute"]}), (20, {})]
+
+    def test_failures_skip_later_stages(self):
+        log = []
+        first = ManualTask("first", log)
+        second = ManualTask("second", log)
+        pipeline = Pipeline(Stage(first, max_in_flight=1), Stage(second))
+        futures = pipeline.map([1, 2])
+        first.futures.pop(1).set_exception(RuntimeError("stage failed"))
+        with pytest.raises(RuntimeError, match="stage failed"):
+            futures[0].result()
+        # The failed item freed its slot for the next one
+        assert log == [("first", 1), ("first", 2)]
+
+    def test_submission_errors(self):
+        def broken(value):
+            raise ValueError("cannot submit")
+
+        pipeline = Pipeline(Stage(broken, max_in_flight=1))
+        futures = pipeline.map([1, 2])
+        for future in futures:
+            with pytest.raises(ValueError, match="cannot submit"):
+                future.result()
+
+
+@python_task
+def double(x):
+    return 2 * x
+
+
+@python_task
+def increment(x):
+    return x + 1
+
+
+def test_pipeline_in_workflow(tmp_path):
+    """Test a pipeline of python tasks in a workflow."""
+    project_root = pathlib.Path(__file__).parent.parent.resolve()
+    config = {
+        "pipeline-local": {
+            "provider": "localhost",
+            "max_workers_per_node": 2,
+            "environment": [f"export PYTHONPATH=${{PYTHONPATH}}:{project_root}"],
+        }
+    }
+    with run_workflow(config, run_dir=str(tmp_path / "runinfo")):
+        pipeline = Pipeline(
+            Stage(double, max_in_flight=2, executor=["pipeline-local"]),
+            Stage(increment, max_in_flight=1, executor=["pipeline-local"]),
+        )
+        futures = pipeline.map(range(5))
+        assert [f.result() for f in futures] == [1, 3, 5, 7, 9]
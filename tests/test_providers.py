@@ -0,0 +1,177 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for chiltepin.providers module.
+
+The providers run against the fake scheduler commands of fake_scheduler.py,
+so that no batch system is needed.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+
+import chiltepin.configure as configure
+from chiltepin.providers import (
+    MultiPartitionSlurmProvider,
+    MultiQueuePBSProProvider,
+    choose_candidate,
+)
+from tests import fake_scheduler
+
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch):
+    """Put the fake scheduler commands first in PATH"""
+
+    def install(queues):
+        bin_dir = tmp_path / "bin"
+        fake_scheduler.install(bin_dir, queues)
+        monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+        monkeypatch.setenv("FAKE_SCHEDULER_DIR", str(bin_dir))
+        return bin_dir
+
+    return install
+
+
+def submit_block(provider, tmp_path):
+    """Submit one block with the provider"""
+    provider.script_dir = str(tmp_path)
+    return provider.submit("true", 1)
+
+
+class TestChooseCandidate:
+    """Test choose_candidate() function."""
+
+    def test_lowest_estimate(self):
+        assert choose_candidate({"a": 60.0, "b": 0.0, "c": 30.0}) == "b"
+
+    def test_unknown_estimates_last(self):
+        assert choose_candidate({"a": None, "b": 600.0}) == "b"
+
+    def test_ties_keep_order(self):
+        assert choose_candidate({"a": None, "b": None}) == "a"
+        assert choose_candidate({"a": 5.0, "b": 5.0}) == "a"
+
+
+class TestMultiPartitionSlurmProvider:
+    """Test MultiPartitionSlurmProvider with the fake scheduler."""
+
+    def test_probe(self, scheduler):
+        scheduler({"batch": {"start": 3600, "queued": 0}})
+        provider = MultiPartitionSlurmProvider(["batch", "missing"])
+        assert 3500 < provider.probe("batch") <= 3600
+        assert provider.probe("missing") is None
+
+    def test_submits_where_block_starts_soonest(self, scheduler, tmp_path):
+        bin_dir = scheduler(
+            {
+                "batch": {"start": 7200, "queued": 0},
+                "debug": {"start": 0, "queued": 0},
+                "bigmem": {"start": 600, "queued": 0},
+            }
+        )
+        provider = MultiPartitionSlurmProvider(["batch", "debug", "bigmem"])
+        job_id = submit_block(provider, tmp_path)
+        assert provider.choices == {job_id: "debug"}
+        assert fake_scheduler.submitted(bin_dir) == [
+            {"job_id": job_id, "queue": "debug"}
+        ]
+        # The partition is only added to the script of that block
+        assert "--partition" not in provider.scheduler_options
+
+    def test_falls_back_to_first_partition(self, scheduler, tmp_path):
+        bin_dir = scheduler({})
+        provider = MultiPartitionSlurmProvider(["batch", "debug"])
+        submit_block(provider, tmp_path)
+        assert provider.estimates == {"batch": None, "debug": None}
+        assert fake_scheduler.submitted(bin_dir)[0]["queue"] == "batch"
+
+    def test_needs_partitions(self):
+        with pytest.raises(ValueError, match="At least one partition"):
+            MultiPartitionSlurmProvider([])
+
+    def test_probe_options(self):
+        provider = MultiPartitionSlurmProvider(
+            ["batch"], account="proj", qos="normal", exclusive=False
+        )
+        with mock.patch.object(
+            provider, "execute_wait", return_value=(1, "", "")
+        ) as execute:
+            assert provider.probe("batch") is None
+        cmd = execute.call_args.args[0]
+        assert "--account=proj --qos=normal" in cmd
+        assert "--exclusive" not in cmd
+
+    def test_probe_errors(self):
+        provider = MultiPartitionSlurmProvider(["batch"])
+        with mock.patch.object(provider, "execute_wait", side_effect=OSError):
+            assert provider.probe("batch") is None
+        with mock.patch.object(
+            provider, "execute_wait", return_value=(0, "", "to start at soon")
+        ):
+            assert provider.probe("batch") is None
+
+    def test_probe_time_zone(self):
+        """Test start estimates printed with a UTC offset."""
+        start = datetime.now(timezone(timedelta(hours=-7))) + timedelta(hours=1)
+        provider = MultiPartitionSlurmProvider(["batch"])
+        output = f"sbatch: Job 1 to start at {start.isoformat(timespec='seconds')}"
+        with mock.patch.object(provider, "execute_wait", return_value=(0, "", output)):
+            assert 3500 < provider.probe("batch") <= 3600
+
+
+class TestMultiQueuePBSProProvider:
+    """Test MultiQueuePBSProProvider with the fake scheduler."""
+
+    def test_submits_to_least_loaded_queue(self, scheduler, tmp_path):
+        bin_dir = scheduler(
+            {"workq": {"start": 0, "queued": 40}, "short": {"start": 0, "queued": 3}}
+        )
+        provider = MultiQueuePBSProProvider(["workq", "short", "missing"])
+        job_id = submit_block(provider, tmp_path)
+        assert provider.estimates == {"workq": 40.0, "short": 3.0, "missing": None}
+        assert provider.choices == {job_id: "short"}
+        assert fake_scheduler.submitted(bin_dir)[0]["queue"] == "short"
+        assert provider.queue is None
+
+    def test_restores_queue(self, scheduler, tmp_path):
+        scheduler({"short": {"start": 0, "queued": 0}})
+        provider = MultiQueuePBSProProvider(["short"])
+        provider.queue = "workq"
+        submit_block(provider, tmp_path)
+        assert provider.queue == "workq"
+
+    def test_needs_queues(self):
+        with pytest.raises(ValueError, match="At least one queue"):
+            MultiQueuePBSProProvider([])
+
+    def test_probe_errors(self):
+        provider = MultiQueuePBSProProvider(["workq"])
+        with mock.patch.object(provider, "execute_wait", side_effect=OSError):
+            assert provider.probe("workq") is None
+        with mock.patch.object(
+            provider, "execute_wait", return_value=(0, "Queue Max Tot\n", "")
+        ):
+            assert provider.probe("workq") is None
+
+
+class TestCreateProvider:
+    """Test the candidate options of configure.create_provider()."""
+
+    def test_slurm_partitions(self, scheduler):
+        scheduler({})
+        provider = configure.create_provider(
+            {"provider": "slurm", "partitions": ["batch", "debug"], "account": "a"}
+        )
+        assert isinstance(provider, MultiPartitionSlurmProvider)
+        assert provider.partitions == ["batch", "debug"]
+        assert provider.account == "a"
+
+    def test_pbspro_queues(self):
+        provider = configure.create_provider(
+            {"provider": "pbspro", "queues": ["workq", "short"]}
+        )
+        assert isinstance(provider, MultiQueuePBSProProvider)
+        assert provider.queues == ["workq", "short"]
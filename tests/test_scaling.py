@@ -0,0 +1,190 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for chiltepin.scaling module.
+
+The scaling policy is driven with executor stand-ins and a manual clock so
+that the blocks it keeps can be checked exactly.  The last tests run the
+policy in a workflow.
+"""
+
+import pathlib
+import time
+from types import SimpleNamespace
+
+import parsl
+import pytest
+from parsl.jobs.states import JobState, JobStatus
+
+import chiltepin.scaling as scaling
+from chiltepin import run_workflow
+from chiltepin.tasks import python_task
+
+
+class Clock:
+    """Clock stand-in advanced by the test."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeExecutor:
+    """Block provisioning executor stand-in."""
+
+    def __init__(self, min_blocks=0, max_blocks=4):
+        self.provider = SimpleNamespace(min_blocks=min_blocks, max_blocks=max_blocks)
+        self.status_facade = {}
+        self.tasks = 0
+
+    def outstanding(self):
+        return self.tasks
+
+    def scale_out_facade(self, n):
+        start = len(self.status_facade)
+        for block in range(start, start + n):
+            self.status_facade[str(block)] = JobStatus(JobState.PENDING)
+        return [str(block) for block in range(start, start + n)]
+
+
+class TestScalingPolicy:
+    """Test the blocks kept by ScalingPolicy."""
+
+    def make_policy(self, grace=0, **kwargs):
+        executor = FakeExecutor(**kwargs)
+        clock = Clock()
+        policy = scaling.ScalingPolicy(
+            {"compute": executor, "threads": SimpleNamespace()},
+            {"compute": {"scale_in_grace": grace}},
+            clock=clock,
+        )
+        return policy, executor, clock
+
+    def test_only_block_executors(self):
+        policy, _, _ = self.make_policy()
+        assert list(policy.executors) == ["compute"]
+        with pytest.raises(ValueError, match="does not provision blocks"):
+            policy.floor("threads")
+
+    def test_burst_scales_out_and_restores(self):
+        policy, executor, _ = self.make_policy(min_blocks=1)
+        executor.scale_out_facade(1)
+        with policy.burst("compute", 3):
+            assert executor.provider.min_blocks == 3
+            assert len(executor.status_facade) == 3
+        assert executor.provider.min_blocks == 1
+
+    def test_burst_limited_by_max_blocks(self):
+        policy, executor, _ = self.make_policy(max_blocks=2)
+        with policy.burst("compute", 5):
+            assert executor.provider.min_blocks == 2
+            assert len(executor.status_facade) == 2
+
+    def test_burst_grace(self):
+        policy, executor, clock = self.make_policy(grace=60)
+        with policy.burst("compute", 2):
+            pass
+        assert policy.floor("compute") == 2
+        clock.now = 59
+        policy.step()
+        assert executor.provider.min_blocks == 2
+        clock.now = 61
+        policy.step()
+        assert executor.provider.min_blocks == 0
+        # An explicit grace overrides the resource's
+        with policy.burst("compute", 2, grace=0):
+            pass
+        assert executor.provider.min_blocks == 0
+
+    def test_invalid_burst(self):
+        policy, _, _ = self.make_policy()
+        with pytest.raises(ValueError, match="at least 1"):
+            with policy.burst("compute", 0):
+                pass
+
+    def test_scale_in_grace_after_busy(self):
+        policy, executor, clock = self.make_policy(grace=30)
+        executor.scale_out_facade(2)
+        executor.tasks = 5
+        policy.step()
+        assert executor.provider.min_blocks == 2
+        executor.tasks = 0
+        clock.now = 20
+        policy.step()
+        assert executor.provider.min_blocks == 2
+        clock.now = 31
+        policy.step()
+        assert executor.provider.min_blocks == 0
+
+    def test_no_grace_by_default(self):
+        policy, executor, _ = self.make_policy()
+        executor.scale_out_facade(2)
+        executor.tasks = 5
+        policy.step()
+        assert executor.provider.min_blocks == 0
+
+    def test_stop_restores_min_blocks(self):
+        policy, executor, _ = self.make_policy(min_blocks=1)
+        policy.period = 0.01
+        policy.start()
+        hold = policy.burst("compute", 3)
+        hold.__enter__()
+        policy.stop()
+        assert executor.provider.min_blocks == 1
+
+    def test_burst_needs_workflow(self):
+        with pytest.raises(RuntimeError, match="inside a running workflow"):
+            with scaling.burst("compute", 2):
+                pass
+
+
+def test_scaling_in_workflow(tmp_path):
+    """Test the scaling options and burst() in a workflow."""
+
+    @python_task
+    def nap(x):
+        import time
+
+        time.sleep(0.1)
+        return x
+
+    project_root = pathlib.Path(__file__).parent.parent.resolve()
+    config = {
+        "burst-local": {
+            "provider": "localhost",
+            "max_blocks": 2,
+            "strategy": "htex_auto_scale",
+            "parallelism": 0.5,
+            "max_idletime": 10,
+            "scale_in_grace": 5,
+            "environment": [f"export PYTHONPATH=${{PYTHONPATH}}:{project_root}"],
+        }
+    }
+    with run_workflow(config, run_dir=str(tmp_path / "runinfo")):
+        dfk = parsl.dfk()
+        assert dfk.config.strategy == "htex_auto_scale"
+        assert dfk.config.max_idletime == 10.0
+        executor = dfk.executors["burst-local"]
+        assert executor.provider.parallelism == 0.5
+
+        with scaling.burst("burst-local", 2):
+            assert executor.provider.min_blocks == 2
+            futures = [nap(i, executor=["burst-local"]) for i in range(4)]
+            assert [f.result() for f in futures] == [0, 1, 2, 3]
+        # The blocks are kept for the scale-in grace period
+        assert scaling.current_policy().floor("burst-local") == 2
+        assert len(executor.blocks_to_job_id) == 2
+    assert scaling.current_policy() is None
+    assert executor.provider.min_blocks == 0
+
+
+def test_none_strategy_pins_blocks(tmp_path):
+    """Test that resources with the "none" strategy never scale."""
+    config = {"pinned": {"provider": "localhost", "strategy": "none", "init_blocks": 1}}
+    with run_workflow(config, run_dir=str(tmp_path / "runinfo")):
+        dfk = parsl.dfk()
+        assert dfk.config.strategy == "none"
+        provider = dfk.executors["pinned"].provider
+        assert (provider.min_blocks, provider.max_blocks) == (1, 1)
+        time.sleep(0.1)
@@ -0,0 +1,216 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for chiltepin.serialization module.
+
+Blob stands in for NumPy arrays: like them, it hands its memory to pickle
+protocol 5 as an out-of-band buffer.
+"""
+
+import os
+import pathlib
+import pickle
+from concurrent.futures import Future
+from unittest import mock
+
+import pytest
+
+import chiltepin.serialization as serialization
+from chiltepin import run_workflow
+from chiltepin.tasks import python_task
+
+
+class Blob:
+    """Array stand-in with an out-of-band buffer."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= 5:
+            return Blob, (pickle.PickleBuffer(self.data),)
+        return Blob, (bytes(self.data),)
+
+    def tobytes(self):
+        return bytes(self.data)
+
+
+class TestSerializers:
+    """Test encoding and decoding with each serializer."""
+
+    @pytest.mark.parametrize("name", ["shm", "file"])
+    def test_round_trip(self, name):
+        serializer = serialization.get_serializer(name)
+        value = {"field": Blob(bytearray(b"x" * 1000)), "step": 3}
+        encoded = serializer.encode(value)
+        assert isinstance(encoded, serialization.Encoded)
+        # Only the location of the data travels
+        assert b"x" * 1000 not in encoded.header
+        decoded = encoded.decode()
+        assert decoded["field"].tobytes() == b"x" * 1000
+        assert decoded["step"] == 3
+        # Decoded buffers are writable in place
+        decoded["field"].data[0] = ord("y")
+        encoded.release()
+
+    def test_without_buffers(self):
+        serializer = serialization.get_serializer("shm")
+        value = {"a": [1, 2, 3]}
+        assert serializer.encode(value) is value
+        unpicklable = lambda: None  # noqa: E731
+        assert serializer.encode(unpicklable) is unpicklable
+
+    def test_file_release(self, tmp_path):
+        serializer = serialization.FileSerializer(str(tmp_path))
+        encoded = serializer.encode([Blob(bytearray(b"ab")), Blob(bytearray(b"cde"))])
+        path, offsets = encoded.frames
+        assert [offset % 64 for offset, _ in offsets] == [0, 0]
+        decoded = encoded.decode()
+        encoded.release()
+        assert not os.path.exists(path)
+        # Mapped buffers outlive the file
+        assert [b.tobytes() for b in decoded] == [b"ab", b"cde"]
+
+    def test_release_twice(self, tmp_path):
+        serializer = serialization.FileSerializer(str(tmp_path))
+        encoded = serializer.encode(Blob(bytearray(b"ab")))
+        encoded.release()
+        encoded.release()
+        assert os.listdir(tmp_path) == []
+
+    def test_empty_buffers(self, tmp_path):
+        path = str(tmp_path / "empty")
+        offsets = serialization.write_buffers(path, [memoryview(b"")])
+        assert serialization.map_buffers(path, offsets) == [bytearray()]
+
+    def test_without_shared_memory(self):
+        with mock.patch("os.path.isdir", return_value=False):
+            with pytest.raises(RuntimeError, match="needs /dev/shm"):
+                serialization.get_serializer("shm")
+
+    def test_serializer_is_abstract(self):
+        with pytest.raises(TypeError):
+            serialization.Serializer()
+
+    def test_wrap(self, tmp_path):
+        serializer = serialization.FileSerializer(str(tmp_path))
+        run = serialization.wrap(
+            lambda blob, times=1: blob.tobytes() * times, serializer
+        )
+        encoded = serializer.encode(Blob(bytearray(b"ab")))
+        assert run(encoded, times=serializer.encode(2)) == b"abab"
+        encoded.release()
+
+    def test_invalid_serializer(self):
+        assert serialization.get_serializer(None) is None
+        with pytest.raises(ValueError, match="Invalid serializer 'json'"):
+            serialization.get_serializer("json")
+
+
+class TestEncodeArguments:
+    """Test encode_arguments() function."""
+
+    def test_encodes_values_but_not_parsl_kwargs(self, tmp_path):
+        serializer = serialization.FileSerializer(str(tmp_path))
+        dependency = Future()
+        args, kwargs, releases = serialization.encode_arguments(
+            (Blob(bytearray(b"a")), dependency, 2),
+            {"other": Blob(bytearray(b"b")), "inputs": [Blob(bytearray(b"c"))]},
+            serializer,
+        )
+        assert isinstance(args[0], serialization.Encoded)
+        assert args[1:] == (dependency, 2)
+        assert isinstance(kwargs["other"], serialization.Encoded)
+        assert isinstance(kwargs["inputs"][0], Blob)
+        assert len(os.listdir(tmp_path)) == 2
+        for release in releases:
+            release()
+        assert os.listdir(tmp_path) == []
+
+    def test_hands_over_decoded_futures(self, tmp_path):
+        serializer = serialization.FileSerializer(str(tmp_path))
+        task_future = Future()
+        task_future.tid = 7
+        result = serialization.DecodedFuture(task_future)
+        assert result.tid == 7
+        args, _, releases = serialization.encode_arguments((result,), {}, serializer)
+        assert args == (task_future,)
+
+        task_future.set_result(serializer.encode(Blob(bytearray(b"data"))))
+        assert result.result().tobytes() == b"data"
+        # The encoded result is kept for the task that uses it
+        assert len(os.listdir(tmp_path)) == 1
+        releases[0]()
+        assert os.listdir(tmp_path) == []
+
+        # Once released, the decoded result is encoded again
+        args, _, releases = serialization.encode_arguments((result,), {}, serializer)
+        assert isinstance(args[0], serialization.Encoded)
+        releases[0]()
+
+    def test_decoded_future_exception(self):
+        task_future = Future()
+        result = serialization.DecodedFuture(task_future)
+        task_future.set_exception(RuntimeError("failed"))
+        with pytest.raises(RuntimeError, match="failed"):
+            result.result()
+
+    def test_decode_failure(self, tmp_path):
+        serializer = serialization.FileSerializer(str(tmp_path))
+        encoded = serializer.encode(Blob(bytearray(b"data")))
+        encoded.release()
+        task_future = Future()
+        result = serialization.DecodedFuture(task_future)
+        task_future.set_result(encoded)
+        with pytest.raises(FileNotFoundError):
+            result.result()
+        # The failed future is passed on for Parsl to report
+        args, _, releases = serialization.encode_arguments((result,), {}, serializer)
+        assert args == (result,)
+        assert releases == []
+
+
+def test_submission_failure_releases_arguments(tmp_path):
+    """Test that encoded arguments are released when a task fails to submit."""
+
+    @python_task(serializer=serialization.FileSerializer(str(tmp_path)))
+    def size(blob):
+        return len(blob.tobytes())
+
+    with mock.patch(
+        "chiltepin.tasks._submit", side_effect=RuntimeError("no executor")
+    ) as submit:
+        with pytest.raises(RuntimeError, match="no executor"):
+            size(Blob(bytearray(b"data")), executor=["missing"])
+    submit.assert_called_once()
+    # The files of the encoded arguments are not leaked
+    assert os.listdir(tmp_path) == []
+
+
+def test_serializers_in_workflow(tmp_path):
+    """Test python tasks that use serializers in a workflow."""
+
+    @python_task(serializer="shm")
+    def double(blob):
+        from tests.test_serialization import Blob
+
+        return Blob(bytearray(blob.tobytes() * 2))
+
+    @python_task(serializer="file")
+    def size(blob, offset=0):
+        return len(blob.tobytes()) + offset
+
+    project_root = pathlib.Path(__file__).parent.parent.resolve()
+    config = {
+        "serialization-local": {
+            "provider": "localhost",
+            "environment": [f"export PYTHONPATH=${{PYTHONPATH}}:{project_root}"],
+        }
+    }
+    executor = ["serialization-local"]
+    with run_workflow(config, run_dir=str(tmp_path / "runinfo")):
+        doubled = double(Blob(bytearray(b"abc")), executor=executor)
+        # The shared memory result is handed over to the next task
+        quadrupled = double(doubled, executor=executor)
+        assert doubled.result().tobytes() == b"abcabc"
+        assert quadrupled.result().tobytes() == b"abc" * 4
+        assert size(quadrupled, offset=1, executor=executor).result() == 13
@@ -0,0 +1,136 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for chiltepin.store module."""
+
+import os
+import pathlib
+import pickle
+
+import pytest
+
+from chiltepin import run_workflow
+from chiltepin.store import (
+    Proxy,
+    ResultStore,
+    get_result_store,
+    resolve,
+    resolve_arguments,
+)
+from chiltepin.tasks import python_task
+from tests.test_serialization import Blob
+
+
+class Array(list):
+    """Array stand-in that converts to a NumPy array."""
+
+    def __array__(self, dtype=None):
+        return ("array", dtype)
+
+
+class TestResultStore:
+    """Test storing results and resolving proxies."""
+
+    def test_put_and_resolve(self, tmp_path):
+        store = ResultStore(str(tmp_path / "results"), threshold=100)
+        proxy = store.put({"field": Blob(bytearray(b"x" * 1000)), "step": 3})
+        assert isinstance(proxy, Proxy)
+        assert os.path.dirname(proxy.path) == str(tmp_path / "results")
+        # Pickling a proxy only pickles the reference
+        assert len(pickle.dumps(proxy)) < 300
+        value = resolve(pickle.loads(pickle.dumps(proxy)))
+        assert value["field"].tobytes() == b"x" * 1000
+        assert value["step"] == 3
+
+    def test_forwarding(self, tmp_path):
+        store = ResultStore(str(tmp_path), threshold=0)
+        proxy = store.put([Blob(bytearray(b"ab")), Blob(bytearray(b"cd"))])
+        assert len(proxy) == 2
+        assert proxy[1].tobytes() == b"cd"
+        assert [b.tobytes() for b in proxy] == [b"ab", b"cd"]
+        assert proxy.count(proxy[0]) == 1
+        with pytest.raises(AttributeError):
+            proxy._missing
+
+    def test_small_results_returned(self, tmp_path):
+        store = ResultStore(str(tmp_path))
+        assert store.put([1, 2, 3]) == [1, 2, 3]
+        unpicklable = lambda: None  # noqa: E731
+        assert store.put(unpicklable) is unpicklable
+        assert not any(tmp_path.iterdir())
+
+    def test_large_results_without_buffers(self, tmp_path):
+        store = ResultStore(str(tmp_path), threshold=1000)
+        proxy = store.put(list(range(1000)))
+        assert isinstance(proxy, Proxy)
+        assert proxy.resolve() == list(range(1000))
+
+    def test_array(self, tmp_path):
+        store = ResultStore(str(tmp_path), threshold=0)
+        proxy = store.put(Array([1, 2]))
+        assert proxy.__array__("float32") == ("array", "float32")
+        assert repr(proxy) == f"Proxy({proxy.path!r})"
+
+    def test_evict_and_clear(self, tmp_path):
+        store = ResultStore(str(tmp_path), threshold=0)
+        first, second = store.put([1]), store.put([2])
+        assert first.resolve() == [1]
+        store.evict(first)
+        assert not os.path.exists(first.path)
+        assert first.resolve() == [1]
+        # Evicting a result twice is harmless
+        store.evict(first)
+        (tmp_path / "other").write_text("kept")
+        store.clear()
+        assert not os.path.exists(second.path)
+        assert [p.name for p in tmp_path.iterdir()] == ["other"]
+
+    def test_resolve_arguments(self, tmp_path):
+        store = ResultStore(str(tmp_path), threshold=0)
+        run = resolve_arguments(lambda a, b=None: (a, b))
+        assert run(store.put([1]), b=store.put([2])) == ([1], [2])
+        assert run(3) == (3, None)
+
+    def test_wrap(self, tmp_path):
+        store = ResultStore(str(tmp_path), threshold=0)
+        run = store.wrap(lambda n: list(range(n)))
+        assert run(3).resolve() == [0, 1, 2]
+
+    def test_get_result_store(self, tmp_path):
+        store = ResultStore(str(tmp_path))
+        assert get_result_store(None) is None
+        assert get_result_store(store) is store
+        assert get_result_store(str(tmp_path)).directory == str(tmp_path)
+
+
+def test_result_store_in_workflow(tmp_path):
+    """Test passing stored results between python tasks."""
+    results = ResultStore(str(tmp_path / "results"), threshold=100)
+
+    @python_task(result_store=results)
+    def produce(n):
+        from tests.test_serialization import Blob
+
+        return Blob(bytearray(b"z" * n))
+
+    @python_task
+    def consume(blob, tail):
+        return len(blob.tobytes()) + len(tail.tobytes())
+
+    project_root = pathlib.Path(__file__).parent.parent.resolve()
+    config = {
+        "store-local": {
+            "provider": "localhost",
+            "environment": [f"export PYTHONPATH=${{PYTHONPATH}}:{project_root}"],
+        }
+    }
+    executor = ["store-local"]
+    with run_workflow(config, run_dir=str(tmp_path / "runinfo")):
+        large = produce(1000, executor=executor)
+        small = produce(10, executor=executor)
+        assert consume(large, tail=small, executor=executor).result() == 1010
+        # Only the large result was stored, and it was never loaded here
+        proxy = large.result()
+        assert isinstance(proxy, Proxy)
+        assert "_value" not in proxy.__dict__
+        assert isinstance(small.result(), Blob)
+    results.clear()
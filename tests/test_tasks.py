@@ -6,16 +6,30 @@ This test suite validates that task decorators work correctly for both
 standalone functions and class methods under Parsl execution.
 """
 
+import copy
 import logging
 import pathlib
 import tempfile
+import threading
+import time
+from concurrent.futures import Future
 from typing import List
+from unittest import mock
 
 import parsl
 import pytest
+from parsl.app.errors import BashExitFailure
 
+import chiltepin.tasks
 from chiltepin import run_workflow
-from chiltepin.tasks import bash_task, join_task, python_task
+from chiltepin.tasks import (
+    SubmissionWindow,
+    bash_task,
+    join_task,
+    mpi_task,
+    python_task,
+    submit_bounded,
+)
 
 
 # Set up fixture to initialize and cleanup Parsl
@@ -37,7 +51,13 @@ def parsl_config():
             "cores_per_node": 2,
             "max_workers_per_node": 2,
             "environment": [f"export PYTHONPATH=${{PYTHONPATH}}:{project_root}"],
-        }
+        },
+        "test-serial": {
+            "provider": "localhost",
+            "cores_per_node": 1,
+            "max_workers_per_node": 1,
+            "environment": [f"export PYTHONPATH=${{PYTHONPATH}}:{project_root}"],
+        },
     }
 
     # Use workflow context manager for Parsl lifecycle
@@ -609,6 +629,17 @@ class TestTaskMetadata:
 
         assert hello_world.__name__ == "hello_world"
 
+    def test_task_can_be_copied(self):
+        """Test that tasks can be copied before their attributes are restored."""
+
+        @mpi_task(num_nodes=2)
+        def model():
+            return "./model.exe"
+
+        copied = copy.copy(model)
+        assert copied.wrapper_func is model.wrapper_func
+        assert copied.resource_specification()["num_nodes"] == 2
+
     def test_bash_task_preserves_name(self, parsl_config):
         """Test that bash_task preserves function name."""
 
@@ -710,3 +741,367 @@ class TestTaskMetadata:
         # Call the wrapper with extra kwargs that should be filtered out
         result = wrapped(5, y=20, ignored_kwarg="should_be_filtered")
         assert result == 25  # 5 + 20 = 25
+
+
+# ===== Submission Window Tests =====
+
+
+class TestSubmissionWindow:
+    """Test SubmissionWindow with plain futures standing in for tasks."""
+
+    def test_invalid_max_outstanding(self):
+        with pytest.raises(ValueError, match="max_outstanding"):
+            SubmissionWindow(0)
+
+    def test_owner_blocks_until_release(self):
+        window = SubmissionWindow(1)
+        first = window.submit(Future)
+        assert window.outstanding == 1
+
+        timer = threading.Timer(0.1, first.set_result, args=(None,))
+        timer.start()
+        start = time.monotonic()
+        window.submit(Future)
+        assert time.monotonic() - start >= 0.05
+        assert window.outstanding == 1
+
+    def test_other_threads_never_block(self):
+        window = SubmissionWindow(1)
+        window.submit(Future)
+        thread = threading.Thread(target=window.submit, args=(Future,))
+        thread.start()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        assert window.outstanding == 2
+
+    def test_submit_error_releases_slot(self):
+        window = SubmissionWindow(1)
+
+        def broken():
+            raise RuntimeError("submit failed")
+
+        with pytest.raises(RuntimeError, match="submit failed"):
+            window.submit(broken)
+        assert window.outstanding == 0
+
+
+class TestSubmitBounded:
+    """Test submit_bounded() with plain futures standing in for tasks."""
+
+    def test_invalid_max_outstanding(self):
+        with pytest.raises(ValueError, match="max_outstanding"):
+            list(submit_bounded(lambda x: Future(), [1], 0))
+
+    def test_lazy_submission(self):
+        consumed = []
+        submitted = []
+
+        def items():
+            for i in range(5):
+                consumed.append(i)
+                yield i
+
+        def task(item, offset=0):
+            submitted.append(item)
+            future = Future()
+            future.set_result(item + offset)
+            return future
+
+        futures = submit_bounded(task, items(), 2, offset=10)
+        first = next(futures)
+        # Only enough items to fill the window have been taken
+        assert consumed == [0, 1, 2]
+        assert first.result() in (10, 11)
+        results = sorted([first.result()] + [f.result() for f in futures])
+        assert results == [10, 11, 12, 13, 14]
+        assert submitted == [0, 1, 2, 3, 4]
+
+
+# ===== MPI Task Tests =====
+
+
+class TestMPITask:
+    """Test mpi_task on a resource without an MPI launcher."""
+
+    def test_mpi_task_runs_command(self, parsl_config):
+        """Test that MPI tasks run their command and record launch timings."""
+        import chiltepin.metrics
+
+        @mpi_task
+        def hello(name):
+            return f"echo hello {name}"
+
+        future = hello("mpi", executor=["test-local"])
+        assert future.result() == 0
+        # The future forwards to the Parsl task, for dependency tracking
+        assert future.tid == future.app_future.tid
+        assert future.task_status() == "exec_done"
+        report = chiltepin.metrics.current().mpi_tasks[-1]
+        assert report["name"] == "hello"
+        assert report["num_nodes"] == 1
+        assert report["ranks_started"] == 1
+        assert report["launch"] >= 0 and report["run"] >= 0
+
+    def test_mpi_task_failure(self, parsl_config):
+        """Test that a non-zero exit code raises BashExitFailure."""
+
+        @mpi_task()
+        def fail():
+            return "exit 3"
+
+        with pytest.raises(BashExitFailure) as excinfo:
+            fail(executor=["test-local"]).result()
+        assert excinfo.value.exitcode == 3
+
+    def test_mpi_task_stdout(self, parsl_config, tmp_path):
+        """Test redirecting the output of an MPI task."""
+
+        @mpi_task
+        def hello():
+            return "echo hello"
+
+        stdout = tmp_path / "hello.out"
+        assert hello(executor=["test-local"], stdout=str(stdout)).result() == 0
+        assert stdout.read_text() == "hello\n"
+
+    def test_mpi_task_rejects_multi_node_on_non_mpi_resource(self, parsl_config):
+        """Test that non-MPI resources only accept one node and one rank."""
+
+        @mpi_task(num_nodes=2)
+        def big():
+            return "true"
+
+        with pytest.raises(ValueError, match="not MPI resources"):
+            big(executor=["test-local"])
+
+    @pytest.mark.parametrize(
+        "override, num_ranks",
+        [
+            ({"num_nodes": 3}, 12),
+            ({"ranks_per_node": 2}, 4),
+            ({"num_nodes": 3, "num_ranks": 5}, 5),
+        ],
+    )
+    def test_resource_spec_override(self, override, num_ranks):
+        """Test that the rank count follows the per-call resource specification."""
+
+        @mpi_task(num_nodes=2, ranks_per_node=4)
+        def model():
+            return "./model.exe"
+
+        with mock.patch.object(
+            chiltepin.tasks, "_check_mpi_spec", side_effect=RuntimeError("stop")
+        ) as check:
+            with pytest.raises(RuntimeError, match="stop"):
+                model(executor=["mpi"], parsl_resource_specification=override)
+        assert check.call_args.args[1]["num_ranks"] == num_ranks
+
+
+class TestTaskPriority:
+    """Test the priority argument of python and bash tasks."""
+
+    def test_high_priority_runs_first(self, parsl_config, tmp_path):
+        """Test that queued tasks with a lower priority value start first."""
+        order = tmp_path / "order"
+
+        @python_task
+        def record(path, name, delay=0):
+            import time
+
+            # Appends are atomic, so the file records the order tasks started in
+            with open(path, "a") as f:
+                f.write(f"{name}\n")
+            time.sleep(delay)
+
+        def started():
+            return order.read_text().split() if order.exists() else []
+
+        # Keep the only worker busy while the other tasks queue up
+        executor = ["test-serial"]
+        busy = record(str(order), "busy", 2, executor=executor)
+        deadline = time.time() + 60
+        while not started() and not busy.done() and time.time() < deadline:
+            time.sleep(0.1)
+        assert started() == ["busy"]
+
+        names = ["routine"] * 4 + ["later", "urgent"]
+        priorities = [None] * 4 + [10, 1]
+        futures = [
+            record(str(order), name, executor=executor, priority=priority)
+            for name, priority in zip(names, priorities)
+        ]
+        busy.result()
+        for future in futures:
+            future.result()
+        assert started() == ["busy", "urgent", "later"] + ["routine"] * 4
+
+    def test_bash_task_priority(self, parsl_config):
+        """Test that bash tasks accept a priority."""
+
+        @bash_task
+        def succeed():
+            return "true"
+
+        assert succeed(executor=["test-local"], priority=0).result() == 0
+
+    def test_priority_added_to_resource_spec(self, monkeypatch):
+        monkeypatch.setattr(chiltepin.tasks, "_resources", {"local": {}})
+        kwargs = {"parsl_resource_specification": {"num_nodes": 1}}
+        chiltepin.tasks._add_priority("all", 5, kwargs)
+        assert kwargs["parsl_resource_specification"] == {"num_nodes": 1, "priority": 5}
+
+    def test_invalid_priority(self, monkeypatch):
+        monkeypatch.setattr(
+            chiltepin.tasks, "_resources", {"local": {}, "mpi": {"mpi": True}}
+        )
+        with pytest.raises(ValueError, match="must be a number"):
+            chiltepin.tasks._add_priority(["local"], "critical", {})
+        with pytest.raises(ValueError, match=r"MPI resources: \['mpi'\]"):
+            chiltepin.tasks._add_priority("all", 1, {})
+
+    def test_mpi_and_join_tasks_reject_priority(self):
+        @mpi_task
+        def launch():
+            return "true"
+
+        @join_task
+        def combine():
+            return Future()
+
+        with pytest.raises(ValueError, match="MPI tasks do not support priorities"):
+            launch(priority=0)
+        with pytest.raises(ValueError, match="join tasks do not support priorities"):
+            combine(priority=0)
+
+    @pytest.mark.parametrize("decorator", [python_task, bash_task, join_task, mpi_task])
+    def test_priority_parameter_rejected(self, decorator):
+        def task(data, priority):
+            return "true"
+
+        with pytest.raises(ValueError, match="cannot have a 'priority' parameter"):
+            decorator(task)
+
+
+class TestCheckMPISpec:
+    """Test how MPI resource specifications are checked at submission."""
+
+    resources = {
+        "local": {},
+        "mpi": {"mpi": True, "nodes_per_block": 2, "cores_per_node": 4},
+    }
+
+    def test_no_active_workflow(self, monkeypatch):
+        monkeypatch.setattr(chiltepin.tasks, "_resources", None)
+        assert chiltepin.tasks._check_mpi_spec(["mpi"], {"num_nodes": 8})
+
+    def test_mpi_resource(self, monkeypatch):
+        monkeypatch.setattr(chiltepin.tasks, "_resources", self.resources)
+        assert chiltepin.tasks._check_mpi_spec(["mpi"], {"num_nodes": 2})
+        with pytest.raises(ValueError, match="needs 3 nodes"):
+            chiltepin.tasks._check_mpi_spec(["mpi"], {"num_nodes": 3})
+
+    def test_mixed_resources(self, monkeypatch):
+        monkeypatch.setattr(chiltepin.tasks, "_resources", self.resources)
+        with pytest.raises(ValueError, match="both MPI and non-MPI"):
+            chiltepin.tasks._check_mpi_spec("all", {"num_nodes": 1})
+
+    def test_non_mpi_resource(self, monkeypatch):
+        monkeypatch.setattr(chiltepin.tasks, "_resources", self.resources)
+        assert not chiltepin.tasks._check_mpi_spec(["local"], {"num_nodes": 1})
+
+    def test_python_and_bash_tasks_checked(self, monkeypatch):
+        """Test that tasks asking for nodes that never fit fail at submission."""
+        monkeypatch.setattr(chiltepin.tasks, "_resources", self.resources)
+
+        @python_task
+        def simulate():
+            return 0
+
+        @bash_task
+        def run():
+            return "$PARSL_MPI_PREFIX ./model.exe"
+
+        spec = {"num_nodes": 4, "num_ranks": 16, "ranks_per_node": 4}
+        with pytest.raises(ValueError, match="needs 4 nodes .* only has 2"):
+            simulate(executor=["mpi"], parsl_resource_specification=spec)
+        with pytest.raises(ValueError, match="needs 4 nodes .* only has 2"):
+            run(executor="all", parsl_resource_specification=spec)
+
+    def test_launcher_options(self, tmp_path, monkeypatch):
+        """Test that the launcher options reach the launched command."""
+        monkeypatch.chdir(tmp_path)
+
+        def run_locally(function, executors):
+            def submit(*args, **kwargs):
+                future = Future()
+                future.set_result(function(*args, **kwargs))
+                return future
+
+            return submit
+
+        @mpi_task(launcher_options="--exclusive")
+        def hello(name):
+            return f"echo hello {name}"
+
+        with mock.patch.object(chiltepin.tasks, "python_app", run_locally):
+            with mock.patch.object(
+                chiltepin.tasks,
+                "_launch_mpi",
+                return_value={"returncode": 0, "launch": 0.0, "run": 0.0},
+            ) as launch:
+                assert hello("mpi", stdout="out").result() == 0
+        launch.assert_called_once_with("echo hello mpi", "out", None)
+        assert hello.resource_specification()["launcher_options"] == "--exclusive"
+
+    def test_failed_task(self):
+        """Test that the exception of a failed MPI task is passed on."""
+        app_future = Future()
+        future = chiltepin.tasks._track_mpi("model", {}, app_future, None)
+        app_future.set_exception(RuntimeError("worker lost"))
+        with pytest.raises(RuntimeError, match="worker lost"):
+            future.result()
+
+
+class TestLaunchMPI:
+    """Test _launch_mpi() with a fake launcher prefix."""
+
+    def test_launch_time_measured_separately(self, monkeypatch, tmp_path):
+        launcher = tmp_path / "fake-mpiexec"
+        launcher.write_text('#!/bin/bash\nsleep 0.5\nexec "$@"\n')
+        launcher.chmod(0o755)
+        monkeypatch.setenv("PARSL_MPI_PREFIX", str(launcher))
+        monkeypatch.chdir(tmp_path)
+
+        report = chiltepin.tasks._launch_mpi("sleep 0.2")
+        assert report["returncode"] == 0
+        assert report["ranks_started"] == 1
+        assert report["launch"] >= 0.5
+        assert 0.2 <= report["run"] < 0.5
+        # The marker file is removed
+        assert list(tmp_path.iterdir()) == [launcher]
+
+    def test_launch_failure(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("PARSL_MPI_PREFIX", "false")
+        monkeypatch.chdir(tmp_path)
+
+        report = chiltepin.tasks._launch_mpi("echo never")
+        assert report["returncode"] == 1
+        assert report["ranks_started"] == 0
+        assert report["run"] == 0
+
+    def test_streams(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("PARSL_MPI_PREFIX", "")
+        monkeypatch.chdir(tmp_path)
+        stdout = tmp_path / "logs" / "model.out"
+        stderr = tmp_path / "model.err"
+        stderr.write_text("previous\n")
+
+        report = chiltepin.tasks._launch_mpi(
+            "echo out; echo err >&2", stdout=str(stdout), stderr=(str(stderr), "a")
+        )
+        assert report["returncode"] == 0
+        assert stdout.read_text() == "out\n"
+        assert stderr.read_text() == "previous\nerr\n"
+        # Relative paths are opened in the working directory
+        chiltepin.tasks._launch_mpi("echo again", stdout="again.out")
+        assert (tmp_path / "again.out").read_text() == "again\n"
@@ -0,0 +1,161 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Tests for chiltepin.watchdog module."""
+
+import json
+import os
+import time
+from unittest import mock
+
+import pytest
+
+from chiltepin.watchdog import EndpointWatchdog
+
+# A PID that is never a running process
+_DEAD_PID = 2**22 + 1
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    for name in ("ep1", "ep2"):
+        (tmp_path / name).mkdir()
+    return tmp_path
+
+
+def write_pid(config_dir, name, pid, age=0.0):
+    pid_path = config_dir / name / "daemon.pid"
+    pid_path.write_text(f"{pid}\n")
+    mtime = time.time() - age
+    os.utime(pid_path, (mtime, mtime))
+
+
+class TestProbe:
+    """Test EndpointWatchdog.probe() method."""
+
+    def test_statuses(self, config_dir):
+        dog = EndpointWatchdog(["ep1"], config_dir=str(config_dir), stale_after=60)
+        assert dog.probe("ep1")["status"] == "stopped"
+        write_pid(config_dir, "ep1", os.getpid())
+        assert dog.probe("ep1") == {
+            "status": "running",
+            "pid": os.getpid(),
+            "last_error": None,
+        }
+        write_pid(config_dir, "ep1", os.getpid(), age=120)
+        assert dog.probe("ep1")["status"] == "unresponsive"
+        write_pid(config_dir, "ep1", _DEAD_PID)
+        assert dog.probe("ep1")["status"] == "dead"
+
+    def test_last_error(self, config_dir):
+        (config_dir / "ep1" / "endpoint.log").write_text("INFO starting\n")
+        dog = EndpointWatchdog(["ep1"], config_dir=str(config_dir))
+        assert dog.probe("ep1")["last_error"] is None
+        (config_dir / "ep1" / "endpoint.log").write_text(
+            "INFO starting\nERROR first\nCRITICAL lost connection\nINFO retrying\n"
+        )
+        assert dog.probe("ep1")["last_error"] == "CRITICAL lost connection"
+
+
+class TestCheck:
+    """Test EndpointWatchdog.check() method with mocked endpoint start/stop."""
+
+    @mock.patch("chiltepin.watchdog.endpoint.start")
+    def test_restarts_dead_endpoints(self, mock_start, config_dir):
+        write_pid(config_dir, "ep1", os.getpid())
+        write_pid(config_dir, "ep2", _DEAD_PID)
+        status_file = config_dir / "status.json"
+        dog = EndpointWatchdog(
+            ["ep1", "ep2"], config_dir=str(config_dir), status_file=str(status_file)
+        )
+
+        dog.check()
+
+        mock_start.assert_called_once_with(
+            "ep2", config_dir=str(config_dir), timeout=300.0
+        )
+        assert not (config_dir / "ep2" / "daemon.pid").exists()
+        status = json.loads(status_file.read_text())["endpoints"]
+        assert status["ep1"]["status"] == "running"
+        assert status["ep1"]["restarts"] == 0
+        assert status["ep2"]["restarts"] == 1
+
+    @mock.patch("chiltepin.watchdog.endpoint.start")
+    @mock.patch("chiltepin.watchdog.endpoint.stop")
+    def test_stops_unresponsive_endpoints(self, mock_stop, mock_start, config_dir):
+        write_pid(config_dir, "ep1", os.getpid(), age=120)
+        dog = EndpointWatchdog(["ep1"], config_dir=str(config_dir), stale_after=60)
+        dog.check()
+        mock_stop.assert_called_once()
+        mock_start.assert_called_once()
+
+    @mock.patch("chiltepin.watchdog.endpoint.start")
+    def test_leaves_stopped_endpoints(self, mock_start, config_dir):
+        write_pid(config_dir, "ep2", _DEAD_PID)
+        dog = EndpointWatchdog(["ep1", "ep2"], config_dir=str(config_dir))
+
+        states = dog.check()
+
+        # Only the dead endpoint is restarted, not the one that was stopped
+        mock_start.assert_called_once_with(
+            "ep2", config_dir=str(config_dir), timeout=300.0
+        )
+        assert states["ep1"]["status"] == "stopped"
+        assert states["ep1"]["restarts"] == 0
+
+    @mock.patch("chiltepin.watchdog.endpoint.start")
+    def test_restart_stopped(self, mock_start, config_dir):
+        dog = EndpointWatchdog(
+            ["ep1"], config_dir=str(config_dir), restart_stopped=True
+        )
+        assert dog.check()["ep1"]["restarts"] == 1
+        mock_start.assert_called_once_with(
+            "ep1", config_dir=str(config_dir), timeout=300.0
+        )
+
+    @mock.patch("chiltepin.watchdog.random.uniform", return_value=1.0)
+    @mock.patch("chiltepin.watchdog.endpoint.start")
+    def test_backoff(self, mock_start, mock_uniform, config_dir):
+        mock_start.side_effect = RuntimeError("login required")
+        dog = EndpointWatchdog(
+            ["ep1"],
+            config_dir=str(config_dir),
+            backoff=10,
+            max_backoff=30,
+            restart_stopped=True,
+        )
+
+        with mock.patch("chiltepin.watchdog.time.time", return_value=1000.0):
+            state = dog.check()["ep1"]
+            assert state["failures"] == 1
+            assert state["next_restart"] == 1010.0
+            assert state["last_error"] == "Restart failed: login required"
+            # Not retried before the backoff expires
+            dog.check()
+            assert mock_start.call_count == 1
+
+        for now, next_restart in [(1010.0, 1030.0), (1030.0, 1060.0)]:
+            with mock.patch("chiltepin.watchdog.time.time", return_value=now):
+                assert dog.check()["ep1"]["next_restart"] == next_restart
+        assert mock_start.call_count == 3
+
+
+class TestRun:
+    """Test EndpointWatchdog.run() method."""
+
+    @mock.patch("chiltepin.watchdog.time.sleep")
+    def test_checks(self, mock_sleep, config_dir):
+        dog = EndpointWatchdog(["ep1"], config_dir=str(config_dir), interval=5)
+        with mock.patch.object(dog, "check") as mock_check:
+            dog.run(checks=3)
+        assert mock_check.call_count == 3
+        # No sleep after the last check
+        assert mock_sleep.call_args_list == [mock.call(5), mock.call(5)]
+
+    @mock.patch("chiltepin.watchdog.time.sleep")
+    def test_until_interrupted(self, mock_sleep, config_dir):
+        mock_sleep.side_effect = [None, KeyboardInterrupt]
+        dog = EndpointWatchdog(["ep1"], config_dir=str(config_dir))
+        with mock.patch.object(dog, "check") as mock_check:
+            with pytest.raises(KeyboardInterrupt):
+                dog.run()
+        assert mock_check.call_count == 2
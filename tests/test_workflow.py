@@ -156,6 +156,97 @@ class TestWorkflowContextManager:
             assert result == "Hello, Workflow!"
 
 
+class TestWorkflowBackpressure:
+    """Test the max_outstanding submission window of run_workflow()."""
+
+    def test_max_outstanding(self, tmp_path):
+        """Test that no more than max_outstanding tasks are outstanding."""
+        import chiltepin.tasks
+
+        @python_task
+        def nap(x):
+            import time
+
+            time.sleep(0.05)
+            return x
+
+        config = add_pythonpath_to_config(
+            {"window-local": {"provider": "localhost", "max_workers_per_node": 4}},
+            "window-local",
+        )
+        peak = 0
+        with run_workflow(config, run_dir=str(tmp_path / "runinfo"), max_outstanding=3):
+            window = chiltepin.tasks.current_window()
+            assert window.max_outstanding == 3
+            futures = []
+            for i in range(12):
+                futures.append(nap(i, executor=["window-local"]))
+                peak = max(peak, window.outstanding)
+            assert [f.result() for f in futures] == list(range(12))
+        assert peak == 3
+        assert chiltepin.tasks.current_window() is None
+
+    def test_no_window_by_default(self, tmp_path):
+        """Test that submissions are not bounded by default."""
+        import chiltepin.tasks
+
+        with run_workflow({}, run_dir=str(tmp_path / "runinfo")):
+            assert chiltepin.tasks.current_window() is None
+
+
+class TestWorkflowResources:
+    """Test that run_workflow makes the loaded resources available to tasks."""
+
+    def test_current_resources(self, tmp_path):
+        """Test that only the included resources and "local" are active."""
+        import chiltepin.tasks
+
+        config = {
+            "a": {"provider": "localhost"},
+            "b": {"provider": "localhost", "max_workers_per_node": 2},
+        }
+        with run_workflow(config, include=["b"], run_dir=str(tmp_path / "runinfo")):
+            resources = chiltepin.tasks.current_resources()
+            assert set(resources) == {"local", "b"}
+            # Resource configurations are normalized
+            assert resources["b"]["max_workers_per_node"] == 2
+            assert resources["b"]["nodes_per_block"] == 1
+            assert resources["local"]["mpi"] is False
+        assert chiltepin.tasks.current_resources() is None
+
+    def test_invalid_endpoint_config(self, tmp_path):
+        """Test that invalid Globus Compute resources fail before loading."""
+        config = {
+            "remote": {
+                "endpoint": "12345678-1234-5678-1234-567812345678",
+                "provider": "slurm",
+                "walltime": "1 hour",
+            }
+        }
+        with mock.patch("chiltepin.configure.load") as load:
+            with pytest.raises(ValueError, match="Resource 'remote': .*walltime"):
+                with run_workflow(
+                    config, run_dir=str(tmp_path / "runinfo"), check_endpoints=True
+                ):
+                    pass
+        load.assert_not_called()
+
+    def test_endpoint_config_not_checked(self, tmp_path):
+        """Test that Globus Compute resources are only checked on request."""
+        config = {
+            "remote": {
+                "endpoint": "12345678-1234-5678-1234-567812345678",
+                "walltime": "1 hour",
+            }
+        }
+        with mock.patch("chiltepin.endpoint.render_template") as render:
+            with mock.patch("chiltepin.configure.load", side_effect=RuntimeError):
+                with pytest.raises(RuntimeError):
+                    with run_workflow(config, run_dir=str(tmp_path / "runinfo")):
+                        pass
+        render.assert_not_called()
+
+
 class TestWorkflowAliases:
     """Test workflow_from_dict and workflow_from_file convenience aliases."""
 
@@ -508,6 +599,20 @@ class TestWorkflowExceptionHandling:
                 # parsl.clear() should still be called even though dfk is None
                 mock_clear.assert_called_once()
 
+    def test_invalid_arguments_remove_logger(self, tmp_path):
+        """Test that the log handler is removed when arguments are invalid."""
+        remove_handler = mock.Mock()
+        with mock.patch("parsl.set_file_logger", return_value=remove_handler):
+            with pytest.raises(ValueError, match="max_in_flight"):
+                with run_workflow(
+                    {},
+                    run_dir=str(tmp_path / "runinfo"),
+                    log_file=str(tmp_path / "parsl.log"),
+                    max_transfers=0,
+                ):
+                    pass
+        remove_handler.assert_called_once()
+
     def test_parsl_clear_exception_without_cleanup_exception(self, tmp_path):
         """Test parsl.clear() exception when dfk.cleanup() succeeds."""
         project_root = pathlib.Path(__file__).parent.parent.resolve()